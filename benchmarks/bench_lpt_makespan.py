@@ -0,0 +1,77 @@
+"""
+Batch-order benchmark: table order vs longest-processing-time-first.
+
+A synthetic crate of 3-7 minute tracks with a few long mixes dropped in
+at random rows — one always last, where table order hurts most. Each
+batch runs through the same queue as ParallelProcessor._run_batch — one
+coroutine per track, an asyncio.Queue of processors handed out first come,
+first served — with the render replaced by a sleep proportional to the
+track's duration. Makespan is wall time; the lower bound is the larger of
+the longest track and the total work split evenly over the workers.
+
+Usage: python benchmarks/bench_lpt_makespan.py [tracks] [batches]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.scheduler import longest_first
+
+# Wall seconds per second of audio — a 60 minute mix "renders" in 0.18 s
+SCALE = 0.00005
+WORKER_COUNTS = (2, 4, 8)
+
+
+def make_batch(count, rnd):
+    """Durations in seconds per table row"""
+    durations = [rnd.uniform(180, 420) for _ in range(count)]
+    for _ in range(max(1, count // 20)):
+        durations[rnd.randrange(count)] = rnd.uniform(1800, 3600)
+    durations[-1] = 3600.0
+    return durations
+
+
+async def run_batch(durations, order, workers):
+    pool = asyncio.Queue()
+    for worker in range(workers):
+        pool.put_nowait(worker)
+    finished = {}
+
+    async def run_track(index):
+        processor = await pool.get()
+        try:
+            await asyncio.sleep(durations[index] * SCALE)
+            finished[index] = processor  # reported by table index, as the real batch does
+        finally:
+            pool.put_nowait(processor)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(asyncio.ensure_future(run_track(i)) for i in order))
+    assert sorted(finished) == list(range(len(durations)))
+    return (time.perf_counter() - start) / SCALE
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    batches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rnd = random.Random(7)
+    crates = [make_batch(count, rnd) for _ in range(batches)]
+
+    print(f"{batches} batches × {count} tracks (minutes of audio per makespan)")
+    for workers in WORKER_COUNTS:
+        table = lpt = bound = 0.0
+        for durations in crates:
+            table += asyncio.run(run_batch(durations, range(count), workers))
+            lpt += asyncio.run(run_batch(durations, longest_first(durations), workers))
+            bound += max(max(durations), sum(durations) / workers)
+        table, lpt, bound = table / batches / 60, lpt / batches / 60, bound / batches / 60
+        print(f"{workers} workers: table order {table:6.1f} min | longest first {lpt:6.1f} min "
+              f"| lower bound {bound:6.1f} min → {100 * (1 - lpt / table):4.1f}% shorter")
+
+
+if __name__ == '__main__':
+    main()
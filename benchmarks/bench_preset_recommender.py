@@ -0,0 +1,98 @@
+"""
+Preset-recommendation benchmark: the proxy model for 8 presets vs one render.
+
+Generates a synthetic dynamic 44.1 kHz track with FFmpeg and analyzes it.
+Then it times what the recommender adds to the analysis stage: the
+envelope fed from the peak pass's read, beyond that read itself, plus
+ranking 8 presets. A single AudioProcessor render pass of the same track
+is timed for comparison; the proxy has to come in under it. Each preset's
+prediction is printed next to its real render.
+
+Usage: python benchmarks/bench_preset_recommender.py [seconds]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.analyzer import AudioAnalyzer
+from core.processor import AudioProcessor
+
+# Added in memory on top of the shipped presets, for 8 in total
+EXTRA_PRESETS = {
+    'bench_loud': {'label': 'Bench Loud', 'target_lufs': -6.0, 'true_peak': -0.3, 'highpass_hz': 40},
+    'bench_warm': {'label': 'Bench Warm', 'target_lufs': -9.0, 'true_peak': -0.5, 'highpass_hz': 20},
+    'bench_tight': {'label': 'Bench Tight', 'target_lufs': -10.0, 'true_peak': -1.5, 'highpass_hz': 50},
+    'bench_soft': {'label': 'Bench Soft', 'target_lufs': -18.0, 'true_peak': -2.0, 'highpass_hz': 30},
+}
+
+
+def make_track(path, seconds):
+    """Stereo pink noise + sub bass with a slow tremolo — peaks near full scale"""
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f"anoisesrc=d={seconds}:r=44100:a=0.5:c=pink",
+        '-f', 'lavfi', '-i', f"sine=f=55:d={seconds}",
+        '-filter_complex',
+        "[0][1]amix=2,aformat=channel_layouts=stereo,tremolo=f=0.2:d=0.6,"
+        "volume=12dB,alimiter=limit=0.97:level=false",
+        '-c:a', 'pcm_s16le', path
+    ], check=True)
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    analyzer = AudioAnalyzer()
+    presets = analyzer.recommender.preset_manager
+    presets.custom_presets.update(EXTRA_PRESETS)
+    while len(presets.get_all_presets()) > 8:
+        presets.custom_presets.popitem()
+    health = analyzer.health_analyzer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'track.wav')
+        make_track(path, seconds)
+        analyzer.cache.invalidate(path)
+        analysis = analyzer.analyze_track(path)
+
+        start = time.perf_counter()
+        health._measure_true_peak(path)
+        read = time.perf_counter() - start
+
+        envelope = analyzer.recommender.envelope()
+        start = time.perf_counter()
+        health._measure_true_peak(path, envelope)
+        ranking = analyzer.recommender.recommend(envelope, analysis)
+        proxy = time.perf_counter() - start - read
+
+        processor = AudioProcessor()
+        renders = {}
+        for prediction in ranking['preset_predictions']:
+            preset = presets.get_preset(prediction['preset'])
+            data = processor._derive_loudness_data(analysis['loudnorm_stats'], preset)
+            output = os.path.join(tmp, f"out_{prediction['preset']}.wav")
+            start = time.perf_counter()
+            _, _, stats = processor._apply_processing(path, output, preset, data, 'wav_24', 44100, seconds)
+            renders[prediction['preset']] = (time.perf_counter() - start, stats)
+
+    print(f"{seconds}s track, LUFS {analysis['lufs']}, LRA {analysis['lra']} — "
+          f"recommended: {ranking['recommended_preset']}")
+    print(f"{'preset':16s} {'fits':>5s} {'pred LUFS':>10s} {'real LUFS':>10s} {'limiting':>9s}")
+    for prediction in ranking['preset_predictions']:
+        _, stats = renders[prediction['preset']]
+        real = f"{stats['integrated']:.1f}" if stats else '—'
+        print(f"{prediction['preset']:16s} {str(prediction['fits']):>5s} {prediction['lufs']:10.1f} "
+              f"{real:>10s} {prediction['limiting_db']:7.1f}dB")
+
+    fastest = min(elapsed for elapsed, _ in renders.values())
+    print(f"proxy, {len(ranking['preset_predictions'])} presets: {proxy:.2f}s "
+          f"(+{read:.2f}s shared read) | fastest single render: {fastest:.2f}s "
+          f"→ {fastest / proxy:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
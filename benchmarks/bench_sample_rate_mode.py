@@ -0,0 +1,84 @@
+"""
+Render-stage benchmark: fixed 44.1 kHz output vs native sample rate.
+
+Generates synthetic 44.1 and 48 kHz tracks with FFmpeg — dynamic ones
+(LRA well above 6, Mode A: loudnorm) and compressed ones (LRA under 6,
+Mode B: gain + limiter) — then times AudioProcessor.process_track on each
+group in three configurations: fixed 44.1 kHz, native as shipped, and
+native with the preset's native_static_gain option on. Loudness analysis
+is done up front and passed in, so only the render is timed.
+
+Native mode saves the conversion where the chain itself never resamples:
+Mode B at any rate, and 48 kHz sources that fixed mode converts to 44.1.
+Dynamic loudnorm upsamples to 192 kHz in every mode, so Mode A tracks only
+skip the round trip with native_static_gain.
+
+Usage: python benchmarks/bench_sample_rate_mode.py [tracks] [seconds]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.processor import AudioProcessor
+from core.lufs_analyzer import LUFSAnalyzer
+
+RATES = (44100, 48000)
+CONFIGS = (('fixed_44100', False), ('native', False), ('native', True))
+
+
+def make_track(path, seconds, index, rate, dynamic):
+    """
+    Stereo tone + noise. dynamic — a slow deep tremolo, LRA well above 6;
+    otherwise a steady level, LRA under 6
+    """
+    shape = "tremolo=f=0.1:d=0.8,volume=-6dB" if dynamic else "volume=25dB"
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f"sine=f={110 * (index + 1)}:d={seconds}:sample_rate={rate}",
+        '-f', 'lavfi', '-i', f"anoisesrc=d={seconds}:r={rate}:a=0.05",
+        '-filter_complex', f"[0][1]amix=2,aformat=channel_layouts=stereo,{shape}",
+        '-c:a', 'pcm_s24le', path
+    ], check=True)
+
+
+def main():
+    tracks = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    with tempfile.TemporaryDirectory() as tmp:
+        analyzer = LUFSAnalyzer()
+        groups = []
+        for dynamic in (True, False):
+            for rate in RATES:
+                sources = []
+                for i in range(tracks):
+                    path = os.path.join(tmp, f"src_{rate}_{'a' if dynamic else 'b'}_{i}.wav")
+                    make_track(path, seconds, i, rate, dynamic)
+                    stats = analyzer.measure_lufs(path)
+                    sources.append((path, {'sample_rate': rate, 'loudnorm_stats': stats['loudnorm_stats']}))
+                groups.append((f"Mode {'A' if dynamic else 'B'} {rate / 1000:g} kHz", sources))
+
+        print(f"{tracks} × {seconds}s per group")
+        for group, sources in groups:
+            for mode, static_gain in CONFIGS:
+                processor = AudioProcessor(sample_rate_mode=mode)
+                preset = processor.preset_manager.get_preset('club_festival')
+                processor.preset_manager.presets['club_festival'] = dict(preset, native_static_gain=static_gain)
+                label = mode + (' +static' if static_gain else '')
+                start = time.perf_counter()
+                for i, (path, analysis) in enumerate(sources):
+                    output = os.path.join(tmp, f"out_{mode}_{i}.wav")
+                    result = processor.process_track(path, 'club_festival', output, 'wav_24', analysis=analysis)
+                    if not result['success']:
+                        print(f"{group} {label}: track {i} failed — {result.get('error')}")
+                elapsed = time.perf_counter() - start
+                print(f"{group:16s} {label:16s} {elapsed:6.2f}s "
+                      f"({elapsed / tracks:.2f}s/track, last LUFS {result.get('final_lufs')})")
+
+
+if __name__ == '__main__':
+    main()
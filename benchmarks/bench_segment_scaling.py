@@ -0,0 +1,93 @@
+"""
+Segment-parallel render benchmark: one long mix on 1, 2, 4 … workers.
+
+Renders a synthetic mix through AudioProcessor._apply_processing_segmented
+with segment_workers set to each count up to the usable cores, and times
+the render alone (analysis is passed in). Reports the speed-up over one
+worker and checks every split output against the single-worker render,
+sample for sample. Exits non-zero if a count the machine has cores for
+falls under MIN_EFFICIENCY of linear scaling.
+
+Usage: python benchmarks/bench_segment_scaling.py [minutes]
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.processor import AudioProcessor
+from core.scheduler import usable_cores
+
+# Speed-up per worker below which segmenting isn't paying for its preroll
+MIN_EFFICIENCY = 0.6
+LOUDNESS = {'input_i': '-16.0', 'input_tp': '-0.5', 'input_lra': '2.0', 'input_thresh': '-26.0'}
+
+
+def make_mix(path, seconds):
+    """44.1 kHz stereo tone + noise — LRA under 6, so the static-gain chain segments"""
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f"sine=f=55:d={seconds}:sample_rate=44100",
+        '-f', 'lavfi', '-i', f"anoisesrc=d={seconds}:r=44100:a=0.05",
+        '-filter_complex', "[0][1]amix=2,aformat=channel_layouts=stereo,volume=-6dB",
+        '-c:a', 'pcm_s24le', path
+    ], check=True)
+
+
+def main():
+    seconds = int(float(sys.argv[1]) * 60) if len(sys.argv) > 1 else 1200
+    cores = usable_cores()
+    counts = [1] + [n for n in (2, 4, 8) if n <= max(2, cores)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'mix.wav')
+        make_mix(source, seconds)
+        print(f"{seconds / 60:.0f} minute mix, {cores} usable cores")
+
+        baseline = reference = None
+        below = []
+        for workers in counts:
+            processor = AudioProcessor()
+            processor.segment_workers = workers
+            preset = processor.preset_manager.get_preset('club_festival')
+            output = os.path.join(tmp, f"out_{workers}.wav")
+            start = time.perf_counter()
+            ok, output, _ = processor._apply_processing_segmented(
+                source, output, preset, LOUDNESS, 'wav_24', 44100, seconds
+            )
+            elapsed = time.perf_counter() - start
+            if not ok:
+                print(f"{workers} workers: render failed")
+                return 1
+
+            audio, _ = sf.read(output)
+            if reference is None:
+                baseline, reference = elapsed, audio
+                print(f"1 worker : {elapsed:6.2f} s")
+                continue
+            diff = np.max(np.abs(audio - reference)) if audio.shape == reference.shape else float('inf')
+            speedup = baseline / elapsed
+            efficiency = speedup / workers
+            note = '' if workers <= cores else ' (more workers than cores — not checked)'
+            print(f"{workers} workers: {elapsed:6.2f} s → {speedup:4.2f}× "
+                  f"({100 * efficiency:3.0f}% of linear), max sample diff {diff:.1e}{note}")
+            if diff > 1e-6:
+                print(f"{workers} workers: output differs from the single-worker render")
+                return 1
+            if workers <= cores and efficiency < MIN_EFFICIENCY:
+                below.append(workers)
+
+        if below:
+            print(f"Under {100 * MIN_EFFICIENCY:.0f}% of linear scaling at {below} workers")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+
+class AnalysisCache:
+    """
+    Disk-based analysis cache — same validation pattern as WaveformCache.
+    Shared by AudioAnalyzer (writer) and AudioProcessor (reader) so the
+    processor can reuse analysis-stage measurements instead of re-decoding.
+    """
+
+    # Bump when the analysis result gains or changes fields — entries
+    # written by another version are treated as a miss and re-analyzed
+    VERSION = 3
+
+    def __init__(self, cache_dir=None):
+        if cache_dir is None:
+            cache_dir = Path(os.path.dirname(__file__)) / '..' / 'temp' / 'analysis_cache'
+        self._cache_dir = Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, file_path):
+        """Return cached analysis if file is unchanged, else None"""
+        cache_file = self._cache_dir / f"{self._cache_key(file_path)}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, 'r') as f:
+                data = json.load(f)
+
+            meta = data.get('_meta')
+            if not meta:
+                return None
+
+            # Invalidate if written by another version, or file size or mtime changed
+            if (meta.get('version') != self.VERSION or
+                    os.path.getsize(file_path) != meta['size'] or
+                    os.path.getmtime(file_path) != meta['mtime']):
+                cache_file.unlink()
+                return None
+
+            # Return result without the metadata key
+            return {k: v for k, v in data.items() if k != '_meta'}
+
+        except Exception:
+            return None
+
+    def set(self, file_path, result):
+        """Write analysis result to disk cache with file metadata"""
+        cache_file = self._cache_dir / f"{self._cache_key(file_path)}.json"
+        try:
+            data = dict(result)
+            data['_meta'] = {
+                'version': self.VERSION,
+                'size': os.path.getsize(file_path),
+                'mtime': os.path.getmtime(file_path)
+            }
+            with open(cache_file, 'w') as f:
+                json.dump(data, f)
+        except Exception:
+            pass
+
+    def invalidate(self, file_path):
+        """Drop the cached analysis for a specific file"""
+        cache_file = self._cache_dir / f"{self._cache_key(file_path)}.json"
+        try:
+            if cache_file.exists():
+                cache_file.unlink()
+        except Exception:
+            pass
+
+    def _cache_key(self, file_path):
+        abs_path = str(Path(file_path).resolve())
+        return hashlib.sha256(abs_path.encode()).hexdigest()
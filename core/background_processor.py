@@ -22,16 +22,20 @@ class BackgroundProcessor(QThread):
         self.output_format = "wav_24"
         self.output_folder = ""
         self.naming_convention = "Original - DJ OPT"
+        self.sample_rate_mode = "fixed_44100"
         self.is_paused = False
         self.skip_tracks = set()
 
-    def setup_batch(self, tracks, preset_key, output_format="wav_24", output_folder="", naming_convention="Original - DJ OPT"):
+    def setup_batch(self, tracks, preset_key, output_format="wav_24", output_folder="", naming_convention="Original - DJ OPT",
+                    sample_rate_mode="fixed_44100"):
         """Setup tracks for batch processing"""
         self.tracks = tracks
         self.preset_key = preset_key
         self.output_format = output_format
         self.output_folder = output_folder
         self.naming_convention = naming_convention
+        self.sample_rate_mode = sample_rate_mode
+        self.processor.sample_rate_mode = sample_rate_mode
         self.should_stop = False
         self.skip_tracks = set()  # reset skips on each new batch
 
@@ -75,11 +79,13 @@ class BackgroundProcessor(QThread):
             input_path = track['path']
             output_filename = self.get_output_filename(track['name'], self.output_format)
             output_path = os.path.join(self.output_folder, output_filename)
-            result = self.processor.process_track(input_path, self.preset_key, output_path, self.output_format)
+            result = self.processor.process_track(
+                input_path, self.preset_key, output_path, self.output_format, analysis=track
+            )
 
             if result['success']:
                 processed += 1
-                self.track_completed.emit(i, True, "Completed successfully", result.get('final_lufs', -12.0), -1.0)
+                self.track_completed.emit(i, True, "Completed successfully", result.get('final_lufs', -12.0), result.get('final_peak', -1.0))
             else:
                 self.track_completed.emit(i, False, result.get('error', 'Unknown error'), 0.0, 0.0)
 
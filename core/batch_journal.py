@@ -0,0 +1,212 @@
+"""
+Crash-safe journal of a ParallelProcessor batch.
+
+One JSON line per event, appended and fsynced to a hidden file in the
+output folder:
+  batch     — the settings the run was started with
+  started   — a track went into FFmpeg, with its planned output path(s) and
+              every file its render may write (see AudioProcessor.render_files)
+  finished  — the input's and every written file's size, mtime and
+              fingerprint, and the track's levels
+  failed    — the track ended with an error
+A batch that completes removes its journal. One left behind by a crash,
+sleep or cancel lets the next run of the same batch skip every track whose
+outputs are still intact, and clean up what the unfinished ones left.
+"""
+import os
+import re
+import json
+import threading
+from .utils import file_fingerprint
+
+# Segments of a segmented render, named after the render's base path
+_SEGMENT = r'_seg\d+\.wav'
+
+
+class BatchJournal:
+    """Append-only record of one output folder's batch — see the module docstring"""
+
+    FILENAME = '.deckready_batch.jsonl'
+
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, self.FILENAME)
+        self._lock = threading.Lock()
+        self._file = None
+
+    # --- Reading ---
+
+    def load(self):
+        """
+        Replay the journal.
+        Returns: (settings of the last run or None, {input path: latest record})
+        """
+        settings, records = None, {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line — the crash hit mid-write
+                    if record.get('event') == 'batch':
+                        settings = record.get('settings')
+                    elif 'input' in record:
+                        records[record['input']] = record
+        except OSError:
+            pass
+        return settings, records
+
+    def finished_tracks(self, settings, inputs, planned):
+        """
+        Tracks an interrupted run of the same batch already finished.
+        inputs and planned are the input path and planned output paths per
+        track index; a track counts only if its input and every file it
+        wrote still have the recorded size, mtime and fingerprint — the
+        sampled fingerprint alone misses edits that keep the length.
+        Returns: {index: (final_lufs, final_peak)}
+        """
+        saved, records = self.load()
+        if saved is None or saved != settings:
+            return {}
+
+        finished = {}
+        for index, input_path in enumerate(inputs):
+            record = records.get(input_path)
+            if not record or record.get('event') != 'finished':
+                continue
+            if record.get('outputs') != planned[index]:
+                continue
+            if not self._intact(dict(record.get('input_state') or {}, path=input_path)):
+                continue
+            if all(self._intact(entry) for entry in record.get('files', [])):
+                finished[index] = (record.get('final_lufs', 0.0), record.get('final_peak', 0.0))
+        return finished
+
+    def _intact(self, entry):
+        """Whether a file still has the size, mtime and fingerprint recorded by _state"""
+        try:
+            stat = os.stat(entry['path'])
+            if stat.st_size != entry['size'] or stat.st_mtime != entry['mtime']:
+                return False
+        except (OSError, KeyError):
+            return False
+        return file_fingerprint(entry['path']) == entry.get('fingerprint')
+
+    def _state(self, path):
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'fingerprint': file_fingerprint(path)}
+
+    # --- Writing ---
+
+    def open(self, settings, resume=False, keep=()):
+        """
+        Start recording a run. Leftovers of tracks that never finished are
+        deleted first — never a path in keep (the batch's inputs) or a file a
+        finished track wrote. resume=True appends to the existing journal,
+        else it starts over.
+        """
+        _, records = self.load()
+        keep = set(keep)
+        for record in records.values():
+            if record.get('event') == 'finished':
+                keep.update(entry.get('path') for entry in record.get('files', []))
+        removed = self._clean_leftovers(records.values(), keep)
+        if removed:
+            print(f"Batch journal: removed {removed} leftover file(s) of unfinished tracks")
+
+        try:
+            self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        except OSError as e:
+            print(f"Batch journal unavailable: {e}")
+            self._file = None
+            return
+        self._append({'event': 'batch', 'settings': settings})
+
+    def started(self, index, input_path, outputs, scratch):
+        """
+        Record a track going into FFmpeg — scratch is {'files': exact paths,
+        'segment_bases': render base paths}, all its run may leave behind
+        """
+        self._append({'event': 'started', 'index': index, 'input': input_path, 'outputs': outputs,
+                      'scratch': scratch})
+
+    def finished(self, index, input_path, outputs, files, final_lufs, final_peak):
+        """Record a finished track — files are every path it wrote"""
+        entries = []
+        for path in files:
+            try:
+                entries.append(dict(self._state(path), path=path))
+            except OSError:
+                pass
+        try:
+            input_state = self._state(input_path)
+        except OSError:
+            input_state = None
+        self._append({
+            'event': 'finished', 'index': index, 'input': input_path, 'outputs': outputs,
+            'input_state': input_state, 'files': entries,
+            'final_lufs': final_lufs, 'final_peak': final_peak
+        })
+
+    def failed(self, index, input_path, outputs, scratch, error):
+        self._append({'event': 'failed', 'index': index, 'input': input_path, 'outputs': outputs,
+                      'scratch': scratch, 'error': error})
+
+    def close(self, complete=False):
+        """Stop recording — a complete batch has nothing to resume, so its journal goes"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if complete:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _append(self, record):
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(json.dumps(record) + '\n')
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except (OSError, ValueError) as e:
+                print(f"Batch journal write failed: {e}")
+
+    # --- Cleanup ---
+
+    def _clean_leftovers(self, records, keep):
+        """
+        Delete the outputs and temp files of every started or failed track —
+        only the paths its journaled scratch names, so files of other runs
+        next to them (another format, an earlier batch) are never touched
+        """
+        listings = {}
+        removed = 0
+        for record in records:
+            if record.get('event') not in ('started', 'failed'):
+                continue
+            for path in self._leftovers(record.get('scratch') or {}, listings):
+                if path in keep or not os.path.isfile(path):
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _leftovers(self, scratch, listings):
+        paths = list(scratch.get('files', []))
+        for base_path in scratch.get('segment_bases', []):
+            folder = os.path.dirname(base_path) or '.'
+            if folder not in listings:
+                try:
+                    listings[folder] = os.listdir(folder)
+                except OSError:
+                    listings[folder] = []
+            segment = re.compile(re.escape(os.path.basename(base_path)) + _SEGMENT)
+            paths += [os.path.join(folder, name) for name in listings[folder] if segment.fullmatch(name)]
+        return paths
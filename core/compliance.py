@@ -0,0 +1,27 @@
+"""
+Is a track already on target?
+
+Shared by the track table (the "OPTIMIZED" badge) and AudioProcessor's
+fast path, which skips the render for compliant tracks. The table is
+generous, since it is a hint to the DJ; the processor only skips tracks
+the correction loop would accept as they are.
+"""
+
+# The processor's correction loop stops within this many LU of target
+LOUDNESS_TOLERANCE = 0.5
+
+
+def display_tolerance(target_lufs):
+    """Smart tolerance for the table — loud club targets get more slack than quiet ones"""
+    if target_lufs >= -10:
+        return 2.0
+    if target_lufs >= -14:
+        return 1.5
+    return 1.0
+
+
+def is_compliant(lufs, peak_db, target_lufs, ceiling_db, tolerance=LOUDNESS_TOLERANCE):
+    """True when lufs is within tolerance of target and the peak is at or under ceiling_db"""
+    if lufs is None or peak_db is None or target_lufs is None:
+        return False
+    return abs(lufs - target_lufs) <= tolerance and peak_db <= ceiling_db
@@ -0,0 +1,327 @@
+"""
+asyncio job engine for FFmpeg work.
+
+One event loop, in one thread, owns every FFmpeg child of the engine
+(asyncio.create_subprocess_exec). A queued job is a coroutine waiting for
+a slot — hundreds of them cost no threads. Running jobs execute the
+pipeline code (AudioProcessor, AudioAnalyzer) in a small executor sized to
+the CPU budget; each FFmpeg step they take is handed back to the loop.
+
+FFmpegEngine is a ProcessRegistry — installed as the registry of a
+processor or analyzer it runs their FFmpeg calls, so cancel / pause /
+resume work the same way — and adds:
+  - concurrency limits per stage ('analysis', 'render', 'encode', 'trim', 'verify')
+  - stderr read as it streams: each line goes to an optional parser and
+    only the head (input info) and tail (meter summaries) are kept
+  - -progress on every FFmpeg call: a stall watchdog kills a process whose
+    position stops moving, and a job started with a progress reporter
+    follows every call it makes (see core/progress.py)
+  - duration-aware timeouts (see core/timeouts.py)
+
+One engine serves the whole app, so every FFmpeg child shares a single
+CPU budget. Work that must be cancelled or paused on its own (a batch, a
+preview) runs through engine.scope(): an EngineScope is a registry of its
+own whose calls still take the engine's slots.
+"""
+import os
+import weakref
+import codecs
+import asyncio
+import threading
+import itertools
+import subprocess
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .process_registry import ProcessRegistry, ProcessCancelled
+from .scheduler import CPUBudget
+from .progress import FFmpegProgress, job_progress
+
+
+class FFmpegEngine(ProcessRegistry):
+    """Event-loop FFmpeg runner with per-stage limits and an executor for job bodies"""
+
+    STAGES = ('analysis', 'render', 'encode', 'trim', 'verify')
+
+    def __init__(self, budget=None, limits=None):
+        super().__init__()
+        self.budget = budget or CPUBudget()
+        self.jobs = self.budget.jobs
+        self.limits = {stage: self.jobs for stage in self.STAGES}
+        self.limits.update(limits or {})
+
+        self._run_ids = itertools.count()
+        # Scopes follow the engine's cancel / pause / resume
+        self._scopes = weakref.WeakSet()
+        self._executor = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='engine-job')
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='ffmpeg-engine', daemon=True)
+        self._thread.start()
+
+        # Semaphores belong to the loop they are awaited on — create them there
+        self._stage_slots, self._job_slots = self._call(self._create_slots())
+
+    async def _create_slots(self):
+        return {stage: asyncio.Semaphore(n) for stage, n in self.limits.items()}, asyncio.Semaphore(self.jobs)
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def scope(self):
+        """A registry for one piece of work on this engine — see EngineScope"""
+        scope = EngineScope(self)
+        self._scopes.add(scope)
+        return scope
+
+    # --- Jobs ---
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop. Returns: concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def submit_job(self, fn, *args, progress=None):
+        """Queue a blocking pipeline call (e.g. process_track). Returns: concurrent.futures.Future"""
+        return self.submit(self.run_job(fn, *args, progress=progress))
+
+    async def run_job(self, fn, *args, progress=None):
+        """
+        Run fn(*args) in the job executor once one of the budget's job slots is free.
+        progress(stage, run_id, seconds, speed) — called for every -progress
+        update of every FFmpeg process the job runs (see BatchProgress.reporter)
+        """
+        context = contextvars.copy_context()
+        context.run(job_progress.set, progress)
+        async with self._job_slots:
+            return await self._loop.run_in_executor(self._executor, context.run, fn, *args)
+
+    # --- FFmpeg ---
+
+    def run(self, cmd, timeout=None, outputs=(), stage=None, duration=None, on_line=None, registry=None):
+        """
+        Blocking ProcessRegistry.run for pipeline code running in a job —
+        the process itself is launched and read on the engine loop.
+        registry — the EngineScope the process belongs to (default: the engine)
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("FFmpegEngine.run would block its own loop — await run_async instead")
+        return self._call(self.run_async(
+            cmd, timeout, outputs, stage, duration=duration, on_line=on_line,
+            on_progress=job_progress.get(), registry=registry
+        ))
+
+    async def run_async(self, cmd, timeout=None, outputs=(), stage=None, duration=None,
+                        on_line=None, on_progress=None, registry=None):
+        """
+        Coroutine form of run(). on_line(line) is called for every stderr
+        line while the process runs.
+
+        Every command runs with -progress pipe:1 — the stall watchdog reads
+        it, and so does on_progress(stage, run_id, seconds, speed) if given.
+        """
+        registry = registry or self
+        async with self._stage_slots.get(stage) or _unlimited():
+            # A paused registry doesn't start new work either
+            while registry.paused and not registry.cancelled:
+                await asyncio.sleep(self.POLL_SECONDS)
+            if registry.cancelled:
+                raise ProcessCancelled()
+
+            if timeout is None:
+                timeout = self.timeouts.timeout(stage, duration)
+
+            run_id = next(self._run_ids)
+            watchdog = StallWatchdog()
+
+            def on_update(seconds, speed):
+                watchdog.advance(seconds)
+                if on_progress is not None:
+                    on_progress(stage, run_id, seconds, speed)
+
+            progress = FFmpegProgress(on_update)
+            cmd = self.budget.apply(cmd)
+            cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + cmd[1:]
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=(os.name == 'posix')
+            )
+
+            registry._track(process)
+            try:
+                stderr, active = await self._communicate(
+                    process, cmd, timeout, on_line, progress, watchdog, registry
+                )
+            except subprocess.TimeoutExpired:
+                self._remove(outputs)
+                raise
+            finally:
+                registry._untrack(process)
+
+            if process.returncode == 0:
+                self.timeouts.observe(stage, duration, active)
+            # stdout carried the progress stream — its parser consumed it
+            return registry._completed(cmd, process.returncode, '', stderr, outputs)
+
+    async def _communicate(self, process, cmd, timeout, on_line, progress, watchdog, registry):
+        """
+        Read both pipes while waiting in short slices, so paused time is left
+        out of the timeout and the watchdog. Kills the process on timeout or stall.
+        Returns: (stderr text, seconds spent running unpaused)
+        """
+        stderr = StderrTail()
+        readers = asyncio.gather(
+            self._read_lines(process.stdout, None, progress.feed),
+            self._read_lines(process.stderr, stderr, on_line)
+        )
+        finished = asyncio.ensure_future(process.wait())
+
+        active = 0.0
+        while True:
+            started = self._loop.time()
+            done, _ = await asyncio.wait({finished}, timeout=self.POLL_SECONDS)
+            elapsed = self._loop.time() - started
+            if done:
+                if not registry.paused:
+                    active += elapsed
+                break
+            if registry.paused:
+                continue
+
+            active += elapsed
+            stalled = watchdog.tick(elapsed)
+            if stalled or (timeout is not None and active >= timeout):
+                if stalled:
+                    print(f"FFmpeg stalled — no progress for {watchdog.idle:.0f}s, killed")
+                self._kill(process)
+                await finished
+                await readers
+                raise subprocess.TimeoutExpired(cmd, watchdog.idle if stalled else timeout)
+
+        await readers
+        return stderr.text(), active
+
+    async def _read_lines(self, stream, tail, on_line):
+        """Feed each line to tail (if any) and on_line as it arrives"""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ''
+        while True:
+            chunk = await stream.read(65536)
+            pending += decoder.decode(chunk, final=not chunk)
+            *lines, pending = pending.replace('\r', '\n').split('\n')
+            for line in lines:
+                if tail is not None:
+                    tail.add(line)
+                if on_line is not None:
+                    on_line(line)
+            if not chunk:
+                break
+        if pending:
+            if tail is not None:
+                tail.add(pending)
+            if on_line is not None:
+                on_line(pending)
+
+    # --- Control ---
+
+    def cancel(self):
+        super().cancel()
+        for scope in list(self._scopes):
+            scope.cancel()
+
+    def pause(self):
+        super().pause()
+        for scope in list(self._scopes):
+            scope.pause()
+
+    def resume(self):
+        super().resume()
+        for scope in list(self._scopes):
+            scope.resume()
+
+    # --- Lifetime ---
+
+    def shutdown(self):
+        """Kill anything still running and stop the loop thread"""
+        self.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class EngineScope(ProcessRegistry):
+    """
+    Registry for one piece of work on a shared FFmpegEngine — a batch, a
+    preview. cancel / pause / resume / reset reach only the processes
+    started through the scope, while every call still waits for the
+    engine's stage slots and runs under its CPU budget.
+    """
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self.budget = engine.budget
+        self.timeouts = engine.timeouts
+
+    def run(self, cmd, timeout=None, outputs=(), stage=None, duration=None, on_line=None):
+        return self.engine.run(cmd, timeout, outputs, stage, duration=duration, on_line=on_line, registry=self)
+
+
+class StallWatchdog:
+    """
+    Tracks how long a process has run (unpaused) without its -progress
+    position moving. Start-up gets longer — probing and seeking into a long
+    input report no position yet.
+    """
+
+    STALL_SECONDS = 15.0
+    STARTUP_SECONDS = 30.0
+
+    def __init__(self):
+        self.position = None
+        self.idle = 0.0
+
+    def advance(self, seconds):
+        if self.position is None or seconds > self.position:
+            self.position = seconds
+            self.idle = 0.0
+
+    def tick(self, elapsed):
+        """Add elapsed running time. Returns: True once the process counts as stalled"""
+        self.idle += elapsed
+        limit = self.STARTUP_SECONDS if self.position is None else self.STALL_SECONDS
+        return self.idle >= limit
+
+
+class StderrTail:
+    """
+    Bounded stderr — the first HEAD_LINES (banner, input info, Duration)
+    and the last TAIL_LINES (meter summaries); progress in between is dropped.
+    """
+
+    HEAD_LINES = 200
+    TAIL_LINES = 400
+
+    def __init__(self):
+        self.head = []
+        self.tail = deque(maxlen=self.TAIL_LINES)
+
+    def add(self, line):
+        if len(self.head) < self.HEAD_LINES:
+            self.head.append(line)
+        else:
+            self.tail.append(line)
+
+    def text(self):
+        return '\n'.join(self.head + list(self.tail))
+
+
+class _unlimited:
+    """Stand-in for a semaphore when a stage has no limit"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
@@ -6,17 +6,25 @@ import os
 import subprocess
 import shutil
 from .lufs_analyzer import LUFSAnalyzer
+from .pcm_cache import PCMCache
+from .process_registry import ProcessRegistry
 import soundfile as sf
 
 
 class HealthAnalyzer:
     """Comprehensive audio health analysis"""
 
-    def __init__(self):
-        self.lufs_analyzer = LUFSAnalyzer()
+    BLOCK_FRAMES = 65536
+
+    def __init__(self, registry=None):
+        # Every FFmpeg call of the health check goes through the registry
+        self.registry = registry or ProcessRegistry()
+        self.lufs_analyzer = LUFSAnalyzer(registry=self.registry)
         self.ffmpeg_path = shutil.which('ffmpeg') or 'ffmpeg'
+        self.pcm_cache = PCMCache(ffmpeg_path=self.ffmpeg_path)
 
-    def analyze_track_health(self, file_path):
+    def analyze_track_health(self, file_path, envelope=None):
+        """envelope — optional ProxyEnvelope fed from the peak pass's read of the file"""
         issues = []
         score = 100
 
@@ -32,7 +40,7 @@ class HealthAnalyzer:
         # loudnorm's input_tp reports the INPUT peak before normalization,
         # so it always shows the original peak even on a processed file.
         # ebur128 with peak=true measures the actual sample peak of the file.
-        peak = self._measure_true_peak(file_path)
+        peak = self._measure_true_peak(file_path, envelope)
 
         # 3. Check for clipping — use actual measured peak
         if peak >= 0.0:
@@ -98,22 +106,34 @@ class HealthAnalyzer:
             'lufs': lufs,
             'peak': peak,
             'lra': lra,
+            'duration': lufs_data.get('duration', 0),
+            'loudnorm_stats': lufs_data.get('loudnorm_stats'),
+            'energy': lufs_data.get('energy'),
             'crest_factor': round(crest_factor, 1),
             'bitrate': bitrate,
             'sample_rate': sample_rate
         }
 
-    def _measure_true_peak(self, file_path):
+    def _measure_true_peak(self, file_path, envelope=None):
         """
         Measure actual sample peak by reading the file directly with soundfile.
         This reads the actual output samples — guaranteed to reflect what's
         in the file regardless of how FFmpeg reports it.
+        Streamed in blocks so memory doesn't grow with track length.
+        Each block also feeds envelope (PresetRecommender) if one is passed.
         Returns peak in dBFS.
         """
         try:
             import numpy as np
-            audio, sr = sf.read(file_path, dtype='float32')
-            max_sample = float(np.max(np.abs(audio)))
+            max_sample = 0.0
+            source = self.pcm_cache.resolve(file_path, self.registry)
+            with sf.SoundFile(source) as f:
+                if envelope is not None:
+                    envelope.begin(f.samplerate, f.channels)
+                for block in f.blocks(blocksize=self.BLOCK_FRAMES, dtype='float32', always_2d=True):
+                    max_sample = max(max_sample, float(np.max(np.abs(block))))
+                    if envelope is not None:
+                        envelope.feed(block)
             if max_sample <= 0:
                 return -96.0
             return round(20 * np.log10(max_sample), 1)
@@ -0,0 +1,116 @@
+"""
+Streaming ITU-R BS.1770-4 integrated loudness meter.
+
+Fed block by block so a stage that is already sweeping the samples
+(in-place trim, limiter) gets the loudness of what it wrote for free,
+without another FFmpeg decode of the file.
+"""
+import math
+import numpy as np
+from scipy.signal import lfilter
+
+
+class LoudnessMeter:
+    """Gated integrated loudness (LUFS) from incrementally fed samples"""
+
+    ABSOLUTE_GATE = -70.0
+    RELATIVE_GATE = -10.0
+
+    def __init__(self, sample_rate, channels):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._stages = self._k_weighting(sample_rate)
+        self._zi = [np.zeros((max(len(a), len(b)) - 1, channels)) for b, a in self._stages]
+
+        # 100ms sub-blocks — 400ms gating blocks with 75% overlap are 4 consecutive sub-blocks
+        self._step = int(round(sample_rate * 0.1))
+        self._pending = 0.0
+        self._pending_count = 0
+        self.energies = []  # sum over channels of mean-square per 100ms sub-block
+
+    def _k_weighting(self, fs):
+        """K-weighting biquads (shelf + RLB highpass) for any sample rate"""
+        f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+        k = math.tan(math.pi * f0 / fs)
+        vh = 10 ** (gain / 20)
+        vb = vh ** 0.4996667741545416
+        a0 = 1 + k / q + k * k
+        shelf = (
+            [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+            [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+        )
+
+        f0, q = 38.13547087602444, 0.5003270373238773
+        k = math.tan(math.pi * f0 / fs)
+        a0 = 1 + k / q + k * k
+        highpass = (
+            [1.0, -2.0, 1.0],
+            [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+        )
+        return [shelf, highpass]
+
+    def feed(self, samples):
+        """
+        Add a (frames, channels) float block — filter state carries across calls.
+        Returns the K-weighted block, for callers that derive more from it.
+        """
+        y = samples
+        for i, (b, a) in enumerate(self._stages):
+            y, self._zi[i] = lfilter(b, a, y, axis=0, zi=self._zi[i])
+        self.feed_weighted(y)
+        return y
+
+    def feed_weighted(self, y):
+        """feed() for a block that is already K-weighted"""
+        power = np.einsum('ij,ij->i', y, y)
+        pos = 0
+
+        # Complete the sub-block left open by the previous call
+        if self._pending_count:
+            take = min(self._step - self._pending_count, len(power))
+            self._pending += float(np.sum(power[:take]))
+            self._pending_count += take
+            pos = take
+            if self._pending_count == self._step:
+                self.energies.append(self._pending / self._step)
+                self._pending, self._pending_count = 0.0, 0
+
+        whole = (len(power) - pos) // self._step
+        if whole:
+            blocks = power[pos:pos + whole * self._step].reshape(whole, self._step)
+            self.energies.extend((blocks.sum(axis=1) / self._step).tolist())
+            pos += whole * self._step
+
+        if pos < len(power):
+            self._pending += float(np.sum(power[pos:]))
+            self._pending_count += len(power) - pos
+
+    def integrated(self, gain_db=0.0, scale=None):
+        """
+        Gated integrated loudness of everything fed so far.
+        gain_db scales the stored energies — both gates move with the
+        signal, so this is exact for a pure gain change.
+        scale — optional energy factor per 100ms sub-block (e.g. what a
+        limiter would take out of each)
+        Returns LUFS, or None if less than one 400ms block was fed.
+        """
+        sub = np.asarray(self.energies, dtype=np.float64)
+        if len(sub) < 4:
+            return None
+        if scale is not None:
+            sub = sub * scale
+
+        z = (sub[:-3] + sub[1:-2] + sub[2:-1] + sub[3:]) / 4 * 10 ** (gain_db / 10)
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10 * np.log10(z)
+
+        gated = z[loudness > self.ABSOLUTE_GATE]
+        if len(gated) == 0:
+            return None
+
+        relative = -0.691 + 10 * math.log10(np.mean(gated)) + self.RELATIVE_GATE
+        gated = z[(loudness > self.ABSOLUTE_GATE) & (loudness > relative)]
+        if len(gated) == 0:
+            return None
+
+        return -0.691 + 10 * math.log10(np.mean(gated))
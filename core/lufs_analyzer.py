@@ -1,18 +1,41 @@
 """
 Unified LUFS measurement using FFmpeg for consistency
+
+Two measurement backends produce the same result shape:
+  ebur128  — default; several times faster than loudnorm. Loudness is
+             K-weighted at the source rate, but peak=true resamples the
+             stream to 192 kHz internally for the true-peak reading
+  loudnorm — legacy; resamples everything to 192 kHz, loudness included
+
+The ebur128 backend also logs its short-term (3 s) loudness and keeps one
+value per second as the track's energy curve — AudioProcessor.render_preview
+finds the loudest section of a track in it.
 """
+import re
 import subprocess
 import sys
 import os
 import shutil
-from .utils import extract_loudnorm_json
+from .utils import extract_loudnorm_json, parse_ebur128_summary, audio_duration
+from .process_registry import ProcessRegistry, ProcessCancelled
+from .pcm_cache import PCMCache
+
+# One ebur128 framelog line: "t: 12.0999  TARGET:-23 LUFS  M: -9.1 S: -8.7  I: ..."
+_FRAME_LINE = re.compile(r't:\s*([\d.]+).*?\bS:\s*(-?[\d.]+|-?inf)')
+# Short-term values below this are silence — clamped so the curve stays finite
+ENERGY_FLOOR = -70.0
 
 
 class LUFSAnalyzer:
     """FFmpeg-based LUFS analyzer for consistent measurements"""
 
-    def __init__(self):
+    BACKENDS = ('ebur128', 'loudnorm')
+
+    def __init__(self, backend='ebur128', registry=None):
         self.ffmpeg_path = self._find_ffmpeg()
+        self.backend = backend if backend in self.BACKENDS else 'ebur128'
+        self.registry = registry or ProcessRegistry()
+        self.pcm_cache = PCMCache(ffmpeg_path=self.ffmpeg_path)
 
     def _find_ffmpeg(self):
         """Find FFmpeg executable (bundled or system)"""
@@ -26,27 +49,34 @@ class LUFSAnalyzer:
     def measure_lufs(self, file_path):
         """
         Measure integrated LUFS and true peak using FFmpeg
-        Returns: dict with lufs, peak_db, duration or None on failure
+        Returns: dict with lufs, peak_db, duration, lra, threshold, the
+        raw loudnorm_stats (input_i/tp/lra/thresh) and the energy curve
+        (short-term LUFS per second, None with the loudnorm backend) or None on failure
         """
+        energy = None
+        if self.backend == 'loudnorm':
+            measure_filter = 'loudnorm=print_format=json'
+            on_line = None
+        else:
+            measure_filter = 'ebur128=peak=true:framelog=info'
+            energy = []
+            on_line = self._energy_listener(energy)
+
         cmd = [
             self.ffmpeg_path,
-            '-i', file_path,
-            '-af', 'loudnorm=print_format=json',
+            '-i', self.pcm_cache.resolve(file_path, self.registry),
+            '-af', measure_filter,
             '-f', 'null',
             '-'
         ]
 
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120,
-                encoding='utf-8',
-                errors='replace'
-            )
-
-            data = extract_loudnorm_json(result.stderr)
+            result = self.registry.run(cmd, stage='analysis', duration=audio_duration(file_path), on_line=on_line)
+
+            if self.backend == 'loudnorm':
+                data = extract_loudnorm_json(result.stderr)
+            else:
+                data = self._loudnorm_fields(parse_ebur128_summary(result.stderr))
             if data is None:
                 return None
 
@@ -57,16 +87,49 @@ class LUFSAnalyzer:
                 'peak_db': round(float(data.get('input_tp', -1.0)), 1),
                 'duration': duration,
                 'lra': round(float(data.get('input_lra', 0.0)), 1),
-                'threshold': round(float(data.get('input_thresh', -70.0)), 1)
+                'threshold': round(float(data.get('input_thresh', -70.0)), 1),
+                # Target-independent — AudioProcessor derives its 2-pass fields from these
+                'loudnorm_stats': {
+                    key: data[key]
+                    for key in ('input_i', 'input_tp', 'input_lra', 'input_thresh')
+                    if key in data
+                },
+                'energy': energy or None
             }
 
         except subprocess.TimeoutExpired:
             print(f"LUFS measurement timed out for: {os.path.basename(file_path)}")
             return None
+        except ProcessCancelled:
+            raise
         except Exception as e:
             print(f"LUFS measurement failed for {os.path.basename(file_path)}: {e}")
             return None
 
+    def _energy_listener(self, curve):
+        """on_line callback appending ebur128's short-term loudness to curve once per second"""
+        def on_line(line):
+            match = _FRAME_LINE.search(line)
+            # Frames come every 0.1 s — keep the one closing each second
+            if match and float(match.group(1)) >= len(curve) + 0.95:
+                curve.append(round(max(ENERGY_FLOOR, float(match.group(2))), 1))
+        return on_line
+
+    def _loudnorm_fields(self, summary):
+        """
+        Synthesize loudnorm's input_* fields from an ebur128 summary.
+        Both follow BS.1770 — ebur128's integrated gating threshold is the
+        same quantity loudnorm reports as input_thresh.
+        """
+        if summary is None or 'true_peak' not in summary:
+            return None
+        return {
+            'input_i': f"{summary['integrated']:.2f}",
+            'input_tp': f"{summary['true_peak']:.2f}",
+            'input_lra': f"{summary.get('lra', 0.0):.2f}",
+            'input_thresh': f"{summary.get('threshold', -70.0):.2f}"
+        }
+
     def _extract_duration(self, ffmpeg_output):
         """Extract duration from FFmpeg output"""
         try:
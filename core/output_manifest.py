@@ -0,0 +1,136 @@
+"""
+Per-folder record of what each output was rendered from.
+
+Every output folder gets a hidden JSON-lines manifest, one line per
+finished output: the input's size, mtime and content hash, the render
+settings (preset parameter hash, output format, naming convention,
+engine version), every file written and the final levels. A batch skips a
+track whose entry still matches — re-running a crate only renders what is
+new or changed.
+
+Appends are cheap and the latest line for an output wins; the file is
+compacted on load once stale lines outnumber live ones.
+"""
+import os
+import json
+import hashlib
+import threading
+from .utils import file_content_hash
+
+# Preset fields that only name or describe it — editing them changes no audio
+COSMETIC_PRESET_FIELDS = ('label', 'description', 'locked')
+
+
+def preset_hash(preset, sample_rate_mode):
+    """Short hash of every preset parameter that shapes the rendered audio"""
+    params = {k: v for k, v in (preset or {}).items() if k not in COSMETIC_PRESET_FIELDS}
+    payload = json.dumps({'preset': params, 'sample_rate_mode': sample_rate_mode}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class OutputManifest:
+    """Manifest of one output folder — see the module docstring"""
+
+    FILENAME = '.deckready_manifest.jsonl'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, self.FILENAME)
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        entries, lines = {}, 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        entries[entry['name']] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            return entries
+
+        if lines > 2 * len(entries) + 100:
+            self._compact(entries)
+        return entries
+
+    def _compact(self, entries):
+        """Rewrite with one line per output — atomic, a crash keeps the old file"""
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in entries.values():
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Manifest compaction failed: {e}")
+
+    def current(self, name, input_path, settings):
+        """
+        Levels of output name if it is up to date — rendered by these
+        settings from this input, and every file it wrote untouched since.
+        Returns: (final_lufs, final_peak), or None if it needs rendering
+        """
+        entry = self.entries.get(name)
+        if not entry or entry.get('settings') != settings:
+            return None
+        if not self._same_input(entry, input_path):
+            return None
+        for written in entry.get('files', []):
+            try:
+                stat = os.stat(os.path.join(self.folder, written['name']))
+            except OSError:
+                return None
+            if stat.st_size != written['size'] or stat.st_mtime != written['mtime']:
+                return None
+        return entry.get('final_lufs', 0.0), entry.get('final_peak', 0.0)
+
+    def _same_input(self, entry, input_path):
+        # size + mtime unchanged — trusted without reading, as in AnalysisCache;
+        # otherwise (copied, touched, moved) only the full content hash decides:
+        # a sampled fingerprint misses edits that keep the length
+        try:
+            stat = os.stat(input_path)
+        except OSError:
+            return False
+        if stat.st_size != entry.get('input_size'):
+            return False
+        if stat.st_mtime == entry.get('input_mtime'):
+            return True
+        content_hash = entry.get('input_hash')
+        return content_hash is not None and file_content_hash(input_path) == content_hash
+
+    def record(self, name, input_path, settings, files, final_lufs, final_peak):
+        """Record a finished output — files are every path it wrote in this folder"""
+        try:
+            stat = os.stat(input_path)
+            written = []
+            for path in files:
+                file_stat = os.stat(path)
+                written.append({'name': os.path.basename(path), 'size': file_stat.st_size,
+                                'mtime': file_stat.st_mtime})
+        except OSError as e:
+            print(f"Manifest entry skipped for {name}: {e}")
+            return
+
+        entry = {
+            'name': name,
+            'input': input_path,
+            'input_size': stat.st_size,
+            'input_mtime': stat.st_mtime,
+            'input_hash': file_content_hash(input_path),
+            'settings': settings,
+            'files': written,
+            'final_lufs': final_lufs,
+            'final_peak': final_peak,
+        }
+        with self._lock:
+            self.entries[name] = entry
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + '\n')
+            except OSError as e:
+                print(f"Manifest write failed: {e}")
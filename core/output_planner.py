@@ -0,0 +1,52 @@
+"""
+Output names for a whole batch, fixed before the first job starts.
+
+Two inputs can clean to the same name — "Track (Official Video).mp3" and
+"Track [HD].wav" both become "Track - DJ OPT.wav" — and in parallel mode
+they would then render into one file at the same time. The planner gives
+every track after the first a " (2)", " (3)" … suffix, in batch order, so
+the same batch always gets the same names.
+"""
+import unicodedata
+from .utils import clean_filename, apply_naming_convention
+
+
+def name_key(name):
+    """
+    Collision key — macOS volumes are case-insensitive and store names
+    decomposed, so "Café" and "CAFÉ" are one file there
+    """
+    return unicodedata.normalize('NFC', name).casefold()
+
+
+def plan_output_names(names, output_format, naming_convention):
+    """
+    Output filename per input name, in the same order, no two alike.
+    Keys ignore the extension — a multi-format batch writes every
+    format next to the first one under the same base name.
+    """
+    clean_names = [clean_filename(name) for name in names]
+    # A suffixed name must not take the plain name of a later track either
+    claimed = {name_key(clean) for clean in clean_names}
+    taken = set()
+    planned = []
+    collisions = 0
+
+    for clean in clean_names:
+        candidate = clean
+        key = name_key(candidate)
+        if key in taken:
+            collisions += 1
+            n = 2
+            while True:
+                candidate = f"{clean} ({n})"
+                key = name_key(candidate)
+                if key not in taken and key not in claimed:
+                    break
+                n += 1
+        taken.add(key)
+        planned.append(apply_naming_convention(candidate, output_format, naming_convention))
+
+    if collisions:
+        print(f"Output planner: {collisions} name collision(s) resolved with a numbered suffix")
+    return planned
@@ -1,51 +1,265 @@
-from PySide6.QtCore import QThread, Signal
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from PySide6.QtCore import QObject, Signal
 from .processor import AudioProcessor
-from .utils import get_output_filename
+from .engine import FFmpegEngine
+from .scheduler import CPUBudget, longest_first
+from .progress import BatchProgress
+from .utils import get_output_filename, file_fingerprint, file_content_hash, audio_duration
+from .output_planner import plan_output_names
+from .batch_journal import BatchJournal
+from .output_manifest import OutputManifest, preset_hash
+from .set_loudness import plan_set_gains
 import os
-import multiprocessing
+import asyncio
+import threading
 
 
-class ParallelProcessor(QThread):
-    """Multi-core parallel audio processor with shared processor pool"""
+class ParallelProcessor(QObject):
+    """Multi-core batch processor — tracks are jobs on an FFmpegEngine, run by a shared processor pool"""
 
     track_started = Signal(int, str)
     track_completed = Signal(int, bool, str, float, float)
     progress_updated = Signal(int, int)
     all_completed = Signal(int, int)
+    # Live, from FFmpeg's -progress stream: index, percent (-1 if unknown), speed (× realtime)
+    track_progress = Signal(int, float, float)
+    # Batch ETA in seconds (-1 until known), throughput in seconds of audio per second
+    batch_progress = Signal(float, float)
 
-    def __init__(self, max_workers=None):
+    def __init__(self, max_workers=None, engine=None):
+        """
+        engine — the app's shared FFmpegEngine, so the batch, analysis and
+        previews split one CPU budget; without one the batch gets its own
+        """
         super().__init__()
-        cpu_count = multiprocessing.cpu_count()
 
-        # Cap at 4 — FFmpeg is CPU-heavy, more workers = system freeze not speed
-        self.max_workers = min(max_workers or (cpu_count - 1), 4)
-        self.max_workers = max(1, self.max_workers)
+        # Jobs × FFmpeg threads per job fit the usable cores — the freeze a
+        # fixed cap used to prevent came from FFmpeg's own per-core threads
+        self._owns_engine = engine is None
+        if engine is None:
+            engine = FFmpegEngine(budget=CPUBudget(max_jobs=max_workers))
+        self.engine = engine
+        self.budget = engine.budget
+        self.max_workers = min(max_workers or self.budget.jobs, self.budget.jobs)
 
-        # Pre-build processor pool — one instance per worker, reused across all tracks
+        # Pre-build processor pool — one instance per job slot, reused across all tracks
         # Avoids creating AudioProcessor (+ PresetManager + disk reads) per track
         self.processor_pool = [AudioProcessor() for _ in range(self.max_workers)]
 
+        # The batch's own scope on the engine is the registry for the whole pool —
+        # cancel/pause reach every live FFmpeg child of the batch, and nothing else
+        self.registry = self.engine.scope()
+        for processor in self.processor_pool:
+            processor.registry = self.registry
+            processor.lufs_analyzer.registry = self.registry
+
         self.tracks = []
+        self.output_names = []
         self.preset_key = ""
+        self.preset_keys = []
         self.output_format = "wav_24"
         self.output_folder = ""
         self.naming_convention = "Original - DJ OPT"
+        self.sample_rate_mode = "fixed_44100"
+        # 'track' — every track to the preset target; 'set' — the batch leveled as one set
+        self.leveling = "track"
+        self.set_gains = {}
         self.should_stop = False
+        self.is_paused = False
         self.skip_tracks = set()
+        # Tracks an interrupted run of this batch finished — {index: (lufs, peak)}
+        self.journal = None
+        self.resumable = {}
+        self.resumed = {}
+        # Tracks whose outputs the folder manifests show up to date are
+        # reported, not rendered — {index: (lufs, peak)}
+        self.skip_current = True
+        self.manifests = {}
+        self._manifests_lock = threading.Lock()
+        self.current = {}
+        # Tracks with the same audio as an earlier track — {index: that track's index}.
+        # Only the first is rendered; the others get links to its outputs.
+        self.duplicate_of = {}
+        # Duplicates this run satisfied from another track's render
+        self.linked = set()
+        # Queue the longest tracks first — False keeps table order
+        self.longest_first = True
+
+        self._finished = threading.Event()
+        self._finished.set()
 
-    def setup_batch(self, tracks, preset_key, output_format="wav_24", output_folder="", naming_convention="Original - DJ OPT"):
-        """Setup tracks for parallel processing"""
+    def setup_batch(self, tracks, preset_key, output_format="wav_24", output_folder="", naming_convention="Original - DJ OPT",
+                    sample_rate_mode="fixed_44100", leveling="track"):
+        """
+        Setup tracks for parallel processing.
+        preset_key may be a list of preset keys — each track is then decoded
+        once and rendered to every preset, into one subfolder per preset.
+        leveling='set' levels the batch as one set (see core/set_loudness.py)
+        """
         self.tracks = tracks
-        self.preset_key = preset_key
+        self.preset_keys = list(preset_key) if isinstance(preset_key, (list, tuple)) else [preset_key]
+        self.preset_key = self.preset_keys[0]
+        # A list of formats is encoded from one corrected master per track
         self.output_format = output_format
         self.output_folder = output_folder
         self.naming_convention = naming_convention
+        self.sample_rate_mode = sample_rate_mode
+        self.leveling = leveling
+        # Before the set plan — a recording in the batch twice counts once in the set
+        self.duplicate_of = self._find_duplicates()
+        self.set_gains = self._plan_set() if leveling == "set" else {}
+        # Every output name is fixed — and made unique — before any job starts
+        first_format = output_format[0] if isinstance(output_format, (list, tuple)) else output_format
+        self.output_names = plan_output_names(
+            [track['name'] for track in tracks], first_format, naming_convention
+        )
+        # How many segments of a long mix render at once is decided when it is dispatched
+        for processor in self.processor_pool:
+            processor.sample_rate_mode = sample_rate_mode
+            processor.segment_workers = 1
         self.should_stop = False
+        self.is_paused = False
         self.skip_tracks = set()
+        self.registry.reset()
+
+        # A journal left by an interrupted run of the same batch can be resumed
+        self.journal = BatchJournal(output_folder)
+        self.resumable = self.journal.finished_tracks(
+            self._journal_settings(),
+            [track['path'] for track in tracks],
+            [self.planned_outputs(i) for i in range(len(tracks))]
+        )
+        self.resumed = {}
+
+        self.manifests = {}
+        self.current = self._current_tracks() if self.skip_current else {}
+
+    def _plan_set(self):
+        """Set plan per preset from the tracks' cached analysis — {preset key: [gain per track]}"""
+        gains = {}
+        for key in self.preset_keys:
+            preset = self.processor_pool[0].preset_manager.get_preset(key)
+            plan = plan_set_gains(
+                self.tracks, preset['target_lufs'], preset['true_peak'], self.duplicate_of
+            )
+            gains[key] = plan['gains']
+            print(f"Set plan ({key}): {plan['set_lufs']} → {plan['planned_lufs']} LUFS, "
+                  f"{plan['capped']} track(s) held back by their peaks")
+        return gains
+
+    def _set_gain(self, preset_key, index):
+        """Planned gain of a track, or None — per-track leveling, or no usable analysis"""
+        gains = self.set_gains.get(preset_key)
+        return gains[index] if gains else None
+
+    def _find_duplicates(self):
+        """
+        Group tracks by content — only files that share a size are
+        fingerprinted, and only files that share a fingerprint are read in
+        full: the sampled fingerprint can't tell apart edits that keep the
+        length, and a false match would ship one track's audio as another's.
+        """
+        by_size = {}
+        for index, track in enumerate(self.tracks):
+            try:
+                by_size.setdefault(os.path.getsize(track['path']), []).append(index)
+            except OSError:
+                continue
+
+        duplicate_of = {}
+        for indexes in by_size.values():
+            if len(indexes) < 2:
+                continue
+            by_fingerprint = {}
+            for index in indexes:
+                key = file_fingerprint(self.tracks[index]['path'])
+                if key is not None:
+                    by_fingerprint.setdefault(key, []).append(index)
+
+            for candidates in by_fingerprint.values():
+                if len(candidates) < 2:
+                    continue
+                first = {}
+                for index in candidates:
+                    key = file_content_hash(self.tracks[index]['path'])
+                    if key is None:
+                        continue
+                    if key in first:
+                        duplicate_of[index] = first[key]
+                    else:
+                        first[key] = index
+        return duplicate_of
+
+    def _current_tracks(self):
+        """Tracks every planned output of which is up to date in its folder's manifest"""
+        current = {}
+        for index, track in enumerate(self.tracks):
+            levels = None
+            for key, path in zip(self.preset_keys, self.planned_outputs(index)):
+                levels = self._manifest(path).current(
+                    os.path.basename(path), track['path'], self._manifest_settings(key, index)
+                )
+                if levels is None:
+                    break
+            if levels is not None:
+                current[index] = levels
+        return current
+
+    def _manifest(self, output_path):
+        folder = os.path.dirname(output_path)
+        with self._manifests_lock:
+            if folder not in self.manifests:
+                self.manifests[folder] = OutputManifest(folder)
+            return self.manifests[folder]
+
+    def _manifest_settings(self, preset_key, index):
+        formats = self.output_format
+        return {
+            'preset_hash': preset_hash(self.processor_pool[0].preset_manager.get_preset(preset_key),
+                                       self.sample_rate_mode),
+            'output_format': list(formats) if isinstance(formats, (list, tuple)) else formats,
+            'naming_convention': self.naming_convention,
+            'engine_version': AudioProcessor.ENGINE_VERSION,
+            'set_gain_db': self._set_gain(preset_key, index),
+        }
+
+    def _record_outputs(self, index, input_path, planned, files, lufs, peak):
+        """Add a finished track's outputs to the manifest of each folder they went to"""
+        for key, path in zip(self.preset_keys, planned):
+            folder = os.path.dirname(path)
+            in_folder = [f for f in files if os.path.dirname(f) == folder]
+            self._manifest(path).record(
+                os.path.basename(path), input_path, self._manifest_settings(key, index), in_folder, lufs, peak
+            )
+
+    def resume(self):
+        """Skip the tracks the interrupted run finished — call between setup_batch and start"""
+        self.resumed = dict(self.resumable)
+
+    def _journal_settings(self):
+        # JSON-shaped, so it compares equal to what the journal read back
+        formats = self.output_format
+        return {
+            'preset_keys': list(self.preset_keys),
+            'output_format': list(formats) if isinstance(formats, (list, tuple)) else formats,
+            'naming_convention': self.naming_convention,
+            'sample_rate_mode': self.sample_rate_mode,
+            'leveling': self.leveling,
+            'set_gains': self.set_gains,
+        }
 
     def stop_processing(self):
+        """Cancel now — running FFmpeg jobs are killed, not waited for"""
         self.should_stop = True
+        self.registry.cancel()
+
+    def pause_processing(self):
+        """Freeze running FFmpeg jobs in place; nothing new starts until resume"""
+        self.is_paused = True
+        self.registry.pause()
+
+    def resume_processing(self):
+        self.is_paused = False
+        self.registry.resume()
 
     def skip_track(self, track_index):
         self.skip_tracks.add(track_index)
@@ -53,59 +267,265 @@ class ParallelProcessor(QThread):
     def get_output_filename(self, original_name, output_format):
         return get_output_filename(original_name, output_format, self.naming_convention)
 
+    def output_path(self, index):
+        """Planned output of a track — the first preset's copy in a multi-preset batch"""
+        if len(self.preset_keys) > 1:
+            return os.path.join(self.output_folder, self.preset_key, self.output_names[index])
+        return os.path.join(self.output_folder, self.output_names[index])
+
+    def planned_outputs(self, index):
+        """Planned output path of a track for every preset"""
+        if len(self.preset_keys) > 1:
+            return [os.path.join(self.output_folder, key, self.output_names[index]) for key in self.preset_keys]
+        return [os.path.join(self.output_folder, self.output_names[index])]
+
     def process_single_track(self, index, track, processor):
         """Process a single track using an assigned processor from the pool"""
         if self.should_stop or index in self.skip_tracks:
             return (index, False, "Skipped", 0.0, 0.0)
 
+        input_path = track['path']
+        planned = self.planned_outputs(index)
+        scratch = self._scratch(index)
         try:
-            input_path = track['path']
             filename = track['name']
-            output_filename = self.get_output_filename(filename, self.output_format)
+            output_filename = self.output_names[index]
             output_path = os.path.join(self.output_folder, output_filename)
 
             self.track_started.emit(index, filename)
+            self.journal.started(index, input_path, planned, scratch)
 
-            result = processor.process_track(input_path, self.preset_key, output_path, self.output_format)
+            if len(self.preset_keys) > 1:
+                result = self.process_multi_preset(index, input_path, output_filename, track, processor)
+            else:
+                result = processor.process_track(
+                    input_path, self.preset_key, output_path, self.output_format, analysis=track,
+                    set_gain_db=self._set_gain(self.preset_key, index)
+                )
 
             if result['success']:
-                return (index, True, "Success", result.get('final_lufs', -12.0), -1.0)
+                lufs, peak = result.get('final_lufs', -12.0), result.get('final_peak', -1.0)
+                files = result.get('files') or self._written_files(result)
+                self.journal.finished(index, input_path, planned, files, lufs, peak)
+                self._record_outputs(index, input_path, planned, files, lufs, peak)
+                return (index, True, "Success", lufs, peak)
             else:
-                return (index, False, result.get('error', 'Unknown error'), 0.0, 0.0)
+                error = result.get('error', 'Unknown error')
+                self.journal.failed(index, input_path, planned, scratch, error)
+                return (index, False, error, 0.0, 0.0)
 
         except Exception as e:
+            self.journal.failed(index, input_path, planned, scratch, str(e))
             return (index, False, str(e), 0.0, 0.0)
 
-    def run(self):
-        """Run parallel processing with pooled processors"""
+    def process_duplicate(self, index, track, source_index, lufs, peak):
+        """Materialize a duplicate's outputs from those rendered for source_index"""
+        if self.should_stop or index in self.skip_tracks:
+            return (index, False, "Skipped", 0.0, 0.0)
+
+        input_path = track['path']
+        planned = self.planned_outputs(index)
+        scratch = self._scratch(index)
+        try:
+            self.track_started.emit(index, track['name'])
+            self.journal.started(index, input_path, planned, scratch)
+
+            files = []
+            for rendered_path, output_path in zip(self.planned_outputs(source_index), planned):
+                files += self.processor_pool[0].link_outputs(rendered_path, output_path, self.output_format)
+
+            self.journal.finished(index, input_path, planned, files, lufs, peak)
+            self._record_outputs(index, input_path, planned, files, lufs, peak)
+            return (index, True, f"Same audio as row {source_index + 1}", lufs, peak)
+
+        except Exception as e:
+            self.journal.failed(index, input_path, planned, scratch, str(e))
+            return (index, False, str(e), 0.0, 0.0)
+
+    def _written_files(self, result):
+        """Every file a successful process_track result wrote"""
+        return list(result.get('output_paths', {}).values()) or [result['output_path']]
+
+    def _scratch(self, index):
+        """Every file a track's run may write — all the journal's cleanup may delete for it"""
+        files, segment_bases = [], []
+        for output_path in self.planned_outputs(index):
+            paths, base_path = self.processor_pool[0].render_files(output_path, self.output_format)
+            files += paths
+            segment_bases.append(base_path)
+        return {'files': files, 'segment_bases': segment_bases}
+
+    def process_multi_preset(self, index, input_path, output_filename, track, processor):
+        """Fan one track out to every preset — outputs go to <output folder>/<preset key>/"""
+        output_paths = {}
+        for key in self.preset_keys:
+            preset_folder = os.path.join(self.output_folder, key)
+            os.makedirs(preset_folder, exist_ok=True)
+            output_paths[key] = os.path.join(preset_folder, output_filename)
+
+        results = processor.process_track_multi(
+            input_path, self.preset_keys, output_paths, self.output_format, analysis=track,
+            set_gains={key: self._set_gain(key, index) for key in self.preset_keys}
+        )
+
+        failed = [key for key in self.preset_keys if not results[key]['success']]
+        if failed:
+            errors = ", ".join(f"{key}: {results[key].get('error', 'Unknown error')}" for key in failed)
+            return {'success': False, 'error': errors}
+
+        # Table shows one row per track — report the first preset's levels
+        result = dict(results[self.preset_key])
+        result['files'] = [path for key in self.preset_keys for path in self._written_files(results[key])]
+        return result
+
+    def submission_order(self):
+        """
+        Track indexes in the order their jobs are queued. Longest first:
+        a long mix queued last would run alone while the other jobs sit idle.
+        """
+        if not self.longest_first:
+            return list(range(len(self.tracks)))
+        return longest_first([self._job_cost(index) for index in range(len(self.tracks))])
+
+    def _job_cost(self, index):
+        """Expected work of a track in seconds of audio — the analysis duration, else the file header"""
+        if index in self.duplicate_of:
+            return 0.0  # linked to its twin's outputs, nothing to render
+        track = self.tracks[index]
+        return float(track.get('duration') or audio_duration(track['path']) or 0.0)
+
+    def _segmentable(self, index):
+        """Whether a track will render as parallel segments (single-preset batches only)"""
+        if len(self.preset_keys) > 1 or self._job_cost(index) < AudioProcessor.SEGMENT_MIN_DURATION:
+            return False
+        track = self.tracks[index]
+        return self.processor_pool[0].renders_segmented(
+            track['path'], self.preset_key, analysis=track, set_gain_db=self._set_gain(self.preset_key, index)
+        )
+
+    def start(self):
+        """Queue the batch on the engine and return immediately"""
+        self.journal.open(
+            self._journal_settings(), resume=bool(self.resumed), keep=[track['path'] for track in self.tracks]
+        )
+        self._finished.clear()
+        self.engine.submit(self._run_batch())
+
+    def is_running(self):
+        return not self._finished.is_set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def shutdown(self):
+        """Stop the batch — and release the engine's loop and job threads if it has its own"""
+        self.stop_processing()
+        if self._owns_engine:
+            self.engine.shutdown()
+
+    async def _run_batch(self):
+        """Every track is a queued coroutine; one waits for a free processor, then runs as an engine job"""
         total = len(self.tracks)
         processed = 0
         completed_count = 0
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Assign each track a processor from the pool using round-robin
-            futures = {
-                executor.submit(
-                    self.process_single_track,
-                    i,
-                    track,
-                    self.processor_pool[i % self.max_workers]
-                ): i
-                for i, track in enumerate(self.tracks)
-            }
-
-            for future in as_completed(futures):
-                if self.should_stop:
-                    break
+        progress = BatchProgress(float(track.get('duration') or 0) for track in self.tracks)
+
+        def on_track(index, percent, speed):
+            self.track_progress.emit(index, percent, speed)
+            self.batch_progress.emit(progress.eta(), progress.throughput())
+
+        # Up to date, or finished by an interrupted run — reported, not queued.
+        # Nothing is rendered for them now, so they stay out of the ETA's throughput.
+        finished_before = {index: ("Up to date",) + levels for index, levels in self.current.items()}
+        finished_before.update((index, ("Resumed",) + levels) for index, levels in self.resumed.items())
+        for index, (message, lufs, peak) in sorted(finished_before.items()):
+            processed += 1
+            completed_count += 1
+            progress.finish(index, completed=False)
+            self.track_completed.emit(index, True, message, lufs, peak)
+            self.progress_updated.emit(completed_count, total)
 
-                try:
-                    index, success, message, lufs, peak = future.result()
-                    if success:
-                        processed += 1
-                    completed_count += 1
-                    self.track_completed.emit(index, success, message, lufs, peak)
-                    self.progress_updated.emit(completed_count, total)
-                except Exception as e:
-                    print(f"Error processing track: {e}")
-
-        self.all_completed.emit(processed, total)
+        pool = asyncio.Queue()
+        for processor in self.processor_pool:
+            pool.put_nowait(processor)
+        # Tracks queued for a processor and not yet dispatched — a duplicate
+        # only joins them if its twin's render fails
+        queued = [i for i in range(total) if i not in finished_before and i not in self.duplicate_of]
+        waiting = {'tracks': len(queued)}
+
+        async def run_track(index, track, queued=True):
+            if not queued:
+                waiting['tracks'] += 1
+            processor = await pool.get()
+            waiting['tracks'] -= 1
+            # A segmented mix takes along the processors no queued track will
+            # claim — their jobs render its segments at once instead of sitting
+            # idle. Only the speed depends on it: the segments are the same.
+            borrowed = []
+            if self._segmentable(index):
+                while pool.qsize() > waiting['tracks']:
+                    borrowed.append(pool.get_nowait())
+            processor.segment_workers = 1 + len(borrowed)
+            try:
+                return await self.engine.run_job(
+                    self.process_single_track, index, track, processor,
+                    progress=progress.reporter(index, on_track)
+                )
+            finally:
+                processor.segment_workers = 1
+                for spare in [processor] + borrowed:
+                    pool.put_nowait(spare)
+
+        # Outcome per track, so a duplicate can wait for the one it copies
+        outcomes = {}
+        for index, (message, lufs, peak) in finished_before.items():
+            outcomes[index] = asyncio.get_running_loop().create_future()
+            outcomes[index].set_result((index, True, message, lufs, peak))
+        self.linked = set()
+
+        async def run_duplicate(index, track, source_index):
+            # shield — cancelling this task must not cancel the source's render
+            _, success, _, lufs, peak = await asyncio.shield(outcomes[source_index])
+            if not success:
+                return await run_track(index, track, queued=False)
+            self.linked.add(index)
+            return await self.engine.run_job(self.process_duplicate, index, track, source_index, lufs, peak)
+
+        # Queue order is processor order — the pool hands processors out first come, first served.
+        # Results are still reported by table index.
+        tasks = []
+        for i in self.submission_order():
+            track = self.tracks[i]
+            if i in finished_before:
+                continue
+            if i in self.duplicate_of:
+                task = asyncio.ensure_future(run_duplicate(i, track, self.duplicate_of[i]))
+            else:
+                task = asyncio.ensure_future(run_track(i, track))
+            outcomes[i] = task
+            tasks.append(task)
+        pending = set(tasks)
+        try:
+            while pending and not self.should_stop:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        index, success, message, lufs, peak = task.result()
+                        if success:
+                            processed += 1
+                        completed_count += 1
+                        # A linked duplicate rendered nothing — keep it out of the throughput
+                        progress.finish(index, completed=success and index not in self.linked)
+                        self.track_completed.emit(index, success, message, lufs, peak)
+                        self.progress_updated.emit(completed_count, total)
+                        self.batch_progress.emit(progress.eta(), progress.throughput())
+                    except Exception as e:
+                        print(f"Error processing track: {e}")
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.journal.close(complete=processed == total)
+            self.all_completed.emit(processed, total)
+            self._finished.set()
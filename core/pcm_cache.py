@@ -0,0 +1,159 @@
+"""
+Opt-in scratch cache of decoded compressed sources.
+
+MP3/M4A/AAC sources are otherwise decoded again by every stage (analysis,
+true peak, waveform, measurement, render). With the cache enabled the
+first stage that needs the audio decodes it once to a 32-bit float WAV,
+keyed by content fingerprint, and every later stage reads that file
+instead — soundfile reads it directly and FFmpeg just demuxes it.
+
+Entries are evicted least-recently-used once the cache exceeds its byte
+budget. Off by default; enable in config/settings.json:
+
+    "pcm_cache": {"enabled": true, "budget_mb": 4096}
+"""
+import os
+import json
+import time
+import threading
+import subprocess
+from pathlib import Path
+from .utils import file_fingerprint, audio_duration
+from .timeouts import StageTimeouts
+
+_SETTINGS_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'settings.json')
+
+# One index for every instance in the process — analyzers and processors share the disk cache
+_index_lock = threading.Lock()
+
+
+class PCMCache:
+    """Decode-once cache: compressed source path → decoded float WAV path"""
+
+    COMPRESSED_EXTENSIONS = {'.mp3', '.m4a', '.aac', '.mp4', '.ogg', '.opus'}
+    DEFAULT_BUDGET_MB = 4096
+
+    def __init__(self, cache_dir=None, budget_mb=None, enabled=None, ffmpeg_path='ffmpeg'):
+        settings = self._load_settings()
+        self.enabled = settings.get('enabled', False) if enabled is None else enabled
+        self.budget_bytes = int((budget_mb or settings.get('budget_mb', self.DEFAULT_BUDGET_MB)) * 1024 * 1024)
+        self.ffmpeg_path = ffmpeg_path
+
+        if cache_dir is None:
+            cache_dir = Path(os.path.dirname(__file__)) / '..' / 'temp' / 'pcm_cache'
+        self._cache_dir = Path(cache_dir)
+        self._index_path = self._cache_dir / 'index.json'
+
+    def _load_settings(self):
+        try:
+            with open(_SETTINGS_PATH, 'r') as f:
+                return json.load(f).get('pcm_cache', {})
+        except Exception:
+            return {}
+
+    def resolve(self, file_path, registry=None):
+        """
+        Path a stage should read the audio from — the cached decode when
+        the cache is on and the source is compressed, else file_path.
+        The first call for a source decodes it (through registry if given,
+        so a batch cancel also stops the decode). Any failure falls back
+        to the original file.
+        """
+        if not self.enabled or os.path.splitext(file_path)[1].lower() not in self.COMPRESSED_EXTENSIONS:
+            return file_path
+
+        key = file_fingerprint(file_path)
+        if key is None:
+            return file_path
+
+        entry = self._cache_dir / f"{key}.wav"
+        with _index_lock:
+            if entry.exists():
+                self._touch(key, entry)
+                return str(entry)
+
+        decoded = self._decode(file_path, entry, registry)
+        if decoded is None:
+            return file_path
+
+        with _index_lock:
+            self._touch(key, entry)
+            self._evict(keep=key)
+        return decoded
+
+    def _decode(self, file_path, entry, registry):
+        """Decode to a temp name, then rename — readers never see a partial entry"""
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = str(entry) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        cmd = [
+            self.ffmpeg_path, '-i', file_path,
+            '-map', '0:a:0', '-c:a', 'pcm_f32le', '-rf64', 'auto',
+            '-f', 'wav', '-y', tmp_path
+        ]
+        duration = audio_duration(file_path)
+        try:
+            if registry is not None:
+                result = registry.run(cmd, outputs=[tmp_path], stage='analysis', duration=duration)
+            else:
+                timeout = StageTimeouts().timeout('analysis', duration)
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            if result.returncode != 0:
+                return None
+            os.replace(tmp_path, entry)
+            return str(entry)
+        except subprocess.TimeoutExpired:
+            print(f"PCM cache decode timed out for: {os.path.basename(file_path)}")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _write_index(self, index):
+        try:
+            with open(self._index_path, 'w') as f:
+                json.dump(index, f)
+        except Exception:
+            pass
+
+    def _touch(self, key, entry):
+        index = self._read_index()
+        index[key] = {'size': entry.stat().st_size, 'last_used': time.time()}
+        self._write_index(index)
+
+    def _evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits its budget"""
+        index = self._read_index()
+
+        # Forget entries whose file was removed behind our back
+        index = {k: v for k, v in index.items() if (self._cache_dir / f"{k}.wav").exists()}
+
+        total = sum(v['size'] for v in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                (self._cache_dir / f"{key}.wav").unlink()
+            except OSError:
+                continue
+            total -= index.pop(key)['size']
+
+        self._write_index(index)
+
+    def clear(self):
+        """Remove every cached decode"""
+        with _index_lock:
+            for path in self._cache_dir.glob('*.wav'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._write_index({})
@@ -0,0 +1,188 @@
+"""
+Memory-mapped access to the PCM payload of WAV and AIFF files.
+
+Lets post-render stages (trim, peak safety) read and rewrite samples in
+place instead of decoding and re-encoding the whole file through FFmpeg.
+Only uncompressed integer/float PCM is supported — FLAC and anything
+else must still go through FFmpeg.
+"""
+import struct
+import numpy as np
+
+
+class PCMFormatError(Exception):
+    """Raised when a file is not plain PCM WAV/AIFF we can map"""
+
+
+class PCMFile:
+    """Sample-level read/write view over a WAV or AIFF file via np.memmap"""
+
+    def __init__(self, path, mode='r+'):
+        self.path = path
+        # Set by the first write — after that the file no longer holds its original samples
+        self.modified = False
+        with open(path, 'rb') as f:
+            header = f.read(12)
+            if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+                self._parse_wav(f)
+            elif header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'):
+                self._parse_aiff(f, header[8:12])
+            else:
+                raise PCMFormatError("Not a WAV or AIFF file")
+
+        self.frames = self.data_size // (self.channels * self.sample_width)
+        if self.frames == 0:
+            raise PCMFormatError("No audio data")
+
+        # 24-bit has no numpy dtype — map raw bytes and pack/unpack per block
+        if self.sample_width == 3:
+            dtype, shape = np.uint8, (self.frames, self.channels, 3)
+        else:
+            dtype, shape = self._dtype, (self.frames, self.channels)
+
+        self._map = np.memmap(path, dtype=dtype, mode=mode, offset=self.data_offset, shape=shape)
+
+    def _parse_wav(self, f):
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            chunk_id, size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+            elif chunk_id == b'data':
+                self.data_offset = f.tell()
+                self.data_size = size
+                break
+            else:
+                f.seek(size, 1)
+            if size % 2:
+                f.seek(1, 1)
+
+        if fmt is None or not hasattr(self, 'data_offset'):
+            raise PCMFormatError("Missing fmt or data chunk")
+
+        tag, self.channels, self.sample_rate = struct.unpack('<HHI', fmt[:8])
+        bits = struct.unpack('<H', fmt[14:16])[0]
+        if tag == 0xFFFE and len(fmt) >= 26:
+            tag = struct.unpack('<H', fmt[24:26])[0]  # WAVE_FORMAT_EXTENSIBLE sub-format
+
+        self._set_sample_format(tag == 3, bits, '<')
+
+    def _parse_aiff(self, f, form_type):
+        comm = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            chunk_id, size = struct.unpack('>4sI', chunk)
+            if chunk_id == b'COMM':
+                comm = f.read(size)
+            elif chunk_id == b'SSND':
+                offset, _ = struct.unpack('>II', f.read(8))
+                self.data_offset = f.tell() + offset
+                self.data_size = size - 8 - offset
+                break
+            else:
+                f.seek(size, 1)
+            if size % 2:
+                f.seek(1, 1)
+
+        if comm is None or not hasattr(self, 'data_offset'):
+            raise PCMFormatError("Missing COMM or SSND chunk")
+
+        self.channels, _, bits = struct.unpack('>hIh', comm[:8])
+        self.sample_rate = int(round(self._extended_to_float(comm[8:18])))
+
+        is_float = False
+        if form_type == b'AIFC':
+            compression = comm[18:22]
+            if compression in (b'fl32', b'FL32'):
+                is_float = True
+            elif compression not in (b'NONE', b'twos'):
+                raise PCMFormatError(f"Unsupported AIFC compression {compression!r}")
+
+        self._set_sample_format(is_float, bits, '>')
+
+    def _extended_to_float(self, data):
+        """80-bit IEEE 754 extended (AIFF sample rate field) → float"""
+        exponent, mantissa = struct.unpack('>HQ', data)
+        sign = -1 if exponent & 0x8000 else 1
+        exponent &= 0x7FFF
+        if exponent == 0 and mantissa == 0:
+            return 0.0
+        return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+    def _set_sample_format(self, is_float, bits, endian):
+        self.endian = endian
+        self.is_float = is_float
+        self.sample_width = bits // 8
+
+        if is_float and bits == 32:
+            self._dtype = np.dtype(endian + 'f4')
+            self._scale = 1.0
+        elif not is_float and bits == 16:
+            self._dtype = np.dtype(endian + 'i2')
+            self._scale = 32768.0
+        elif not is_float and bits == 24:
+            self._dtype = None
+            self._scale = 8388608.0
+        elif not is_float and bits == 32:
+            self._dtype = np.dtype(endian + 'i4')
+            self._scale = 2147483648.0
+        else:
+            raise PCMFormatError(f"Unsupported sample format ({bits}-bit{' float' if is_float else ''})")
+
+    def read(self, start, count):
+        """Read frames [start, start+count) as float64 array shaped (frames, channels)"""
+        raw = self._map[start:start + count]
+
+        if self.sample_width == 3:
+            b = raw.astype(np.int32)
+            if self.endian == '<':
+                v = b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)
+            else:
+                v = (b[..., 0] << 16) | (b[..., 1] << 8) | b[..., 2]
+            v = (v << 8) >> 8  # sign-extend 24 → 32 bit
+            return v / self._scale
+
+        return raw.astype(np.float64) / self._scale
+
+    def write(self, start, samples):
+        """Write float samples (frames, channels) back at frame offset start"""
+        count = len(samples)
+        self.modified = True
+
+        if self.is_float:
+            self._map[start:start + count] = samples
+            return
+
+        full_scale = self._scale
+        v = np.clip(np.round(samples * full_scale), -full_scale, full_scale - 1)
+
+        if self.sample_width == 3:
+            v = v.astype(np.int32)
+            out = np.empty(v.shape + (3,), dtype=np.uint8)
+            order = (0, 8, 16) if self.endian == '<' else (16, 8, 0)
+            for i, shift in enumerate(order):
+                out[..., i] = (v >> shift) & 0xFF
+            self._map[start:start + count] = out
+        else:
+            self._map[start:start + count] = v.astype(self._dtype)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        """Flush pending writes and release the mapping"""
+        if self._map is not None:
+            self._map.flush()
+            self._map = None  # mapping is released once the last view is gone
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
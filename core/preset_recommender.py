@@ -0,0 +1,239 @@
+"""
+Preset recommendation from a cheap model of the render chain.
+
+Comparing presets by rendering a track through each costs one FFmpeg
+render per preset. The recommender replays _build_filters' decisions
+instead — pre-limiter, highpass, gain, final ceiling limiter — on a
+decimated copy of the audio. While the analysis stage reads the file
+anyway (HealthAnalyzer's peak pass), every 8th frame (ProxyEnvelope.STRIDE)
+is reduced per highpass cutoff to a 10 ms peak envelope and K-weighted
+100 ms energies.
+Each preset is then a handful of array operations on those.
+
+The decimated copy misses inter-sample and high-frequency peaks, so peaks
+and loudness are calibrated against the analysis' own measurements: the
+model is trusted for how the presets differ, the analysis for where the
+track starts. Dynamic loudnorm (Mode A) is modelled as the static gain it
+converges to.
+"""
+import math
+import numpy as np
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import lfilter
+from .loudness_meter import LoudnessMeter
+from .compliance import LOUDNESS_TOLERANCE
+from .set_loudness import limiting_allowance
+
+
+class ProxyEnvelope:
+    """Decimated reduction of a track, fed block by block as it is read"""
+
+    STRIDE = 8
+    # Peak frames per 100 ms loudness sub-block
+    FRAMES_PER_SUB_BLOCK = 10
+
+    def __init__(self, cutoffs):
+        # 0 — no highpass, the calibration reference
+        self.cutoffs = sorted({0} | {int(c) for c in cutoffs})
+        self.meters = {}
+        self.frame = None
+        self._peaks = {}
+
+    def begin(self, sample_rate, channels):
+        rate = sample_rate / self.STRIDE
+        self._offset = 0
+        self.meters = {c: LoudnessMeter(rate, channels) for c in self.cutoffs}
+        self.step = self.meters[0]._step
+        self.frame = max(1, self.step // self.FRAMES_PER_SUB_BLOCK)
+        self._highpass = {c: self._one_pole_highpass(c, rate, channels) for c in self.cutoffs if c}
+        self._tails = {c: np.zeros((0, channels)) for c in self.cutoffs}
+        self._peaks = {c: [] for c in self.cutoffs}
+
+    def _one_pole_highpass(self, cutoff, rate, channels):
+        """
+        FFmpeg's highpass=poles=1 — [b, a, state on the raw signal, state on
+        the K-weighted one]. Both filters are linear, so highpassing the
+        K-weighted block equals K-weighting the highpassed one.
+        """
+        a1 = -math.exp(-2 * math.pi * cutoff / rate)
+        b0 = (1 - a1) / 2
+        return [[b0, -b0], [1.0, a1], np.zeros((1, channels)), np.zeros((1, channels))]
+
+    def feed(self, block):
+        """Add a (frames, channels) float block"""
+        if self.frame is None:
+            return
+        x = block[self._offset::self.STRIDE]
+        self._offset = (self._offset - len(block)) % self.STRIDE
+        if not len(x):
+            return
+
+        weighted = self.meters[0].feed(x)
+        self._add_peaks(0, x)
+        for cutoff in self.cutoffs[1:]:
+            state = self._highpass[cutoff]
+            b, a = state[0], state[1]
+            y, state[2] = lfilter(b, a, x, axis=0, zi=state[2])
+            y_weighted, state[3] = lfilter(b, a, weighted, axis=0, zi=state[3])
+            self.meters[cutoff].feed_weighted(y_weighted)
+            self._add_peaks(cutoff, y)
+
+    def _add_peaks(self, cutoff, y):
+        # Frames are whole rows, so one reshape takes the peak over time and channels —
+        # the partial frame at the end waits for the next block
+        level = np.abs(y)
+        if len(self._tails[cutoff]):
+            level = np.concatenate((self._tails[cutoff], level))
+        whole = len(level) // self.frame * self.frame
+        if whole:
+            self._peaks[cutoff].append(level[:whole].reshape(whole // self.frame, -1).max(axis=1))
+        self._tails[cutoff] = level[whole:]
+
+    def frame_peaks(self, cutoff):
+        """Linear peak per frame after the highpass at cutoff (0 — none)"""
+        peaks = self._peaks.get(cutoff)
+        return np.concatenate(peaks) if peaks else np.zeros(0)
+
+
+class PresetRecommender:
+    """Predicts every preset's render of a track and ranks them"""
+
+    # alimiter release in _build_filters, in 10 ms frames
+    RELEASE_FRAMES = 5
+    # Gain reduction below this is rounding, not limiting
+    LIMITING_FLOOR_DB = 0.1
+    # Overshoots (true peak + gain over the ceiling, dB) the limiting_loss curve is sampled at
+    LOSS_OVERSHOOTS = range(13)
+
+    def __init__(self, preset_manager):
+        self.preset_manager = preset_manager
+
+    def envelope(self):
+        """A ProxyEnvelope covering the highpass cutoffs of every preset"""
+        presets = self.preset_manager.get_all_presets().values()
+        return ProxyEnvelope(p.get('highpass_hz', 0) for p in presets)
+
+    def recommend(self, envelope, analysis):
+        """
+        Rank every preset for the track envelope was fed with.
+        analysis — AudioAnalyzer result of the same track
+
+        Returns: {'recommended_preset': preset id,
+                  'preset_predictions': [{'preset', 'label', 'target_lufs', 'lufs',
+                  'peak', 'limiting_db', 'limited_pct', 'gain_db', 'fits'}, ...] best first,
+                  'limiting_loss': [dB of loudness the limiters take at each of LOSS_OVERSHOOTS]}
+                 or {} when the envelope or analysis can't be used
+        """
+        stats = analysis.get('loudnorm_stats') or {}
+        try:
+            input_lufs = float(stats['input_i'])
+            input_tp = float(stats['input_tp'])
+            input_lra = float(stats.get('input_lra', 0.0))
+        except (KeyError, ValueError, TypeError):
+            return {}
+
+        raw_peaks = envelope.frame_peaks(0)
+        source_lufs = envelope.meters[0].integrated() if envelope.meters else None
+        if not len(raw_peaks) or source_lufs is None or raw_peaks.max() <= 0:
+            return {}
+
+        levels = {}
+        with np.errstate(divide='ignore'):
+            for cutoff in envelope.cutoffs:
+                levels[cutoff] = 20 * np.log10(envelope.frame_peaks(cutoff))
+        # Lift the decimated sample peaks to the measured true peak
+        peak_offset = input_tp - float(levels[0].max())
+        for cutoff in levels:
+            levels[cutoff] = levels[cutoff] + peak_offset
+        lufs_offset = input_lufs - source_lufs
+
+        pre_reduction = np.maximum(0.0, levels[0] - (-1.0)) if input_tp > -1.0 else 0.0
+        source = {
+            'input_lufs': input_lufs, 'input_lra': input_lra,
+            'pre_reduction': pre_reduction, 'lufs_offset': lufs_offset,
+        }
+
+        predictions = []
+        for preset_id, preset in self.preset_manager.get_all_presets().items():
+            cutoff = int(preset.get('highpass_hz', 0))
+            prediction = self._predict(preset, source, levels[cutoff], envelope.meters[cutoff], envelope)
+            prediction['preset'] = preset_id
+            prediction['label'] = preset.get('label', preset_id)
+            predictions.append(prediction)
+
+        allowance = limiting_allowance(input_lra)
+        for prediction in predictions:
+            miss = abs(prediction['lufs'] - prediction['target_lufs'])
+            excess = max(0.0, prediction['limiting_db'] - allowance) + max(0.0, miss - LOUDNESS_TOLERANCE)
+            prediction['fits'] = excess == 0.0
+            prediction['_rank'] = (not prediction['fits'], abs(prediction['gain_db']) if prediction['fits'] else excess)
+        predictions.sort(key=lambda p: p.pop('_rank'))
+
+        return {
+            'recommended_preset': predictions[0]['preset'],
+            'preset_predictions': predictions,
+            'limiting_loss': self._limiting_loss(source, levels[0] - input_tp, envelope.meters[0], envelope),
+        }
+
+    def _limiting_loss(self, source, relative, meter, envelope):
+        """
+        Loudness the limiters take off the track at every overshoot of
+        LOSS_OVERSHOOTS — what a gain other than a preset's (a set plan's)
+        costs, read off the same model as the predictions.
+        relative — calibrated frame peaks relative to the true peak
+        """
+        unlimited = meter.integrated()
+        losses = []
+        for overshoot in self.LOSS_OVERSHOOTS:
+            # Any gain and ceiling with this overshoot — the ceiling sits at 0
+            _, scale = self._limiter_scale(relative - source['pre_reduction'] + overshoot, 0.0, source,
+                                           meter, envelope)
+            limited = meter.integrated(scale=scale)
+            loss = unlimited - limited if unlimited is not None and limited is not None else 0.0
+            losses.append(round(max(0.0, loss), 2))
+        return losses
+
+    def _limiter_scale(self, level, ceiling, source, meter, envelope):
+        """
+        Final limiter gain reduction per frame, and the energy factor per
+        100 ms sub-block both limiters leave — the scale for meter.integrated
+        """
+        overshoot = np.maximum(0.0, level - ceiling)
+        # Reduction holds for the release time after each peak
+        reduction = maximum_filter1d(overshoot, self.RELEASE_FRAMES, origin=self.RELEASE_FRAMES // 2,
+                                     mode='constant')
+
+        # Energy each 100 ms sub-block keeps through both limiters
+        kept = 10 ** (-(reduction + source['pre_reduction']) / 10)
+        sub_blocks = len(meter.energies)
+        index = np.minimum(np.arange(len(kept)) * envelope.frame // envelope.step, max(0, sub_blocks - 1))
+        counts = np.bincount(index, minlength=sub_blocks)
+        scale = np.bincount(index, weights=kept, minlength=sub_blocks) / np.maximum(counts, 1)
+        scale[counts == 0] = 1.0
+        return reduction, scale
+
+    def _predict(self, preset, source, levels, meter, envelope):
+        """The render pass of one preset — gain and limiting as _build_filters would apply them"""
+        target = preset['target_lufs']
+        ceiling = preset['true_peak']
+        gain = target - source['input_lufs']
+        if source['input_lra'] < 6.0:
+            # Mode B clamps its gain
+            gain = max(-6.0, min(6.0, gain))
+        if abs(gain) <= 0.3:
+            gain = 0.0
+
+        level = levels - source['pre_reduction'] + gain
+        reduction, scale = self._limiter_scale(level, ceiling, source, meter, envelope)
+
+        lufs = meter.integrated(gain, scale=scale)
+        lufs = target if lufs is None else lufs + source['lufs_offset']
+
+        return {
+            'target_lufs': target,
+            'lufs': round(lufs, 1),
+            'peak': round(float((level - reduction).max()), 1),
+            'limiting_db': round(float(reduction.max()), 1),
+            'limited_pct': round(100.0 * float(np.mean(reduction > self.LIMITING_FLOOR_DB)), 1),
+            'gain_db': round(gain, 1),
+        }
@@ -0,0 +1,201 @@
+"""
+Registry of in-flight FFmpeg processes.
+
+Every FFmpeg call on the processing path goes through ProcessRegistry.run
+instead of subprocess.run. The registry launches each child in its own
+process group and keeps it on record while it runs. That lets a batch be
+cancelled or paused at the process level: cancel kills every live group
+(milliseconds instead of waiting for the encodes to finish) and pause
+freezes them with SIGSTOP until resume sends SIGCONT.
+"""
+import os
+import signal
+import subprocess
+import threading
+import time
+from .timeouts import StageTimeouts
+
+
+class ProcessCancelled(Exception):
+    """Raised by ProcessRegistry.run when the registry was cancelled"""
+
+    def __init__(self):
+        super().__init__("Cancelled")
+
+
+class ProcessRegistry:
+    """Launches FFmpeg children and tracks them for cancel / pause / resume"""
+
+    # How often a waiting run() re-checks for pause and timeout
+    POLL_SECONDS = 0.25
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes = {}  # pid → Popen
+        self._running = threading.Event()
+        self._running.set()
+        self.cancelled = False
+        self.paused = False
+        # CPUBudget pinning each command's FFmpeg thread counts — None leaves FFmpeg's defaults
+        self.budget = None
+        # Shared by every run — the speed estimates improve as the batch goes
+        self.timeouts = StageTimeouts()
+
+    def run(self, cmd, timeout=None, outputs=(), stage=None, duration=None, on_line=None):
+        """
+        Drop-in for subprocess.run(cmd, capture_output=True, text=True, timeout=...).
+
+        outputs — files the command writes; they are removed if it is
+        cancelled, times out or fails, so no partial file is left behind.
+        Time spent paused does not count towards the timeout.
+        stage — 'analysis', 'render', 'encode', 'trim' or 'verify'; FFmpegEngine
+        limits concurrency per stage.
+        duration — seconds of audio the command covers; without an explicit
+        timeout, the timeout is derived from it and the stage's speed
+        (see StageTimeouts).
+        on_line — called with every stderr line once the command finished.
+
+        Returns: subprocess.CompletedProcess
+        Raises: ProcessCancelled, subprocess.TimeoutExpired
+        """
+        # A paused batch doesn't start new work either
+        self._running.wait()
+        if self.cancelled:
+            raise ProcessCancelled()
+
+        if self.budget is not None:
+            cmd = self.budget.apply(cmd)
+        if timeout is None:
+            timeout = self.timeouts.timeout(stage, duration)
+
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            start_new_session=(os.name == 'posix')
+        )
+
+        self._track(process)
+        try:
+            stdout, stderr, active = self._wait(process, cmd, timeout)
+        except subprocess.TimeoutExpired:
+            self._remove(outputs)
+            raise
+        finally:
+            self._untrack(process)
+
+        if process.returncode == 0:
+            self.timeouts.observe(stage, duration, active)
+        if on_line is not None:
+            for line in stderr.replace('\r', '\n').split('\n'):
+                on_line(line)
+        return self._completed(cmd, process.returncode, stdout, stderr, outputs)
+
+    def _track(self, process):
+        with self._lock:
+            self._processes[process.pid] = process
+            # cancel() / pause() may have run between the launch check and registration
+            if self.cancelled:
+                self._kill(process)
+            elif self.paused and os.name == 'posix':
+                self._signal(process, signal.SIGSTOP)
+
+    def _untrack(self, process):
+        with self._lock:
+            self._processes.pop(process.pid, None)
+
+    def _completed(self, cmd, returncode, stdout, stderr, outputs):
+        """CompletedProcess for a finished child — raises if the registry was cancelled meanwhile"""
+        if self.cancelled:
+            self._remove(outputs)
+            raise ProcessCancelled()
+
+        if returncode != 0:
+            self._remove(outputs)
+
+        return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+    def _wait(self, process, cmd, timeout):
+        """
+        communicate() in short slices so paused time can be left out of the timeout.
+        Returns: (stdout, stderr, seconds spent running unpaused)
+        """
+        active = 0.0
+        while True:
+            started = time.monotonic()
+            try:
+                stdout, stderr = process.communicate(timeout=self.POLL_SECONDS)
+                if not self.paused:
+                    active += time.monotonic() - started
+                return stdout, stderr, active
+            except subprocess.TimeoutExpired:
+                if not self.paused:
+                    active += time.monotonic() - started
+                if timeout is not None and active >= timeout:
+                    self._kill(process)
+                    process.communicate()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+
+    def cancel(self):
+        """Kill every live process group now and refuse new launches until reset()"""
+        with self._lock:
+            self.cancelled = True
+            # SIGKILL also ends stopped processes — no SIGCONT needed first
+            for process in self._processes.values():
+                self._kill(process)
+        self._running.set()
+
+    def pause(self):
+        """
+        Freeze live processes (SIGSTOP) and hold back new ones.
+        Windows has no SIGSTOP — there only new launches are held back.
+        """
+        with self._lock:
+            self.paused = True
+            self._running.clear()
+            if os.name == 'posix':
+                for process in self._processes.values():
+                    self._signal(process, signal.SIGSTOP)
+
+    def resume(self):
+        with self._lock:
+            self.paused = False
+            if os.name == 'posix':
+                for process in self._processes.values():
+                    self._signal(process, signal.SIGCONT)
+            self._running.set()
+
+    def reset(self):
+        """Clear a previous cancel/pause before reusing the registry for a new batch"""
+        with self._lock:
+            self.cancelled = False
+            self.paused = False
+            self._running.set()
+
+    def _kill(self, process):
+        if os.name == 'posix':
+            self._signal(process, signal.SIGKILL)
+        else:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def _signal(self, process, sig):
+        """Signal the whole process group (FFmpeg and anything it spawned)"""
+        try:
+            os.killpg(process.pid, sig)
+        except OSError:
+            pass
+
+    def _remove(self, outputs):
+        for path in outputs:
+            try:
+                if path and os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
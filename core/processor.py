@@ -1,14 +1,70 @@
 import subprocess
 import os
 import sys
+import shutil
+import soundfile as sf
 from .presets import PresetManager
-from .utils import extract_loudnorm_json
+from .analysis_cache import AnalysisCache
+from .utils import parse_ebur128_summary, parse_ebur128_summaries, audio_duration
+from .lufs_analyzer import LUFSAnalyzer
+from .pcm_file import PCMFile
+from .peak_limiter import PeakLimiter
+from .loudness_meter import LoudnessMeter
+from .segment_renderer import SegmentRenderer
+from .process_registry import ProcessRegistry, ProcessCancelled
+from .pcm_cache import PCMCache
+from .compliance import is_compliant
 
 
 class AudioProcessor:
-    def __init__(self):
+    # Bump when a pipeline change should re-render outputs an earlier version
+    # wrote — the output manifest then treats them as out of date
+    ENGINE_VERSION = 2
+
+    # Uncompressed outputs that post-render stages can rewrite in place
+    PCM_FORMATS = ('wav_24', 'wav_16', 'aiff')
+    # Master for multi-format output, in order of preference — 24-bit PCM, corrected in place
+    MASTER_FORMATS = ('wav_24', 'aiff')
+
+    # loudnorm input statistics pass 2 needs — all target-independent
+    LOUDNORM_INPUT_FIELDS = ('input_i', 'input_tp', 'input_lra', 'input_thresh')
+
+    # fixed_44100 — legacy: every output resampled to 44.1 kHz
+    # native      — keep 44.1/48 kHz sources at their own rate. The chain adds no
+    #               conversion except dynamic loudnorm's 192 kHz round trip (Mode A)
+    SAMPLE_RATE_MODES = ('fixed_44100', 'native')
+    NATIVE_RATES = (44100, 48000)
+    # Most peak reduction native mode hands to the final limiter instead of dynamic
+    # loudnorm — only for presets that opt in with native_static_gain
+    NATIVE_LIMITER_HEADROOM_DB = 3.0
+
+    # Inputs at least this long (seconds) render as parallel segments when their chain allows
+    SEGMENT_MIN_DURATION = 20 * 60
+
+    # Length (seconds) of a render_preview excerpt
+    PREVIEW_SECONDS = 30
+
+    # soundfile (container, subtypes) of a source that already is in an output format
+    SOURCE_FORMATS = {
+        'wav_24': (('WAV', 'WAVEX'), ('PCM_24',)),
+        'wav_16': (('WAV', 'WAVEX'), ('PCM_16',)),
+        'aiff': (('AIFF',), ('PCM_24',)),
+        'flac': (('FLAC',), ('PCM_16', 'PCM_24')),
+    }
+
+    def __init__(self, sample_rate_mode='fixed_44100'):
+        self.sample_rate_mode = sample_rate_mode
+        # Concurrent FFmpeg processes one long input may be split across
+        self.segment_workers = 1
+        # Tracks the analysis shows already on target are copied/transcoded, not rendered
+        self.compliant_fast_path = True
         self.preset_manager = PresetManager()
+        self.analysis_cache = AnalysisCache()
+        # Every FFmpeg child goes through the registry — batches swap in a shared one
+        self.registry = ProcessRegistry()
+        self.lufs_analyzer = LUFSAnalyzer(registry=self.registry)
         self.ffmpeg_path = self._find_ffmpeg()
+        self.pcm_cache = PCMCache(ffmpeg_path=self.ffmpeg_path)
 
     def _find_ffmpeg(self):
         """Find FFmpeg executable (bundled or system)"""
@@ -19,79 +75,508 @@ class AudioProcessor:
                 return ffmpeg_path
         return 'ffmpeg'
 
-    def process_track(self, input_path, preset_name, output_path, output_format="wav_24"):
-        """Process with LUFS correction loop and final peak safety pass"""
+    def process_track(self, input_path, preset_name, output_path, output_format="wav_24", analysis=None,
+                      set_gain_db=None):
+        """
+        Process with LUFS correction loop and final peak safety pass.
+        analysis — optional AudioAnalyzer result for this file; its loudnorm
+        stats stand in for pass 1 so the source is not decoded twice.
+        output_format — one format, or a list of formats encoded from one
+        corrected master (see _encode_formats)
+        set_gain_db — gain from a set plan (core/set_loudness.py): rendered
+        as that gain into the preset's ceiling, no loudnorm, no correction loop
+        """
+        final_output_path = None
         try:
             preset = self.preset_manager.get_preset(preset_name)
+            formats, master_format = self._output_formats(output_format)
 
-            loudness_data = self._measure_loudness(input_path, preset)
+            if set_gain_db is None:
+                fast_result = self._process_compliant(input_path, preset, output_path, formats, master_format, analysis)
+                if fast_result is not None:
+                    return fast_result
+            self._release_links(self._format_paths(output_path, formats, master_format).values())
+
+            loudness_data = self._get_loudness_data(input_path, preset, analysis)
             if not loudness_data:
                 return {'success': False, 'error': 'Failed to measure loudness'}
+            if set_gain_db is not None:
+                loudness_data = dict(loudness_data, set_gain_db=set_gain_db)
 
-            success, final_output_path = self._apply_processing(
-                input_path, output_path, preset, loudness_data, output_format
-            )
+            source_rate = self._source_sample_rate(input_path, analysis)
+            duration = self._source_duration(input_path, analysis)
+            render_path = self._master_path(output_path, formats, master_format)
+            # Decoded once by the analysis stage when the PCM cache is on
+            source_path = self.pcm_cache.resolve(input_path, self.registry)
+            if self._use_segments(preset, loudness_data, duration):
+                success, final_output_path, output_stats = self._apply_processing_segmented(
+                    source_path, render_path, preset, loudness_data, master_format, source_rate, duration
+                )
+            else:
+                success, final_output_path, output_stats = self._apply_processing(
+                    source_path, render_path, preset, loudness_data, master_format, source_rate, duration
+                )
 
             if not success:
                 return {'success': False, 'error': 'Processing failed'}
 
+            result = self._finish_output(final_output_path, preset, loudness_data, master_format, output_stats)
+            return self._encode_formats(result, output_path, formats, master_format)
+
+        except ProcessCancelled as e:
+            # Cancelled after the render — drop the uncorrected file
+            self._discard([final_output_path])
+            return {'success': False, 'error': str(e)}
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def process_track_multi(self, input_path, preset_names, output_paths, output_format="wav_24",
+                            analysis=None, set_gains=None):
+        """
+        Render one source to several presets from a single decode.
+        Input stats are target-independent, so they are fetched once and
+        every preset's branch hangs off the same decoded stream.
+        output_paths — {preset_name: output_path}
+        set_gains — optional {preset_name: set plan gain}, as set_gain_db in process_track
+        Returns: {preset_name: result dict as returned by process_track}
+        """
+        rendered = []
+        try:
+            presets = [self.preset_manager.get_preset(name) for name in preset_names]
+            formats, master_format = self._output_formats(output_format)
+
+            loudness_data = self._get_loudness_data(input_path, presets[0], analysis)
+            if not loudness_data:
+                return {name: {'success': False, 'error': 'Failed to measure loudness'} for name in preset_names}
+
+            # Pass-1 fields are the input stats — derive the other presets from them
+            branches = [
+                (preset, self._derive_loudness_data(loudness_data, preset),
+                 self._master_path(output_paths[name], formats, master_format))
+                for name, preset in zip(preset_names, presets)
+            ]
+            for name, (_, data, _) in zip(preset_names, branches):
+                if (set_gains or {}).get(name) is not None:
+                    data['set_gain_db'] = set_gains[name]
+            # A duplicate's outputs may be hard links to its twin's (link_outputs)
+            for name in preset_names:
+                self._release_links(self._format_paths(output_paths[name], formats, master_format).values())
+
+            source_rate = self._source_sample_rate(input_path, analysis)
+            duration = self._source_duration(input_path, analysis)
+            source_path = self.pcm_cache.resolve(input_path, self.registry)
+            success, rendered = self._apply_processing_multi(
+                source_path, branches, master_format, source_rate, duration
+            )
+
+            if not success:
+                return {name: {'success': False, 'error': 'Processing failed'} for name in preset_names}
+
+            results = {}
+            for name, (preset, data, _), (path, stats) in zip(preset_names, branches, rendered):
+                result = self._finish_output(path, preset, data, master_format, stats)
+                results[name] = self._encode_formats(result, output_paths[name], formats, master_format)
+            return results
+
+        except ProcessCancelled as e:
+            self._discard([path for path, _ in rendered])
+            return {name: {'success': False, 'error': str(e)} for name in preset_names}
+
+        except Exception as e:
+            return {name: {'success': False, 'error': str(e)} for name in preset_names}
+
+    def link_outputs(self, rendered_path, output_path, output_format="wav_24"):
+        """
+        Outputs of a duplicate input — the files already rendered for its
+        twin at rendered_path, hard-linked (or copied across filesystems)
+        under output_path's name in every requested format.
+        Returns: list of paths written
+        """
+        formats, master_format = self._output_formats(output_format)
+        sources = self._format_paths(rendered_path, formats, master_format)
+        targets = self._format_paths(output_path, formats, master_format)
+
+        written = []
+        for output_format in formats:
+            source, target = sources[output_format], targets[output_format]
+            if os.path.exists(target):
+                if os.path.samefile(source, target):
+                    written.append(target)
+                    continue
+                os.remove(target)
+            self._place_copy(source, target)
+            written.append(target)
+        return written
+
+    def render_preview(self, input_path, preset, output_path, analysis=None, seconds=PREVIEW_SECONDS,
+                       start=None, registry=None):
+        """
+        Render only an excerpt of input_path through a preset — for auditioning
+        while the preset is being edited.
+        preset — preset name, or a preset dict (e.g. unsaved editor values)
+        start — excerpt start in seconds; default is the loudest section (see preview_window)
+        registry — a ProcessRegistry of the caller's own, so a superseded
+        preview can be cancelled without touching a running batch
+
+        FFmpeg seeks straight to the window and renders the full render's
+        chain, built from the whole track's cached measurements. Nothing is
+        measured here — without cached analysis the preview fails. Mode B
+        and set-gain excerpts sound as they will in the full render; in Mode
+        A loudnorm's dynamic leveling starts at the excerpt instead of
+        carrying the track's history, so its first few seconds may level
+        slightly differently.
+
+        Returns: {'success', 'output_path', 'start', 'seconds', 'lufs', 'peak'}
+        (lufs / peak of the excerpt as rendered) or {'success': False, 'error'}
+        Raises: ProcessCancelled
+        """
+        if isinstance(preset, str):
+            preset = self.preset_manager.get_preset(preset)
+        if analysis is None:
+            analysis = self.analysis_cache.get(input_path)
+        stats = self._cached_stats(input_path, analysis)
+        if stats is None:
+            return {'success': False, 'error': 'No cached analysis — analyze the track first'}
+
+        if start is None:
+            start = self.preview_window(analysis, seconds)
+        loudness_data = self._derive_loudness_data(stats, preset)
+        filter_chain = self._build_filter_chain(preset, loudness_data)
+        sample_rate = self._output_sample_rate(self._source_sample_rate(input_path, analysis))
+        codec_args, ext = self._codec_args('wav_16', sample_rate)
+        output_path = os.path.splitext(output_path)[0] + ext
+
+        cmd = [
+            self.ffmpeg_path, '-ss', f"{start:.2f}", '-t', f"{seconds:.2f}", '-i', input_path,
+            '-filter_complex', self._build_metered_graph(filter_chain),
+            '-map', '[out]'
+        ] + codec_args + ['-y', output_path]
+
+        try:
+            result = (registry or self.registry).run(cmd, outputs=[output_path], stage='render', duration=seconds)
+        except subprocess.TimeoutExpired:
+            return {'success': False, 'error': 'Preview timed out'}
+        if result.returncode != 0:
+            return {'success': False, 'error': 'Preview render failed'}
+
+        stats = parse_ebur128_summary(result.stderr) or {}
+        return {
+            'success': True,
+            'output_path': output_path,
+            'start': start,
+            'seconds': seconds,
+            'lufs': stats.get('integrated'),
+            'peak': stats.get('true_peak'),
+        }
+
+    def preview_window(self, analysis, seconds=PREVIEW_SECONDS):
+        """
+        Start (seconds) of the loudest `seconds` of a track by the energy
+        curve in its analysis — the middle of the track without one.
+        """
+        duration = float((analysis or {}).get('duration') or 0)
+        energy = (analysis or {}).get('energy') or []
+        if duration <= seconds:
+            return 0.0
+        width = int(seconds)
+        if len(energy) <= width:
+            return (duration - seconds) / 2
+
+        # Sliding sum of short-term power — loudness in LUFS doesn't add
+        power = [10 ** (lufs / 10) for lufs in energy]
+        window = best = sum(power[:width])
+        best_index = 0
+        for i in range(width, len(power)):
+            window += power[i] - power[i - width]
+            if window > best:
+                best, best_index = window, i - width + 1
+
+        # Entry i measures the 3 s ending at i + 1 s — centre the excerpt on what was measured
+        return float(max(0, min(best_index - 1, duration - seconds)))
+
+    def _discard(self, paths):
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def _process_compliant(self, input_path, preset, output_path, formats, master_format, analysis=None):
+        """
+        Fast path for a track the cached analysis already shows on target —
+        integrated loudness within the correction loop's tolerance and true
+        peak under the ceiling, at a rate the output keeps. Formats the
+        source already is are hard-linked (or copied) into place, the rest
+        are a plain transcode. Nothing is filtered or re-measured.
+
+        Returns: process_track result, or None when the track needs the full render
+        """
+        if not self.compliant_fast_path:
+            return None
+
+        stats = self._cached_stats(input_path, analysis)
+        if stats is None:
+            return None
+        lufs, peak = float(stats['input_i']), float(stats['input_tp'])
+        if not is_compliant(lufs, peak, preset['target_lufs'], preset['true_peak']):
+            return None
+
+        source_rate = self._source_sample_rate(input_path, analysis)
+        if not source_rate or self._output_sample_rate(source_rate) != source_rate:
+            return None
+
+        output_paths = self._format_paths(output_path, formats, master_format)
+        source_format = self._source_format(input_path)
+        duration = self._source_duration(input_path, analysis)
+
+        modes = []
+        for output_format, path in output_paths.items():
+            if os.path.exists(path) and os.path.samefile(path, input_path):
+                modes.append('copy')
+                continue
+            self._release_links([path])
+            if self._matches_format(source_format, output_format):
+                self._place_copy(input_path, path)
+                modes.append('copy')
+            elif self._transcode(input_path, path, output_format, duration):
+                modes.append('transcode')
+            else:
+                return {'success': False, 'error': 'Transcode failed'}
+
+        print(f"Already compliant ({lufs:.1f} LUFS, {peak:.1f} dBTP) — "
+              f"{'/'.join(sorted(set(modes)))}: {os.path.basename(input_path)}")
+
+        result = {
+            'success': True,
+            'output_path': output_paths[formats[0]],
+            'original_lufs': stats['input_i'],
+            'final_lufs': round(lufs, 1),
+            'final_peak': round(peak, 1),
+            'fast_path': 'transcode' if 'transcode' in modes else 'copy'
+        }
+        if len(formats) > 1:
+            result['output_paths'] = {f: output_paths[f] for f in formats}
+        return result
+
+    def _source_format(self, input_path):
+        """(container, subtype) as soundfile reports them, or None"""
+        try:
+            info = sf.info(input_path)
+            return info.format, info.subtype
+        except Exception:
+            return None
+
+    def _matches_format(self, source_format, output_format):
+        if source_format is None or output_format not in self.SOURCE_FORMATS:
+            return False
+        containers, subtypes = self.SOURCE_FORMATS[output_format]
+        return source_format[0] in containers and source_format[1] in subtypes
+
+    def _place_copy(self, input_path, output_path):
+        """Hard link when source and output share a filesystem, else a plain file copy"""
+        try:
+            os.link(input_path, output_path)
+        except OSError:
+            shutil.copyfile(input_path, output_path)
+
+    def _release_links(self, paths):
+        """
+        Unlink outputs a fast-path run hard-linked to their source — FFmpeg's
+        -y truncates the existing file, which would write through the link
+        into the source itself.
+        """
+        for path in paths:
+            try:
+                if os.stat(path).st_nlink > 1:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _transcode(self, input_path, output_path, output_format, duration=None):
+        """Container / bit-depth change only — no filters, no resample"""
+        codec_args, _ = self._codec_args(output_format)
+        cmd = [self.ffmpeg_path, '-i', input_path, '-map', '0:a'] + codec_args + ['-y', output_path]
+        try:
+            result = self.registry.run(cmd, outputs=[output_path], stage='encode', duration=duration)
+            return result.returncode == 0
+        except subprocess.TimeoutExpired:
+            print(f"Transcode timed out for: {os.path.basename(input_path)}")
+            return False
+
+    def _output_formats(self, output_format):
+        """
+        output_format may be a single format or a list.
+        Returns: (formats, master_format) — the format the render, LUFS
+        correction and peak safety work on before the others are encoded
+        """
+        if not isinstance(output_format, (list, tuple)):
+            return [output_format], output_format
+
+        formats = list(output_format)
+        if len(formats) == 1:
+            return formats, formats[0]
+
+        master_format = next((f for f in self.MASTER_FORMATS if f in formats), self.MASTER_FORMATS[0])
+        return formats, master_format
+
+    def _format_paths(self, output_path, formats, master_format):
+        """
+        Final path per requested format — the master keeps output_path's name
+        with its own extension, formats sharing an extension get a _<format> suffix
+        """
+        base_path = os.path.splitext(output_path)[0]
+        paths = {}
+        if master_format in formats:
+            paths[master_format] = base_path + self._codec_args(master_format)[1]
+        for output_format in formats:
+            if output_format in paths:
+                continue
+            _, ext = self._codec_args(output_format)
+            path = base_path + ext
+            if path in paths.values():
+                path = f"{base_path}_{output_format}{ext}"
+            paths[output_format] = path
+        return paths
+
+    def render_files(self, output_path, output_format="wav_24"):
+        """
+        Every file process_track can write for output_path: the output per
+        format, the render itself (a _master temp when its format wasn't
+        requested) and the _trim/_peak temp files next to it.
+        Returns: (paths, render base path) — _seg<N>.wav segments of a
+        segmented render are named after the render base
+        """
+        formats, master_format = self._output_formats(output_format)
+        paths = list(self._format_paths(output_path, formats, master_format).values())
+        base_path = os.path.splitext(self._master_path(output_path, formats, master_format))[0]
+        ext = self._codec_args(master_format)[1]
+        paths += [base_path + ext, base_path + '_trim' + ext, base_path + '_peak' + ext]
+        return list(dict.fromkeys(paths)), base_path
+
+    def _master_path(self, output_path, formats, master_format):
+        """Render path — a _master temp file when the master format itself wasn't requested"""
+        if master_format in formats:
+            return output_path
+        base_path, ext = os.path.splitext(output_path)
+        return base_path + '_master' + ext
+
+    def _encode_formats(self, result, output_path, formats, master_format):
+        """
+        Encode every other requested format from the corrected master in one
+        FFmpeg run (one -map per output) — no format is rendered or
+        corrected twice. Formats sharing an extension get a _<format> suffix.
+        Adds output_paths {format: path} to the result.
+        """
+        if not result['success'] or formats == [master_format]:
+            return result
+
+        master_path = result['output_path']
+        output_paths = self._format_paths(output_path, formats, master_format)
+        if master_format in formats:
+            output_paths[master_format] = master_path
+
+        duration = audio_duration(master_path)
+        cmd = [self.ffmpeg_path, '-i', master_path]
+        for output_format in formats:
+            if output_format == master_format:
+                continue
+            codec_args, _ = self._codec_args(output_format)
+            cmd += ['-map', '0:a'] + codec_args + ['-y', output_paths[output_format]]
+
+        encoded_paths = [p for p in output_paths.values() if p != master_path]
+        try:
+            # Every output is a full pass over the master
+            encoded = self.registry.run(
+                cmd, outputs=encoded_paths, stage='encode',
+                duration=duration * len(encoded_paths) if duration else None
+            )
+            if encoded.returncode != 0:
+                return {'success': False, 'error': 'Format encode failed'}
+        except subprocess.TimeoutExpired:
+            print(f"Format encode timed out for: {os.path.basename(master_path)}")
+            return {'success': False, 'error': 'Format encode failed'}
+
+        if master_format not in formats:
+            os.remove(master_path)
+
+        result = dict(result)
+        result['output_paths'] = {f: output_paths[f] for f in formats}
+        result['output_path'] = output_paths[formats[0]]
+        return result
+
+    def _finish_output(self, final_output_path, preset, loudness_data, output_format, output_stats):
+        """LUFS correction loop and peak safety on a rendered file → process_track result"""
+        # Render is metered in-graph — only re-read the file if the meter summary was lost
+        if output_stats:
+            final_lufs = round(output_stats['integrated'], 1)
+            final_peak = output_stats.get('true_peak')
+        else:
             final_lufs = self._measure_final_lufs(final_output_path)
-            target_lufs = preset['target_lufs']
-            attempts = 0
+            final_peak = None  # unknown — the safety pass below measures it
+            if final_lufs is None:
+                return {'success': False, 'error': 'Failed to measure output loudness'}
+
+        target_lufs = preset['target_lufs']
+        attempts = 0
+        # A set plan fixes the gain — the track lands where the set puts it, not on target
+        correct = 'set_gain_db' not in loudness_data
 
-            while abs(final_lufs - target_lufs) > 0.5 and attempts < 2:
-                trim_db = target_lufs - final_lufs
-                trim_db = max(-6.0, min(6.0, trim_db))
+        while correct and abs(final_lufs - target_lufs) > 0.5 and attempts < 2:
+            trim_db = target_lufs - final_lufs
+            trim_db = max(-6.0, min(6.0, trim_db))
 
-                print(f"LUFS correction: output={final_lufs:.1f}, target={target_lufs}, trim={trim_db:+.1f}dB")
+            print(f"LUFS correction: output={final_lufs:.1f}, target={target_lufs}, trim={trim_db:+.1f}dB")
 
+            trimmed_lufs = None
+            if output_format in self.PCM_FORMATS:
+                trimmed_lufs = self._apply_trim_in_place(final_output_path, trim_db, preset)
+
+            if trimmed_lufs is not None:
+                final_lufs = trimmed_lufs
+            else:
                 success, final_output_path = self._apply_trim(
                     final_output_path, trim_db, preset, output_format
                 )
                 if not success:
                     break
-
                 final_lufs = self._measure_final_lufs(final_output_path)
-                attempts += 1
+                if final_lufs is None:
+                    # A guessed value would send the next trim the wrong way
+                    return {'success': False, 'error': 'Failed to measure output loudness'}
 
-            # Peak safety only needed if trim passes ran — they add gain after the limiter
-            if attempts > 0:
-                self._apply_peak_safety(final_output_path, preset, output_format)
+            attempts += 1
 
-            return {
-                'success': True,
-                'output_path': final_output_path,
-                'original_lufs': loudness_data.get('input_i', -12.0),
-                'final_lufs': final_lufs
-            }
+        # Peak safety only needed if trim passes ran — they add gain after the limiter —
+        # or if the render's sample-peak limiter let inter-sample peaks past the ceiling.
+        # An unknown peak always gets it: a lost meter summary, segment renders (no
+        # true peak metered) and encoder resamples (see _encoded_stats)
+        if attempts > 0 or final_peak is None or final_peak > preset['true_peak']:
+            self._apply_peak_safety(final_output_path, preset, output_format)
+            # Metered peak predates the safety pass — which guarantees the ceiling instead
+            final_peak = preset['true_peak']
 
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        return {
+            'success': True,
+            'output_path': final_output_path,
+            'original_lufs': loudness_data.get('input_i', -12.0),
+            'final_lufs': final_lufs,
+            'final_peak': round(final_peak, 1)
+        }
 
         
     def _apply_peak_safety(self, audio_path, preset, output_format):
         """
         Final true-peak safety pass — always runs after correction loop.
         attack=1ms catches inter-sample peaks that slower limiters miss.
-        Overwrites the file in place atomically.
+        WAV/AIFF are limited in place (only blocks that need gain reduction
+        are rewritten); other formats overwrite the file atomically via FFmpeg.
         """
+        if output_format in self.PCM_FORMATS and self._apply_peak_safety_in_place(audio_path, preset):
+            return
+
         base_path = os.path.splitext(audio_path)[0]
 
-        if output_format == "wav_24":
-            codec_args = ['-c:a', 'pcm_s24le', '-ar', '44100']
-            ext = '.wav'
-        elif output_format == "wav_16":
-            codec_args = ['-c:a', 'pcm_s16le', '-ar', '44100']
-            ext = '.wav'
-        elif output_format == "aiff":
-            codec_args = ['-c:a', 'pcm_s24be', '-ar', '44100']
-            ext = '.aiff'
-        elif output_format == "flac":
-            codec_args = ['-c:a', 'flac', '-ar', '44100']
-            ext = '.flac'
-        else:
-            codec_args = ['-c:a', 'pcm_s24le', '-ar', '44100']
-            ext = '.wav'
+        # No -ar — the rendered file is already at its output rate
+        codec_args, ext = self._codec_args(output_format)
 
         tmp_path = base_path + '_peak' + ext
         limit_linear = 10 ** (preset['true_peak'] / 20)
@@ -108,34 +593,69 @@ class AudioProcessor:
         cmd = [self.ffmpeg_path, '-i', audio_path, '-af', filter_chain] + codec_args + ['-y', tmp_path]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = self.registry.run(cmd, outputs=[tmp_path], stage='trim', duration=audio_duration(audio_path))
             if result.returncode == 0:
                 os.replace(tmp_path, audio_path)
+        except ProcessCancelled:
+            raise
         except Exception:
             pass  # non-fatal — file already processed, peak safety is best-effort
 
+    def _apply_peak_safety_in_place(self, audio_path, preset):
+        """True-peak (4x oversampled) lookahead limiter over the memory-mapped output"""
+        try:
+            with PCMFile(audio_path) as pcm:
+                limiter = PeakLimiter(
+                    preset['true_peak'], pcm.sample_rate,
+                    attack_ms=1.0, release_ms=50.0, true_peak=True
+                )
+                stats = limiter.process(pcm)
+            if stats['blocks_written']:
+                print(f"Peak safety: {stats['blocks_written']}/{stats['blocks']} blocks limited, "
+                      f"max reduction {stats['max_reduction_db']:.1f}dB")
+            return True
+        except Exception as e:
+            print(f"In-place peak safety unavailable for {os.path.basename(audio_path)}: {e}")
+            return False
 
 
+    def _apply_trim_in_place(self, audio_path, trim_db, preset):
+        """
+        Trim + ceiling on the rendered WAV/AIFF itself — one read-modify-write
+        sweep through a memory map, no temp file and no re-encode.
+        The resulting LUFS is computed from the K-weighted block energies
+        gathered while writing, replacing the separate ebur128 pass.
+        Returns: new integrated LUFS, or None if the file can't be mapped —
+        only while nothing has been written, so the caller's FFmpeg fallback
+        never trims the file a second time. Failures after the first write raise.
+        """
+        pcm = None
+        try:
+            with PCMFile(audio_path) as pcm:
+                limiter = PeakLimiter(preset['true_peak'], pcm.sample_rate)
+                meter = LoudnessMeter(pcm.sample_rate, pcm.channels)
+                limiter.process(pcm, gain_db=trim_db, meter=meter)
+        except Exception as e:
+            if pcm is not None and pcm.modified:
+                raise RuntimeError(f"In-place trim failed part-way: {e}") from e
+            print(f"In-place trim unavailable for {os.path.basename(audio_path)}: {e}")
+            return None
+
+        lufs = meter.integrated()
+        if lufs is None:
+            # Under one 400ms block (or all gated) — the trim is applied, measure it instead
+            lufs = self._measure_final_lufs(audio_path)
+            if lufs is None:
+                raise RuntimeError("Failed to measure output loudness after in-place trim")
+        return round(lufs, 1)
+
     def _apply_trim(self, audio_path, trim_db, preset, output_format):
         """Apply a small gain trim + limiter pass to correct LUFS overshoot/undershoot"""
        
         base_path = os.path.splitext(audio_path)[0]
 
-        if output_format == "wav_24":
-            codec_args = ['-c:a', 'pcm_s24le', '-ar', '44100']
-            ext = '.wav'
-        elif output_format == "wav_16":
-            codec_args = ['-c:a', 'pcm_s16le', '-ar', '44100']
-            ext = '.wav'
-        elif output_format == "aiff":
-            codec_args = ['-c:a', 'pcm_s24be', '-ar', '44100']
-            ext = '.aiff'
-        elif output_format == "flac":
-            codec_args = ['-c:a', 'flac', '-ar', '44100']
-            ext = '.flac'
-        else:
-            codec_args = ['-c:a', 'pcm_s24le', '-ar', '44100']
-            ext = '.wav'
+        # No -ar — the rendered file is already at its output rate
+        codec_args, ext = self._codec_args(output_format)
 
         # Write to a temp file then replace — avoids reading/writing same file
         tmp_path = base_path + '_trim' + ext
@@ -149,13 +669,15 @@ class AudioProcessor:
         cmd = [self.ffmpeg_path, '-i', audio_path, '-af', filter_chain] + codec_args + ['-y', tmp_path]
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            result = self.registry.run(cmd, outputs=[tmp_path], stage='trim', duration=audio_duration(audio_path))
             if result.returncode == 0:
                 os.replace(tmp_path, audio_path)  # atomic replace
                 return True, audio_path
             return False, audio_path
         except subprocess.TimeoutExpired:
             return False, audio_path
+        except ProcessCancelled:
+            raise
         except Exception:
             return False, audio_path
 
@@ -163,6 +685,7 @@ class AudioProcessor:
         """
         Measure integrated LUFS using ebur128 — 3-4x faster than loudnorm.
         loudnorm does a full dynamic analysis pass; ebur128 just measures loudness.
+        Returns: LUFS rounded to 0.1, or None if the measurement failed
         """
         cmd = [
             self.ffmpeg_path, '-i', audio_path,
@@ -170,7 +693,7 @@ class AudioProcessor:
             '-f', 'null', '-'
         ]
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            result = self.registry.run(cmd, stage='verify', duration=audio_duration(audio_path))
             for line in reversed(result.stderr.split('\n')):
                 if 'I:' in line and 'LUFS' in line:
                     parts = line.split()
@@ -179,78 +702,303 @@ class AudioProcessor:
                             return round(float(parts[i + 1]), 1)
         except subprocess.TimeoutExpired:
             print(f"LUFS measurement timed out for: {os.path.basename(audio_path)}")
+        except ProcessCancelled:
+            raise
         except Exception:
             pass
-        return -12.0
+        return None
 
 
-    def _measure_loudness(self, input_path, preset):
-        """Pass 1: measure loudness characteristics for 2-pass normalization"""
-        cmd = [
-            self.ffmpeg_path, '-i', input_path,
-            '-af', f"loudnorm=I={preset['target_lufs']}:TP={preset['true_peak']}:LRA=11:print_format=json",
-            '-f', 'null', '-'
-        ]
+    def _get_loudness_data(self, input_path, preset, analysis=None):
+        """
+        Pass 1 input statistics — reused from the analysis stage when possible.
+        Order: stats on the passed analysis → AnalysisCache (validated by
+        size/mtime) → a fresh loudnorm measurement on a miss.
+        """
+        stats = self._cached_stats(input_path, analysis)
+        if stats is not None:
+            return self._derive_loudness_data(stats, preset)
+
+        return self._measure_loudness(input_path, preset)
+
+    def _cached_stats(self, input_path, analysis=None):
+        """Input stats from the passed analysis, else AnalysisCache — None on a miss"""
+        stats = (analysis or {}).get('loudnorm_stats')
+        if not self._valid_loudnorm_stats(stats):
+            cached = self.analysis_cache.get(input_path)
+            stats = cached.get('loudnorm_stats') if cached else None
+        return stats if self._valid_loudnorm_stats(stats) else None
+
+    def _valid_loudnorm_stats(self, stats):
+        if not stats:
+            return False
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-            data = extract_loudnorm_json(result.stderr)
-
-            if data is None:
-                print(f"No loudnorm JSON found for: {os.path.basename(input_path)}")
-                return None
-
-            # Validate all 5 fields required for 2-pass loudnorm are present and numeric
-            required = ['input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset']
-            for field in required:
-                if field not in data:
-                    print(f"Missing loudnorm field '{field}' for: {os.path.basename(input_path)}")
-                    return None
-                try:
-                    float(data[field])
-                except (ValueError, TypeError):
-                    print(f"Non-numeric loudnorm field '{field}': {data[field]}")
-                    return None
-
-            return data
+            for field in self.LOUDNORM_INPUT_FIELDS:
+                float(stats[field])
+            return True
+        except (KeyError, ValueError, TypeError):
+            return False
 
-        except subprocess.TimeoutExpired:
-            print(f"Loudness measurement timed out for: {os.path.basename(input_path)}")
+    def _derive_loudness_data(self, stats, preset):
+        """
+        Build the pass-2 loudnorm fields from target-independent input stats.
+        target_offset is loudnorm's residual after its own dynamic pass — it
+        can't be known without running it, so it starts at 0.0; the in-graph
+        meter and the correction loop absorb whatever residual remains.
+        """
+        data = {field: str(stats[field]) for field in self.LOUDNORM_INPUT_FIELDS}
+        data['target_offset'] = '0.00'
+        data['output_i'] = f"{preset['target_lufs']:.2f}"
+        data['normalization_type'] = 'dynamic'
+        return data
+
+    def _measure_loudness(self, input_path, preset):
+        """
+        Pass 1 on a cache miss: measure input statistics with the analyzer's
+        backend (ebur128 by default — no 192 kHz resample) and derive the
+        loudnorm-compatible fields for this preset.
+        """
+        data = self.lufs_analyzer.measure_lufs(input_path)
+        if data is None:
+            print(f"Loudness measurement failed for: {os.path.basename(input_path)}")
             return None
-        except Exception:
+
+        stats = data.get('loudnorm_stats')
+        if not self._valid_loudnorm_stats(stats):
+            print(f"Incomplete loudness stats for: {os.path.basename(input_path)}")
             return None
 
-    def _apply_processing(self, input_path, output_path, preset, loudness_data, output_format="wav_24"):
-        """Pass 2: apply hybrid loudnorm pipeline with precision normalization"""
+        return self._derive_loudness_data(stats, preset)
+
+    def _apply_processing(self, input_path, output_path, preset, loudness_data, output_format="wav_24",
+                          source_rate=None, duration=None):
+        """
+        Pass 2: apply hybrid loudnorm pipeline with precision normalization.
+
+        The processed stream is split inside the same filter graph — one leg
+        is encoded, the other feeds ebur128 — so the output's integrated
+        loudness and true peak come back from this invocation instead of a
+        separate decode of the rendered file.
+
+        Returns: (success, output_path, output_stats or None)
+        """
+        sample_rate = self._output_sample_rate(source_rate)
         filter_chain = self._build_filter_chain(preset, loudness_data)
+        filter_graph = self._build_metered_graph(filter_chain)
 
         base_path = os.path.splitext(output_path)[0]
 
-        if output_format == "wav_24":
-            codec_args = ['-c:a', 'pcm_s24le', '-ar', '44100']
-            output_path = base_path + '.wav'
-        elif output_format == "wav_16":
-            codec_args = ['-c:a', 'pcm_s16le', '-ar', '44100']
-            output_path = base_path + '.wav'
+        codec_args, ext = self._codec_args(output_format, sample_rate)
+        output_path = base_path + ext
+
+        cmd = [
+            self.ffmpeg_path, '-i', input_path,
+            '-filter_complex', filter_graph,
+            '-map', '[out]'
+        ] + codec_args + ['-y', output_path]
+
+        try:
+            result = self.registry.run(cmd, outputs=[output_path], stage='render', duration=duration)
+            if result.returncode != 0:
+                return False, output_path, None
+            stats = parse_ebur128_summary(result.stderr)
+            return True, output_path, self._encoded_stats(stats, filter_chain, source_rate, sample_rate)
+        except subprocess.TimeoutExpired:
+            print(f"Processing timed out for: {os.path.basename(input_path)}")
+            return False, output_path, None
+
+    def _apply_processing_segmented(self, input_path, output_path, preset, loudness_data,
+                                    output_format="wav_24", source_rate=None, duration=0.0):
+        """
+        Pass 2 for long inputs — the same chain as _apply_processing, rendered
+        as parallel overlapping segments by SegmentRenderer. Only for chains
+        _use_segments allows (no loudnorm).
+
+        Returns: (success, output_path, output_stats or None)
+        """
+        sample_rate = self._output_sample_rate(source_rate)
+        filter_chain = self._build_filter_chain(preset, loudness_data)
+
+        _, ext = self._codec_args(output_format)
+        output_path = os.path.splitext(output_path)[0] + ext
+
+        renderer = SegmentRenderer(self.ffmpeg_path, self.segment_workers, self.registry)
+        success, stats = renderer.render(input_path, output_path, filter_chain, duration, sample_rate, output_format)
+        return success, output_path, stats
+
+    def _apply_processing_multi(self, input_path, branches, output_format="wav_24", source_rate=None,
+                                duration=None):
+        """
+        Pass 2 for several presets in one FFmpeg run — see _build_fanout_graph.
+        branches — list of (preset, loudness_data, output_path)
+
+        Returns: (success, [(output_path, output_stats or None), ...]) in branch order
+        """
+        sample_rate = self._output_sample_rate(source_rate)
+        chains = [self._build_filters(preset, data) for preset, data, _ in branches]
+        filter_graph = self._build_fanout_graph(chains)
+
+        cmd = [self.ffmpeg_path, '-i', input_path, '-filter_complex', filter_graph]
+        output_paths = []
+        for i, (_, _, output_path) in enumerate(branches):
+            codec_args, ext = self._codec_args(output_format, sample_rate)
+            output_path = os.path.splitext(output_path)[0] + ext
+            output_paths.append(output_path)
+            cmd += ['-map', f'[out{i}]'] + codec_args + ['-y', output_path]
+
+        try:
+            # One decode, but every branch is filtered, metered and encoded
+            result = self.registry.run(
+                cmd, outputs=output_paths, stage='render',
+                duration=duration * len(branches) if duration else None
+            )
+            if result.returncode != 0:
+                return False, [(path, None) for path in output_paths]
+
+            summaries = parse_ebur128_summaries(result.stderr)
+            if len(summaries) != len(branches):
+                summaries = [None] * len(branches)
+            summaries = [
+                self._encoded_stats(stats, ",".join(filters), source_rate, sample_rate)
+                for stats, filters in zip(summaries, chains)
+            ]
+            return True, list(zip(output_paths, summaries))
+        except subprocess.TimeoutExpired:
+            print(f"Processing timed out for: {os.path.basename(input_path)}")
+            return False, [(path, None) for path in output_paths]
+
+    def _encoded_stats(self, stats, filter_chain, source_rate, sample_rate):
+        """
+        In-graph meter summary as it applies to the encoded file. The meter
+        sees the stream before the encoder's -ar (an aresample next to its
+        anullsink branch aborts the graph with ffmpeg 7.0), and a rate
+        conversion can move inter-sample peaks — so whenever the encoder
+        converts (loudnorm's 192 kHz output, or a source at another rate)
+        the true peak is unknown and the file gets the peak safety pass.
+        Integrated loudness is unaffected by the conversion.
+        """
+        if stats and ('loudnorm' in filter_chain or source_rate != sample_rate):
+            return dict(stats, true_peak=None)
+        return stats
+
+    def _codec_args(self, output_format, sample_rate=None):
+        """FFmpeg codec arguments and file extension for an output format"""
+        if output_format == "wav_16":
+            codec_args, ext = ['-c:a', 'pcm_s16le'], '.wav'
         elif output_format == "aiff":
-            codec_args = ['-c:a', 'pcm_s24be', '-ar', '44100']
-            output_path = base_path + '.aiff'
+            codec_args, ext = ['-c:a', 'pcm_s24be'], '.aiff'
         elif output_format == "flac":
-            codec_args = ['-c:a', 'flac', '-ar', '44100']
-            output_path = base_path + '.flac'
+            codec_args, ext = ['-c:a', 'flac'], '.flac'
         else:
-            codec_args = ['-c:a', 'pcm_s24le', '-ar', '44100']
-            output_path = base_path + '.wav'
+            codec_args, ext = ['-c:a', 'pcm_s24le'], '.wav'
 
-        cmd = [self.ffmpeg_path, '-i', input_path, '-af', filter_chain] + codec_args + ['-y', output_path]
+        if sample_rate:
+            codec_args += ['-ar', str(sample_rate)]
+        return codec_args, ext
 
+    def _source_sample_rate(self, input_path, analysis=None):
+        """Source rate from the cached analysis, falling back to the file header"""
+        rate = (analysis or {}).get('sample_rate')
+        if rate:
+            return int(rate)
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            return result.returncode == 0, output_path
-        except subprocess.TimeoutExpired:
-            print(f"Processing timed out for: {os.path.basename(input_path)}")
-            return False, output_path
+            return sf.info(input_path).samplerate
+        except Exception:
+            return None
+
+    def _source_duration(self, input_path, analysis=None):
+        """Duration in seconds from the cached analysis, falling back to the file header"""
+        duration = (analysis or {}).get('duration')
+        if duration:
+            return float(duration)
+        try:
+            return sf.info(input_path).duration
+        except Exception:
+            return 0.0
+
+    def renders_segmented(self, input_path, preset_name, analysis=None, set_gain_db=None):
+        """
+        Whether process_track will render this track as segments — known
+        up front only from cached analysis (False without it).
+        """
+        preset = self.preset_manager.get_preset(preset_name)
+        stats = self._cached_stats(input_path, analysis)
+        if stats is None:
+            return False
+        loudness_data = self._derive_loudness_data(stats, preset)
+        if set_gain_db is not None:
+            loudness_data['set_gain_db'] = set_gain_db
+        return self._use_segments(preset, loudness_data, self._source_duration(input_path, analysis))
+
+    def _use_segments(self, preset, loudness_data, duration):
+        """
+        Long inputs render as segments only when their chain has no loudnorm —
+        its dynamic gain depends on the whole history of the stream and can't
+        be split. Decided by the track and preset alone: segment_workers only
+        sets how many segments render at once, never which path a track takes.
+        """
+        if duration < self.SEGMENT_MIN_DURATION:
+            return False
+        return not any(f.startswith('loudnorm') for f in self._build_filters(preset, loudness_data))
+
+    def _output_sample_rate(self, source_rate):
+        """
+        native mode keeps 44.1/48 kHz sources as they are; hi-res sources go
+        to the base rate of their family (88.2/176.4 → 44.1, 96/192 → 48).
+        """
+        if self.sample_rate_mode != 'native' or not source_rate:
+            return 44100
+        if source_rate in self.NATIVE_RATES:
+            return source_rate
+        return 48000 if source_rate % 48000 == 0 else 44100
+
+    def _native_gain_fits(self, preset, loudness_data):
+        """
+        True when a plain gain to target overshoots the ceiling by no more
+        than the final limiter can absorb transparently.
+        """
+        gain = preset['target_lufs'] - float(loudness_data['input_i'])
+        overshoot = float(loudness_data['input_tp']) + gain - preset['true_peak']
+        return overshoot <= self.NATIVE_LIMITER_HEADROOM_DB
+
+    def _build_metered_graph(self, filter_chain):
+        """
+        Wrap a linear -af chain into a filter_complex graph with an output meter.
+        asplit duplicates the final stream: [out] goes to the encoder,
+        the second leg is measured by ebur128 and discarded by anullsink.
+        """
+        return (
+            f"[0:a]{filter_chain},asplit=2[out][meter];"
+            f"[meter]ebur128=peak=true:framelog=quiet,anullsink"
+        )
+
+    def _build_fanout_graph(self, chains):
+        """
+        One decoded stream feeding several metered preset branches.
+        Filters every chain starts with (pre-limiter, and highpass when the
+        presets agree on it) run once before the split; each branch then
+        applies its own remainder and is metered like _build_metered_graph.
+        """
+        shared = []
+        for filters in zip(*chains):
+            if any(f != filters[0] for f in filters):
+                break
+            shared.append(filters[0])
+
+        labels = "".join(f"[s{i}]" for i in range(len(chains)))
+        graph = [f"[0:a]{','.join(shared + [f'asplit={len(chains)}'])}{labels}"]
+
+        for i, filters in enumerate(chains):
+            branch = ",".join(filters[len(shared):]) or "anull"
+            graph.append(f"[s{i}]{branch},asplit=2[out{i}][meter{i}]")
+            graph.append(f"[meter{i}]ebur128=peak=true:framelog=quiet,anullsink")
+
+        return ";".join(graph)
 
     def _build_filter_chain(self, preset, loudness_data):
+        return ",".join(self._build_filters(preset, loudness_data))
+
+    def _build_filters(self, preset, loudness_data):
         """
         Dual-mode chain — automatically selects processing based on track dynamics.
 
@@ -258,8 +1006,21 @@ class AudioProcessor:
         Mode B (gain+limiter): compressed/clipped tracks with LRA < 6
 
         Chain: pre-limiter (conditional) → highpass → [loudnorm OR gain] → final limiter
+
+        In native sample-rate mode the chain itself never resamples — the
+        encoder's -ar is the only conversion we add, and a no-op for 44.1/48 kHz
+        sources. Dynamic loudnorm still upsamples to 192 kHz internally, so a
+        Mode A track keeps that round trip. Presets with native_static_gain
+        (off by default) trade it away: Mode A tracks whose gain to target
+        fits under the final limiter get a plain gain instead (what
+        loudnorm's linear mode would apply). That changes the sound — no
+        dynamic leveling, up to NATIVE_LIMITER_HEADROOM_DB of peaks limited.
+
+        A set plan's gain (loudness_data['set_gain_db']) replaces step 3 in
+        both modes — the set is leveled as a unit, not each track to target.
         """
         filters = []
+        native = self.sample_rate_mode == 'native'
 
         input_peak_db = float(loudness_data.get('input_tp', -1.0))
         input_lra     = float(loudness_data.get('input_lra', 0.0))
@@ -282,12 +1043,21 @@ class AudioProcessor:
         filters.append(f"highpass=f={preset['highpass_hz']}:poles=1")
 
         # 3. Mode selection based on LRA
-        if input_lra < 6.0:
+        if 'set_gain_db' in loudness_data:
+            set_gain = loudness_data['set_gain_db']
+            if abs(set_gain) > 0.05:
+                filters.append(f"volume={set_gain:.2f}dB")
+        elif input_lra < 6.0:
             # Mode B — compressed/brick-walled track
             # loudnorm pumps trying to expand dynamics that don't exist
             # simple gain correction is cleaner and more transparent
             if abs(safe_gain) > 0.3:
                 filters.append(f"volume={safe_gain}dB")
+        elif (native and preset.get('native_static_gain', False)
+              and self._native_gain_fits(preset, loudness_data)):
+            # Mode A as a static gain — the final limiter catches the overshoot
+            if abs(gain_needed) > 0.3:
+                filters.append(f"volume={gain_needed:.2f}dB")
         else:
             # Mode A — dynamic track, loudnorm operates cleanly
             target_offset = loudness_data.get('target_offset', '0.0')
@@ -313,4 +1083,4 @@ class AudioProcessor:
             f"level=false"
         )
 
-        return ",".join(filters)
+        return filters
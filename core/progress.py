@@ -0,0 +1,112 @@
+"""
+Live progress from FFmpeg's -progress stream.
+
+FFmpeg run with -progress pipe:1 writes key=value lines to stdout, one block
+per update (every half second), each closed by a progress=continue|end line.
+FFmpegProgress turns those lines into (seconds rendered, speed) updates;
+BatchProgress folds the render updates of every track into per-track
+percent, a batch ETA and a throughput in seconds of audio per second.
+"""
+import time
+import threading
+import contextvars
+
+# Reporter of the job running in the current context — set by FFmpegEngine.run_job,
+# read by every FFmpeg call the job makes (segment threads get a copy)
+job_progress = contextvars.ContextVar('job_progress', default=None)
+
+
+class FFmpegProgress:
+    """Incremental parser for one process's -progress stream"""
+
+    def __init__(self, on_update):
+        self.on_update = on_update  # on_update(seconds, speed)
+        self._block = {}
+
+    def feed(self, line):
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return
+        self._block[key] = value
+        if key == 'progress':
+            self._report(self._block)
+            self._block = {}
+
+    def _report(self, block):
+        # out_time_us is the output timestamp; it reads N/A until the first frame
+        try:
+            seconds = int(block.get('out_time_us', 'N/A')) / 1_000_000
+        except ValueError:
+            return
+        try:
+            speed = float(block.get('speed', '0').rstrip('x'))
+        except ValueError:
+            speed = 0.0
+        self.on_update(max(0.0, seconds), speed)
+
+
+class BatchProgress:
+    """
+    Per-track percent, batch ETA and throughput from render progress.
+    Only the 'render' stage counts — trim, verify and encode re-read audio
+    that is already rendered. A track rendered as parallel segments reports
+    from several processes; their positions add up.
+    """
+
+    def __init__(self, durations):
+        self.durations = list(durations)  # seconds per track index; 0 when unknown
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._runs = {}       # track index → {run id: seconds rendered}
+        self._finished = set()
+
+    def reporter(self, index, on_track):
+        """Callable for FFmpegEngine — on_track(index, percent, speed) fires on every render update"""
+        def report(stage, run_id, seconds, speed):
+            if stage != 'render':
+                return
+            with self._lock:
+                self._runs.setdefault(index, {})[run_id] = seconds
+            on_track(index, self.percent(index), speed)
+        return report
+
+    def finish(self, index, completed=True):
+        """Mark a track done — a failed or skipped track only counts what it rendered"""
+        with self._lock:
+            if not completed:
+                self.durations[index] = sum(self._runs.get(index, {}).values())
+            self._finished.add(index)
+
+    def position(self, index):
+        """Seconds of the track rendered so far"""
+        if index in self._finished:
+            return self.durations[index]
+        rendered = sum(self._runs.get(index, {}).values())
+        duration = self.durations[index]
+        return min(rendered, duration) if duration else rendered
+
+    def percent(self, index):
+        """0-100, or -1 when the track's duration is unknown"""
+        duration = self.durations[index]
+        if not duration:
+            return -1.0
+        if index in self._finished:
+            return 100.0
+        # 100 only once the whole track (trim, verify, encode) is done
+        return min(99.9, 100.0 * self.position(index) / duration)
+
+    def throughput(self):
+        """Seconds of audio rendered per wall-clock second since the batch started"""
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            done = sum(self.position(i) for i in range(len(self.durations)))
+        return done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """Seconds until the batch is done at the current throughput, or -1 if not known yet"""
+        rate = self.throughput()
+        if rate <= 0:
+            return -1.0
+        with self._lock:
+            remaining = sum(d - self.position(i) for i, d in enumerate(self.durations))
+        return max(0.0, remaining / rate)
@@ -0,0 +1,40 @@
+from PySide6.QtCore import QObject, Signal
+import itertools
+
+
+class QtEngineAdapter(QObject):
+    """
+    Thin Qt front for FFmpegEngine — submit a blocking pipeline call, get
+    on_done(result) back on the thread this adapter lives in (the GUI).
+    Replaces a QThread per analyzed or auto-processed file.
+    """
+
+    # Emitted from the engine's job thread — Qt queues it to the adapter's thread
+    job_finished = Signal(int, object)
+
+    def __init__(self, engine, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self._callbacks = {}
+        self._ids = itertools.count()
+        self.job_finished.connect(self._deliver)
+
+    def submit(self, fn, *args, on_done=None):
+        """Queue fn(*args) on the engine. on_done receives its result, or None if it raised"""
+        job_id = next(self._ids)
+        self._callbacks[job_id] = on_done
+        future = self.engine.submit_job(fn, *args)
+        future.add_done_callback(lambda f, job_id=job_id: self.job_finished.emit(job_id, f))
+        return future
+
+    def _deliver(self, job_id, future):
+        on_done = self._callbacks.pop(job_id, None)
+        if on_done is None or future.cancelled():
+            return
+
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Engine job failed: {e}")
+            result = None
+        on_done(result)
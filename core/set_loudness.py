@@ -0,0 +1,113 @@
+"""
+Set-level (album / gig) loudness.
+
+Per-track normalization pushes every track to the preset target, so a
+quiet intro and a peak-time banger come out equally loud. A set plan
+levels the whole set as a unit instead: one gain brings the set's overall
+loudness to the target and every track keeps its level relative to the
+others. Planned from the analysis already cached per track (lufs,
+peak_db, lra, duration) — nothing is decoded; rendering is one pass per
+track with that gain into the preset's ceiling limiter. What that limiter
+takes off a hot track comes from the analysis' limiting_loss curve
+(PresetRecommender), looked up at true peak + gain over the ceiling.
+"""
+import math
+
+
+# Limiting a track may take before its gain is pulled back from the set
+# gain. Dense masters (low LRA) hide limiting; dynamic ones show it on
+# every transient.
+MAX_LIMITING_DB = 6.0
+MIN_LIMITING_DB = 1.0
+LIMITING_PER_LRA = 0.25
+
+
+def limiting_allowance(lra):
+    """dB of peak limiting a track with this loudness range takes cleanly"""
+    return max(MIN_LIMITING_DB, MAX_LIMITING_DB - LIMITING_PER_LRA * max(0.0, lra))
+
+
+def limiting_loss(track, gain, ceiling_db):
+    """
+    dB of loudness the limiters take off a track rendered at gain into
+    ceiling_db — its limiting_loss curve (1 dB overshoot steps) interpolated
+    at true peak + gain - ceiling. 0 without a curve.
+    """
+    curve = track.get('limiting_loss')
+    if not curve:
+        return 0.0
+    try:
+        peak = float((track.get('loudnorm_stats') or {})['input_tp'])
+    except (KeyError, ValueError, TypeError):
+        peak = float(track.get('peak_db') or 0.0)
+
+    overshoot = min(max(0.0, peak + gain - ceiling_db), len(curve) - 1)
+    below = int(overshoot)
+    above = min(below + 1, len(curve) - 1)
+    return curve[below] + (curve[above] - curve[below]) * (overshoot - below)
+
+
+def set_loudness(levels, weights):
+    """Integrated loudness of tracks played back to back — the energy mean, weighted by duration"""
+    total = sum(weights)
+    if not total:
+        return None
+    energy = sum(w * 10 ** (lufs / 10) for lufs, w in zip(levels, weights)) / total
+    return 10 * math.log10(energy)
+
+
+def plan_set_gains(tracks, target_lufs, ceiling_db, duplicate_of=None):
+    """
+    Gain per track that levels the set to target_lufs.
+    tracks — analysis dicts as AudioAnalyzer returns them
+    duplicate_of — {index: index of the track with the same audio}; a
+    duplicate gets its twin's gain and is left out of the set's loudness,
+    which counts every recording once
+
+    Every track gets the same gain, except one that would need more
+    limiting than its allowance — its gain stops there, so that track
+    sits lower in the set rather than being crushed. The set then lands
+    under target by what those tracks gave up, and by what the limiter
+    takes off tracks that do use their allowance (see limiting_loss).
+
+    Returns: {'gains': [dB, or None without usable analysis],
+              'set_lufs', 'planned_lufs', 'capped': tracks held back}
+    """
+    duplicate_of = duplicate_of or {}
+    usable = []
+    for index, track in enumerate(tracks):
+        if index in duplicate_of:
+            continue
+        lufs = track.get('lufs')
+        if track.get('status') == 'error' or not isinstance(lufs, (int, float)) or lufs >= 0 or lufs < -70:
+            continue
+        usable.append(index)
+
+    gains = [None] * len(tracks)
+    if not usable:
+        return {'gains': gains, 'set_lufs': None, 'planned_lufs': None, 'capped': 0}
+
+    levels = [float(tracks[i]['lufs']) for i in usable]
+    # Unknown durations count as one — equal weight
+    weights = [float(tracks[i].get('duration') or 0) or 1.0 for i in usable]
+    current = set_loudness(levels, weights)
+    set_gain = target_lufs - current
+
+    capped = 0
+    for index, lufs in zip(usable, levels):
+        track = tracks[index]
+        peak = float(track.get('peak_db') or 0.0)
+        most = ceiling_db + limiting_allowance(float(track.get('lra') or 0.0)) - peak
+        gain = min(set_gain, most)
+        if gain < set_gain:
+            capped += 1
+        gains[index] = round(gain, 2)
+
+    for index, source in duplicate_of.items():
+        gains[index] = gains[source]
+
+    planned = set_loudness(
+        [lufs + gains[i] - limiting_loss(tracks[i], gains[i], ceiling_db) for i, lufs in zip(usable, levels)],
+        weights
+    )
+    return {'gains': gains, 'set_lufs': round(current, 1), 'planned_lufs': round(planned, 1), 'capped': capped}
@@ -0,0 +1,63 @@
+"""
+Duration-aware FFmpeg timeouts.
+
+A fixed timeout is either too short for a three-hour mix or minutes too
+long for a hung process. Here the hard timeout scales with the audio the
+run covers and the slowest realtime speed seen for its stage, so a
+legitimately long job always fits under it. Hangs are FFmpegEngine's stall
+watchdog's job — it kills a process whose -progress output stops advancing
+within seconds, whatever its timeout.
+"""
+import threading
+
+
+class StageTimeouts:
+    """Per-stage realtime-speed estimates → hard timeout for a run over N seconds of audio"""
+
+    # Conservative starting speeds (× realtime) until the stage has been observed —
+    # dynamic loudnorm's 192 kHz render is the slowest path on a slow machine
+    INITIAL_SPEED = {
+        'analysis': 10.0,
+        'render': 2.0,
+        'encode': 5.0,
+        'trim': 5.0,
+        'verify': 10.0,
+    }
+    DEFAULT_SPEED = 2.0
+
+    # Headroom over the assumed speed
+    MARGIN = 4.0
+    # Floor for short files — process start-up and probing dominate there
+    MIN_TIMEOUT = 30.0
+    # Backstop when the duration is unknown (unreadable header, not yet analyzed)
+    UNKNOWN_DURATION_TIMEOUT = 3600.0
+    # Shorter runs are mostly start-up time — their speed says little about the stage
+    MIN_OBSERVED_DURATION = 30.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slowest = {}  # stage → slowest speed observed
+
+    def speed(self, stage):
+        """Realtime speed the timeout assumes for stage"""
+        initial = self.INITIAL_SPEED.get(stage, self.DEFAULT_SPEED)
+        with self._lock:
+            observed = self._slowest.get(stage)
+        # Only ever loosened by what is observed — a fast static-gain render must
+        # not shorten the timeout of a later dynamic loudnorm one
+        return min(initial, observed) if observed is not None else initial
+
+    def timeout(self, stage, duration):
+        """Seconds a run over duration seconds of audio may take"""
+        if not duration or duration <= 0:
+            return self.UNKNOWN_DURATION_TIMEOUT
+        return max(self.MIN_TIMEOUT, self.MARGIN * duration / self.speed(stage))
+
+    def observe(self, stage, duration, elapsed):
+        """Record a successful run — the slowest speed per stage is kept"""
+        if not duration or duration < self.MIN_OBSERVED_DURATION or elapsed <= 0:
+            return
+        speed = duration / elapsed
+        with self._lock:
+            current = self._slowest.get(stage)
+            self._slowest[stage] = speed if current is None else min(current, speed)
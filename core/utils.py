@@ -1,6 +1,80 @@
 import re
 import os
 import json
+import hashlib
+
+
+# Phrases YouTube and other download sources add to titles. Bare "lyrics"
+# is left alone — it is part of real titles and artist names.
+UNWANTED_PHRASES = [
+    r'\(official\s+video\)',
+    r'\(official\s+audio\)',
+    r'\(official\s+music\s+video\)',
+    r'\(music\s+video\)',
+    r'\(lyric\s+video\)',
+    r'\(lyrics\)',
+    r'\(hd\)',
+    r'\(4k\)',
+    r'\(1080p\)',
+    r'\(720p\)',
+    r'\[official\s+video\]',
+    r'\[official\s+audio\]',
+    r'\[official\s+music\s+video\]',
+    r'\[music\s+video\]',
+    r'\[lyric\s+video\]',
+    r'\[lyrics\]',
+    r'\[hd\]',
+    r'\[4k\]',
+    r'\[1080p\]',
+    r'\[720p\]',
+    r'official\s+video',
+    r'official\s+audio',
+    r'official\s+music\s+video',
+    r'music\s+video',
+    r'lyric\s+video',
+    r'\(official\s+visualizer\)',
+    r'\(visualizer\)',
+    r'\[official\s+visualizer\]',
+    r'\[visualizer\]',
+    r'official\s+visualizer',
+    r'\(official\s+clip\)',
+    r'\[official\s+clip\]',
+    r'official\s+clip',
+    r'\(live\)',
+    r'\(live\s+performance\)',
+    r'\(acoustic\)',
+    r'\(acoustic\s+version\)',
+    r'\(studio\s+version\)',
+    r'\(radio\s+edit\)',
+    r'\(extended\s+version\)',
+    r'\(remastered\)',
+    r'\(remastered\s+\d{4}\)',
+    r'\(remix\)',
+    r'\(official\s+remix\)',
+    r'\(cover\)',
+    r'\(karaoke\)',
+    r'\(instrumental\)',
+    r'\(clean\)',
+    r'\(explicit\)',
+    r'\(vevo\)',
+    r'\[vevo\]',
+    r'\(exclusive\)',
+    r'\(premiere\)',
+    r'\(official\s+release\)',
+    r'\(out\s+now\)',
+    r'\(new\)',
+]
+
+# Catch-all for any other bracketed tag — applied after the phrases above,
+# so it can't swallow one of them halfway ("(official (hd) video)")
+UNWANTED_TAG = r'[\(\[]\s*(?:official.*?|lyrics?|hd|4k|live|acoustic|remix|visualizer|audio|video|clean|explicit|remastered.*?)\s*[\)\]]'
+
+# Compiled once — one scan per pass instead of one re.sub per phrase. Every
+# phrase starts with a bracket, "official", "music" or "lyric"; the lookahead
+# lets the scan skip any other position without trying the alternatives.
+_UNWANTED = re.compile(r'(?=[\(\[oml])(?:' + '|'.join(UNWANTED_PHRASES) + ')', re.IGNORECASE)
+_UNWANTED_TAG = re.compile(UNWANTED_TAG, re.IGNORECASE)
+_EDGE_DASHES = re.compile(r'\s*-\s*$|^\s*-\s*')
 
 
 def clean_filename(filename):
@@ -10,74 +84,14 @@ def clean_filename(filename):
     """
     base_name = os.path.splitext(filename)[0]
 
-    unwanted_phrases = [
-        r'\(official\s+video\)',
-        r'\(official\s+audio\)',
-        r'\(official\s+music\s+video\)',
-        r'\(music\s+video\)',
-        r'\(lyric\s+video\)',
-        r'\(lyrics\)',
-        r'\(hd\)',
-        r'\(4k\)',
-        r'\(1080p\)',
-        r'\(720p\)',
-        r'\[official\s+video\]',
-        r'\[official\s+audio\]',
-        r'\[official\s+music\s+video\]',
-        r'\[music\s+video\]',
-        r'\[lyric\s+video\]',
-        r'\[lyrics\]',
-        r'\[hd\]',
-        r'\[4k\]',
-        r'\[1080p\]',
-        r'\[720p\]',
-        r'official\s+video',
-        r'official\s+audio',
-        r'official\s+music\s+video',
-        r'music\s+video',
-        r'lyric\s+video',
-        r'lyrics'
-        r'\(official\s+visualizer\)',
-        r'\(visualizer\)',
-        r'\[official\s+visualizer\]',
-        r'\[visualizer\]',
-        r'official\s+visualizer',
-        r'\(official\s+clip\)',
-        r'\[official\s+clip\]',
-        r'official\s+clip',
-        r'\(live\)',
-        r'\(live\s+performance\)',
-        r'\(acoustic\)',
-        r'\(acoustic\s+version\)',
-        r'\(studio\s+version\)',
-        r'\(radio\s+edit\)',
-        r'\(extended\s+version\)',
-        r'\(remastered\)',
-        r'\(remastered\s+\d{4}\)',
-        r'\(remix\)',
-        r'\(official\s+remix\)',
-        r'\(cover\)',
-        r'\(karaoke\)',
-        r'\(instrumental\)',
-        r'\(clean\)',
-        r'\(explicit\)',
-        r'\(vevo\)',
-        r'\[vevo\]',
-        r'\(exclusive\)',
-        r'\(premiere\)',
-        r'\(official\s+release\)',
-        r'\(out\s+now\)',
-        r'\(new\)',
-        r'[\(\[]\s*(official.*?|lyrics?|hd|4k|live|acoustic|remix|visualizer|audio|video|clean|explicit|remastered.*?)\s*[\)\]]'
-    ]
-
-    cleaned = base_name
-    for phrase in unwanted_phrases:
-        cleaned = re.sub(phrase, '', cleaned, flags=re.IGNORECASE)
-
-    cleaned = re.sub(r'\s+', ' ', cleaned)       # collapse multiple spaces
-    cleaned = re.sub(r'\s*-\s*$', '', cleaned)   # trailing dash
-    cleaned = re.sub(r'^\s*-\s*', '', cleaned)   # leading dash
+    # Removing one phrase can join the words of another ("official (hd) video")
+    cleaned, removed = _UNWANTED.subn('', base_name)
+    while removed:
+        cleaned, removed = _UNWANTED.subn('', cleaned)
+    cleaned = _UNWANTED_TAG.sub('', cleaned)
+
+    cleaned = ' '.join(cleaned.split())         # collapse multiple spaces
+    cleaned = _EDGE_DASHES.sub('', cleaned)      # leading and trailing dash
     cleaned = cleaned.strip()
 
     return cleaned if cleaned else base_name
@@ -88,8 +102,11 @@ def get_output_filename(original_name, output_format, naming_convention):
     Generate output filename using the shared cleaner and naming convention.
     Used by all processors and main_window consistently.
     """
-    clean_name = clean_filename(original_name)
+    return apply_naming_convention(clean_filename(original_name), output_format, naming_convention)
+
 
+def apply_naming_convention(clean_name, output_format, naming_convention):
+    """Output filename for an already cleaned name"""
     ext = (
         ".aiff" if output_format == "aiff" else
         ".flac" if output_format == "flac" else
@@ -158,3 +175,116 @@ def extract_loudnorm_json(ffmpeg_stderr):
         return json.loads(block_text[:end_pos])
     except (json.JSONDecodeError, ValueError):
         return None
+
+
+def parse_ebur128_summary(ffmpeg_stderr):
+    """
+    Parse the Summary block ebur128 prints when the filter graph closes.
+
+    Only the LAST summary is read — a graph may contain several meters,
+    but callers that need more than one meter split the stderr themselves.
+    Values come back as floats; fields missing from the output (e.g. the
+    true peak section when peak=true was not set) are simply absent.
+
+    Returns: dict with integrated, threshold, lra, lra_threshold,
+             true_peak — or None if no summary was found
+    """
+    start = ffmpeg_stderr.rfind('Summary:')
+    if start == -1:
+        return None
+
+    summary = {}
+    section = None
+    for line in ffmpeg_stderr[start:].split('\n'):
+        line = line.strip()
+        if line.startswith('Integrated loudness'):
+            section = 'integrated'
+        elif line.startswith('Loudness range'):
+            section = 'range'
+        elif line.startswith('True peak'):
+            section = 'peak'
+
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        try:
+            value = float(parts[1])
+        except ValueError:
+            continue
+
+        if parts[0] == 'I:':
+            summary['integrated'] = value
+        elif parts[0] == 'Threshold:':
+            key = 'threshold' if section == 'integrated' else 'lra_threshold'
+            summary[key] = value
+        elif parts[0] == 'LRA:':
+            summary['lra'] = value
+        elif parts[0] == 'Peak:' and section == 'peak':
+            summary['true_peak'] = value
+
+    return summary if 'integrated' in summary else None
+
+
+def parse_ebur128_summaries(ffmpeg_stderr):
+    """
+    Parse every ebur128 Summary in a graph with several meters.
+
+    FFmpeg closes filters in no particular order, so summaries are matched
+    to their instance label (Parsed_ebur128_N) and returned in graph order —
+    N grows with each filter's position in the filtergraph string.
+
+    Returns: list of summary dicts (None where a meter's summary is unreadable)
+    """
+    matches = list(re.finditer(r'\[Parsed_ebur128_(\d+) @ [^\]]*\] Summary:', ffmpeg_stderr))
+
+    summaries = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(ffmpeg_stderr)
+        summaries.append((int(match.group(1)), parse_ebur128_summary(ffmpeg_stderr[match.start():end])))
+
+    return [summary for _, summary in sorted(summaries, key=lambda item: item[0])]
+
+
+def file_fingerprint(file_path, chunk_size=65536):
+    """
+    Content fingerprint: sha256 of the size plus the first, middle and last
+    64KB. Reads 192KB at most however large the file is — stable across
+    renames, moves and touches, different for any re-encode or edit.
+    Returns hex digest, or None if the file can't be read.
+    """
+    try:
+        size = os.path.getsize(file_path)
+        h = hashlib.sha256(str(size).encode())
+        with open(file_path, 'rb') as f:
+            for offset in (0, max(0, size // 2 - chunk_size // 2), max(0, size - chunk_size)):
+                f.seek(offset)
+                h.update(f.read(chunk_size))
+        return h.hexdigest()
+    except OSError:
+        return None
+
+
+
+def file_content_hash(file_path, chunk_size=1048576):
+    """
+    sha256 of the whole file — reads every byte, so only worth it where
+    file_fingerprint's sampling isn't enough (confirming a duplicate,
+    an input whose mtime changed).
+    Returns hex digest, or None if the file can't be read.
+    """
+    try:
+        h = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    except OSError:
+        return None
+
+def audio_duration(file_path):
+    """Duration in seconds from the file header, or None if it can't be read"""
+    try:
+        import soundfile as sf
+        return sf.info(file_path).duration
+    except Exception:
+        return None
@@ -1,13 +1,17 @@
 import numpy as np
 import soundfile as sf
 from pathlib import Path
+from .pcm_cache import PCMCache
 
 
 class WaveformGenerator:
     """Generate downsampled waveform data for visualization"""
 
+    BLOCK_FRAMES = 65536
+
     def __init__(self, target_points=2000):
         self.target_points = target_points
+        self.pcm_cache = PCMCache()
 
     def generate(self, audio_path):
         """
@@ -20,21 +24,28 @@ class WaveformGenerator:
             duration, sample_rate, max_peak
         """
         try:
-            audio, sr = sf.read(audio_path, dtype='float32')
-
-            # Stereo → mono: take max absolute value across channels
-            if len(audio.shape) > 1:
-                audio = np.max(np.abs(audio), axis=1)
-            else:
-                audio = np.abs(audio)
-
-            duration = len(audio) / sr
-
-            peaks = self._downsample_peaks(audio, self.target_points)
-            rms = self._downsample_rms(audio, self.target_points)
+            audio_path = self.pcm_cache.resolve(audio_path)
+            info = sf.info(audio_path)
+            sr = info.samplerate
+            total_samples = info.frames
+            samples_per_point = max(1, total_samples // self.target_points)
+
+            buckets = _BucketAccumulator(samples_per_point)
+            clipping = _ClipTracker(sr)
+            max_peak = 0.0
+
+            # Block-streamed — memory stays at one block however long the track is
+            for block in sf.blocks(audio_path, blocksize=self.BLOCK_FRAMES, dtype='float32', always_2d=True):
+                # Stereo → mono: take max absolute value across channels
+                mono = np.max(np.abs(block), axis=1)
+                buckets.add(mono)
+                clipping.add(mono)
+                max_peak = max(max_peak, float(np.max(mono)))
+
+            peaks, rms = buckets.finish()
+            duration = buckets.samples / sr
             energy = self._energy_curve(rms)
-            clipping_zones = self._detect_clipping(audio, sr)
-            max_peak = float(np.max(audio))
+            clipping_zones = clipping.finish()
 
             return {
                 'peaks': peaks,
@@ -50,32 +61,6 @@ class WaveformGenerator:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
-    def _downsample_peaks(self, audio, target_points):
-        """Peak pairs (min, max) per chunk — captures transients"""
-        total_samples = len(audio)
-        samples_per_point = max(1, total_samples // target_points)
-
-        peaks = []
-        for i in range(0, total_samples, samples_per_point):
-            chunk = audio[i:i + samples_per_point]
-            if len(chunk) > 0:
-                peaks.append((float(np.min(chunk)), float(np.max(chunk))))
-
-        return peaks
-
-    def _downsample_rms(self, audio, target_points):
-        """RMS value per chunk — represents perceived loudness per segment"""
-        total_samples = len(audio)
-        samples_per_point = max(1, total_samples // target_points)
-
-        rms = []
-        for i in range(0, total_samples, samples_per_point):
-            chunk = audio[i:i + samples_per_point]
-            if len(chunk) > 0:
-                rms.append(float(np.sqrt(np.mean(chunk ** 2))))
-
-        return rms
-
     def _energy_curve(self, rms, window=20):
         """
         Smooth the RMS curve with a rolling average to produce a macro
@@ -91,23 +76,92 @@ class WaveformGenerator:
         smoothed = np.convolve(rms_array, kernel, mode='same')
         return [float(v) for v in smoothed]
 
-    def _detect_clipping(self, audio, sample_rate, threshold=0.99):
-        """Detect continuous regions where audio clips"""
-        clipping_mask = audio >= threshold
 
-        zones = []
-        in_clip = False
-        start = 0
-
-        for i, is_clip in enumerate(clipping_mask):
-            if is_clip and not in_clip:
-                start = i / sample_rate
-                in_clip = True
-            elif not is_clip and in_clip:
-                zones.append((start, i / sample_rate))
-                in_clip = False
+class _BucketAccumulator:
+    """
+    Per-chunk (min, max) and RMS of a sample stream fed in arbitrary blocks.
+    Chunks are fixed runs of samples_per_point samples; a chunk split across
+    two blocks is carried over, the last chunk may be short.
+    """
+
+    def __init__(self, samples_per_point):
+        self.samples_per_point = samples_per_point
+        self.samples = 0
+        self.peaks = []
+        self.rms = []
+        self._open = None  # (min, max, sum of squares, count) of the unfinished chunk
+
+    def add(self, audio):
+        start = self.samples
+        self.samples += len(audio)
+        if len(audio) == 0:
+            return
+
+        # Offsets inside this block where a new chunk begins
+        first = (-start) % self.samples_per_point
+        edges = np.arange(first, len(audio), self.samples_per_point)
+        if len(edges) == 0 or edges[0] != 0:
+            edges = np.concatenate([[0], edges])
+
+        squares = audio.astype(np.float64) ** 2
+        mins = np.minimum.reduceat(audio, edges)
+        maxs = np.maximum.reduceat(audio, edges)
+        sums = np.add.reduceat(squares, edges)
+        counts = np.diff(np.append(edges, len(audio)))
+
+        # Merge the carried chunk into the first piece unless a chunk boundary falls at 0
+        if self._open is not None:
+            if first == 0:
+                self._close(self._open)
+            else:
+                o_min, o_max, o_sum, o_count = self._open
+                mins[0] = min(o_min, mins[0])
+                maxs[0] = max(o_max, maxs[0])
+                sums[0] += o_sum
+                counts[0] += o_count
+
+        for piece in zip(mins[:-1], maxs[:-1], sums[:-1], counts[:-1]):
+            self._close(piece)
+        self._open = (mins[-1], maxs[-1], sums[-1], counts[-1])
+
+    def _close(self, piece):
+        chunk_min, chunk_max, chunk_sum, count = piece
+        self.peaks.append((float(chunk_min), float(chunk_max)))
+        self.rms.append(float(np.sqrt(chunk_sum / count)))
+
+    def finish(self):
+        if self._open is not None:
+            self._close(self._open)
+            self._open = None
+        return self.peaks, self.rms
+
+
+class _ClipTracker:
+    """Continuous regions at or above threshold, tracked across blocks"""
+
+    def __init__(self, sample_rate, threshold=0.99):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.samples = 0
+        self.zones = []
+        self._clip_start = None  # sample index of a region still open at the block edge
+
+    def add(self, audio):
+        mask = (audio >= self.threshold).astype(np.int8)
+        was_clipping = 1 if self._clip_start is not None else 0
+        changes = np.diff(np.concatenate([[was_clipping], mask]))
+
+        for i in np.flatnonzero(changes).tolist():
+            if changes[i] > 0:
+                self._clip_start = self.samples + i
+            else:
+                self.zones.append((self._clip_start / self.sample_rate, (self.samples + i) / self.sample_rate))
+                self._clip_start = None
 
-        if in_clip:
-            zones.append((start, len(audio) / sample_rate))
+        self.samples += len(audio)
 
-        return zones
+    def finish(self):
+        if self._clip_start is not None:
+            self.zones.append((self._clip_start / self.sample_rate, self.samples / self.sample_rate))
+            self._clip_start = None
+        return self.zones
@@ -0,0 +1,22 @@
+"""AnalysisCache entries are only reused by the version that wrote them"""
+import json
+
+from core.analysis_cache import AnalysisCache
+
+
+def test_entry_without_version_is_a_miss(tmp_path):
+    source = tmp_path / 'track.wav'
+    source.write_bytes(b'\0' * 64)
+    cache = AnalysisCache(tmp_path / 'cache')
+
+    cache.set(str(source), {'lufs': -9.0})
+    assert cache.get(str(source)) == {'lufs': -9.0}
+
+    # An entry from before the version key — no energy, no preset predictions
+    entry = next((tmp_path / 'cache').glob('*.json'))
+    data = json.loads(entry.read_text())
+    del data['_meta']['version']
+    entry.write_text(json.dumps(data))
+
+    assert cache.get(str(source)) is None
+    assert not entry.exists()
@@ -0,0 +1,95 @@
+"""Leftover cleanup of an interrupted batch — only what that run could have written goes"""
+import os
+
+from core.batch_journal import BatchJournal
+from core.processor import AudioProcessor
+
+
+def _touch(folder, name):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 16)
+    return path
+
+
+def _interrupted_run(folder, output_format):
+    """Journal of a run that started one track and never finished it"""
+    output_path = os.path.join(folder, 'x - DJ OPT.wav')
+    paths, base_path = AudioProcessor().render_files(output_path, output_format)
+    journal = BatchJournal(folder)
+    journal.open({'output_format': output_format})
+    journal.started(0, '/music/x.mp3', [output_path], {'files': paths, 'segment_bases': [base_path]})
+    journal.close()
+    return output_path
+
+
+def test_interrupted_wav_run_keeps_earlier_flac_output(tmp_path):
+    folder = str(tmp_path)
+    # Finished output of an earlier, completed FLAC batch in the same folder
+    flac = _touch(folder, 'x - DJ OPT.flac')
+    other = _touch(folder, 'x - DJ OPT_seg0 (1).wav')
+
+    output_path = _interrupted_run(folder, 'wav_24')
+    leftovers = [
+        _touch(folder, 'x - DJ OPT.wav'),
+        _touch(folder, 'x - DJ OPT_trim.wav'),
+        _touch(folder, 'x - DJ OPT_peak.wav'),
+        _touch(folder, 'x - DJ OPT_seg0.wav'),
+        _touch(folder, 'x - DJ OPT_seg12.wav'),
+    ]
+
+    BatchJournal(folder).open({'output_format': 'wav_24'})
+
+    assert os.path.exists(flac)
+    assert os.path.exists(other)
+    assert not any(os.path.exists(path) for path in leftovers)
+    assert not os.path.exists(output_path)
+
+
+def test_multi_format_run_cleans_its_master_and_formats(tmp_path):
+    folder = str(tmp_path)
+    aiff = _touch(folder, 'x - DJ OPT.aiff')
+
+    _interrupted_run(folder, ['flac', 'wav_16'])
+    leftovers = [
+        _touch(folder, 'x - DJ OPT.flac'),
+        _touch(folder, 'x - DJ OPT.wav'),
+        _touch(folder, 'x - DJ OPT_master.wav'),
+        _touch(folder, 'x - DJ OPT_master_trim.wav'),
+        _touch(folder, 'x - DJ OPT_master_seg3.wav'),
+    ]
+
+    BatchJournal(folder).open({'output_format': ['flac', 'wav_16']})
+
+    assert os.path.exists(aiff)
+    assert not any(os.path.exists(path) for path in leftovers)
+
+
+def _finished_run(folder, input_path):
+    """Journal of a run that finished one track and was then interrupted"""
+    output_path = _touch(folder, 'x - DJ OPT.wav')
+    journal = BatchJournal(folder)
+    journal.open({'output_format': 'wav_24'})
+    journal.finished(0, input_path, [output_path], [output_path], -8.0, -1.0)
+    journal.close()
+    return output_path
+
+
+def test_resume_trusts_only_untouched_files(tmp_path):
+    folder = str(tmp_path)
+    input_path = str(tmp_path / 'x.wav')
+    with open(input_path, 'wb') as f:
+        f.write(bytes(range(256)) * 4096)
+    _finished_run(folder, input_path)
+    journal = BatchJournal(folder)
+    planned = [[os.path.join(folder, 'x - DJ OPT.wav')]]
+
+    assert journal.finished_tracks({'output_format': 'wav_24'}, [input_path], planned) == {0: (-8.0, -1.0)}
+
+    # Same size, edited where file_fingerprint doesn't sample
+    with open(input_path, 'r+b') as f:
+        f.seek(200000)
+        f.write(b'\xff' * 64)
+    stat = os.stat(input_path)
+    os.utime(input_path, (stat.st_atime, stat.st_mtime + 60))
+    assert journal.finished_tracks({'output_format': 'wav_24'}, [input_path], planned) == {}
@@ -0,0 +1,47 @@
+"""Rendering over a duplicate's linked outputs must never write into its twin's files"""
+import os
+import shutil
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from core.processor import AudioProcessor
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="needs ffmpeg")
+
+RATE = 44100
+PRESETS = ('club_festival', 'bar_lounge')
+
+
+def _write_tone(path, freq, amplitude):
+    t = np.arange(RATE * 5) / RATE
+    tone = amplitude * np.sin(2 * np.pi * freq * t)
+    sf.write(path, np.stack([tone, tone], axis=1), RATE, subtype='PCM_24')
+
+
+def test_multi_preset_render_releases_linked_outputs(tmp_path):
+    processor = AudioProcessor()
+    processor.compliant_fast_path = False
+    source = str(tmp_path / 'b.wav')
+    _write_tone(source, 220, 0.3)
+
+    twin_outputs, output_paths = {}, {}
+    for name in PRESETS:
+        folder = tmp_path / name
+        folder.mkdir()
+        # The twin's rendered file, linked under the duplicate's name
+        twin = str(folder / 'a.wav')
+        _write_tone(twin, 880, 0.1)
+        twin_outputs[name] = (twin, sf.read(twin)[0])
+        output_paths[name] = str(folder / 'b.wav')
+        processor.link_outputs(twin, output_paths[name], 'wav_24')
+        assert os.path.samefile(twin, output_paths[name])
+
+    results = processor.process_track_multi(source, list(PRESETS), output_paths, 'wav_24')
+
+    for name in PRESETS:
+        assert results[name]['success'], results[name]
+        twin, original = twin_outputs[name]
+        assert not os.path.samefile(twin, output_paths[name])
+        assert np.array_equal(sf.read(twin)[0], original)
@@ -0,0 +1,47 @@
+"""Output manifest — an input edited in place is never taken for the one rendered"""
+import os
+
+import pytest
+
+from core.output_manifest import OutputManifest
+
+SETTINGS = {'preset': 'abc', 'output_format': 'wav_24'}
+
+
+@pytest.fixture
+def rendered(tmp_path):
+    """(manifest, input path) with one output recorded from a 1 MB input"""
+    input_path = str(tmp_path / 'track.wav')
+    with open(input_path, 'wb') as f:
+        f.write(bytes(range(256)) * 4096)
+    output_path = str(tmp_path / 'track - DJ OPT.wav')
+    with open(output_path, 'wb') as f:
+        f.write(b'rendered')
+
+    manifest = OutputManifest(str(tmp_path))
+    manifest.record('track - DJ OPT.wav', input_path, SETTINGS, [output_path], -8.0, -1.0)
+    return manifest, input_path
+
+
+def test_unchanged_input_is_current(rendered):
+    manifest, input_path = rendered
+    assert manifest.current('track - DJ OPT.wav', input_path, SETTINGS) == (-8.0, -1.0)
+
+
+def test_touched_input_with_same_content_is_current(rendered):
+    manifest, input_path = rendered
+    stat = os.stat(input_path)
+    os.utime(input_path, (stat.st_atime, stat.st_mtime + 60))
+    assert manifest.current('track - DJ OPT.wav', input_path, SETTINGS) == (-8.0, -1.0)
+
+
+def test_same_size_edit_outside_the_sampled_chunks_is_stale(rendered):
+    manifest, input_path = rendered
+    stat = os.stat(input_path)
+    # Between file_fingerprint's first and middle 64KB — the sampled fingerprint can't see it
+    with open(input_path, 'r+b') as f:
+        f.seek(200000)
+        f.write(b'\xff' * 64)
+    os.utime(input_path, (stat.st_atime, stat.st_mtime + 60))
+    assert os.path.getsize(input_path) == stat.st_size
+    assert manifest.current('track - DJ OPT.wav', input_path, SETTINGS) is None
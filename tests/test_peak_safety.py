@@ -0,0 +1,43 @@
+"""Peak safety — a true peak the render didn't measure on the written file is never assumed"""
+import pytest
+
+from core.processor import AudioProcessor
+
+PRESET = {'target_lufs': -14.0, 'true_peak': -1.0}
+STATS = {'integrated': -14.0, 'true_peak': -3.0}
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    proc = AudioProcessor()
+    proc.safety_passes = []
+    monkeypatch.setattr(proc, '_apply_peak_safety', lambda path, preset, fmt: proc.safety_passes.append(path))
+    monkeypatch.setattr(proc, '_measure_final_lufs', lambda path: -14.0)
+    return proc
+
+
+def test_metered_peak_under_the_ceiling_skips_the_pass(processor):
+    result = processor._finish_output('out.wav', PRESET, {}, 'wav_24', STATS)
+    assert result['success']
+    assert processor.safety_passes == []
+    assert result['final_peak'] == -3.0
+
+
+def test_lost_meter_summary_runs_the_pass(processor):
+    result = processor._finish_output('out.wav', PRESET, {}, 'wav_24', None)
+    assert result['success']
+    assert processor.safety_passes == ['out.wav']
+
+
+@pytest.mark.parametrize('chain, source_rate, sample_rate, known', [
+    ('highpass=f=30,alimiter=limit=0.9', 44100, 44100, True),
+    ('highpass=f=30,alimiter=limit=0.9', 48000, 44100, False),
+    ('highpass=f=30,loudnorm=I=-14,alimiter=limit=0.9', 44100, 44100, False),
+    ('highpass=f=30,alimiter=limit=0.9', None, 44100, False),
+])
+def test_encoder_resample_makes_the_peak_unknown(processor, chain, source_rate, sample_rate, known):
+    stats = processor._encoded_stats(STATS, chain, source_rate, sample_rate)
+    assert stats['integrated'] == STATS['integrated']
+    assert (stats['true_peak'] is not None) == known
+    processor._finish_output('out.wav', PRESET, {}, 'wav_24', stats)
+    assert bool(processor.safety_passes) != known
@@ -0,0 +1,116 @@
+"""A segmented render must match the serial render of the same chain — and only segment-safe chains segment"""
+import shutil
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from core.processor import AudioProcessor
+from core.segment_renderer import SegmentRenderer
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="needs ffmpeg")
+
+RATE = 44100
+SECONDS = 95
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Dense stereo programme with bursts hot enough to keep the limiters busy"""
+    rng = np.random.default_rng(7)
+    t = np.arange(RATE * SECONDS) / RATE
+    tone = 0.2 * np.sin(2 * np.pi * 55 * t) + 0.05 * rng.standard_normal(len(t))
+    bursts = 1.0 + 0.8 * (np.sin(2 * np.pi * 0.37 * t) > 0.95)
+    audio = np.stack([tone * bursts, np.roll(tone, 441) * bursts], axis=1)
+    path = str(tmp_path / 'source.wav')
+    sf.write(path, np.clip(audio, -0.99, 0.99), RATE, subtype='PCM_24')
+    return path
+
+
+MODE_B = {'input_i': '-16.0', 'input_tp': '-0.5', 'input_lra': '2.0', 'input_thresh': '-26.0'}
+MODE_A = {'input_i': '-16.0', 'input_tp': '-0.5', 'input_lra': '8.0', 'input_thresh': '-26.0'}
+# Mode A with a gain to target the final limiter absorbs (_native_gain_fits)
+MODE_A_FITS = {'input_i': '-10.0', 'input_tp': '-4.0', 'input_lra': '8.0', 'input_thresh': '-20.0'}
+
+
+def _assert_matches(serial_path, segmented_path):
+    serial, _ = sf.read(serial_path)
+    segmented, _ = sf.read(segmented_path)
+    assert serial.shape == segmented.shape
+    # Within a couple of 24-bit LSBs per sample, and the same peak
+    assert np.max(np.abs(serial - segmented)) < 1e-6
+    assert np.max(np.abs(segmented)) == pytest.approx(np.max(np.abs(serial)), abs=1e-6)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(SegmentRenderer, 'SEGMENT_SECONDS', 30)
+    monkeypatch.setattr(AudioProcessor, 'SEGMENT_MIN_DURATION', 60)
+    processor = AudioProcessor()
+    processor.compliant_fast_path = False
+    processor.segment_workers = 3
+    return processor
+
+
+def test_segmented_render_matches_serial(tmp_path, source, processor):
+    preset = processor.preset_manager.get_preset('club_festival')
+    # LRA < 6 — gain + limiter, no loudnorm
+    loudness_data = MODE_B
+    assert processor._use_segments(preset, loudness_data, SECONDS)
+
+    ok, serial_path, serial_stats = processor._apply_processing(
+        source, str(tmp_path / 'serial.wav'), preset, loudness_data, 'wav_24', RATE, SECONDS
+    )
+    assert ok
+    ok, segmented_path, segmented_stats = processor._apply_processing_segmented(
+        source, str(tmp_path / 'segmented.wav'), preset, loudness_data, 'wav_24', RATE, SECONDS
+    )
+    assert ok
+    assert len(SegmentRenderer(processor.ffmpeg_path, 3, None).plan(SECONDS)) == 3
+
+    _assert_matches(serial_path, segmented_path)
+    assert segmented_stats['integrated'] == pytest.approx(serial_stats['integrated'], abs=0.01)
+
+
+def test_segment_plan_ignores_worker_count():
+    plans = [SegmentRenderer('ffmpeg', workers, None).plan(3600) for workers in (1, 2, 8)]
+    assert plans[0] == plans[1] == plans[2]
+
+
+def test_native_static_gain_mode_a_matches_serial(tmp_path, source, processor):
+    processor.sample_rate_mode = 'native'
+    preset = dict(processor.preset_manager.get_preset('club_festival'), native_static_gain=True)
+    assert processor._use_segments(preset, MODE_A_FITS, SECONDS)
+    # Without the opt-in — or when the gain doesn't fit — Mode A is loudnorm, never segmented
+    assert not processor._use_segments(dict(preset, native_static_gain=False), MODE_A_FITS, SECONDS)
+    assert not processor._use_segments(preset, MODE_A, SECONDS)
+
+    ok, serial_path, _ = processor._apply_processing(
+        source, str(tmp_path / 'serial.wav'), preset, MODE_A_FITS, 'wav_24', RATE, SECONDS
+    )
+    assert ok
+    ok, segmented_path, _ = processor._apply_processing_segmented(
+        source, str(tmp_path / 'segmented.wav'), preset, MODE_A_FITS, 'wav_24', RATE, SECONDS
+    )
+    assert ok
+    _assert_matches(serial_path, segmented_path)
+
+
+def test_mode_a_renders_serially_whatever_the_workers(tmp_path, source, processor, monkeypatch):
+    # LRA >= 6 — loudnorm, which can't be split: the same serial render on any worker count
+    analysis = {'loudnorm_stats': MODE_A, 'duration': SECONDS, 'sample_rate': RATE}
+    assert not processor.renders_segmented(source, 'club_festival', analysis=analysis)
+
+    def no_segments(*args, **kwargs):
+        raise AssertionError("loudnorm chain was segmented")
+
+    monkeypatch.setattr(processor, '_apply_processing_segmented', no_segments)
+    outputs = []
+    for workers in (1, 3):
+        processor.segment_workers = workers
+        result = processor.process_track(
+            source, 'club_festival', str(tmp_path / f'out_{workers}.wav'), 'wav_24', analysis=analysis
+        )
+        assert result['success'], result
+        outputs.append(sf.read(result['output_path'])[0])
+    assert np.array_equal(outputs[0], outputs[1])
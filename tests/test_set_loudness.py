@@ -0,0 +1,41 @@
+"""Set plans — limiter loss and duplicate inputs"""
+import pytest
+
+from core.set_loudness import limiting_loss, plan_set_gains
+
+
+def _track(lufs, peak, duration=180.0, lra=8.0, loss=None):
+    track = {'lufs': lufs, 'peak_db': peak, 'lra': lra, 'duration': duration,
+             'loudnorm_stats': {'input_i': lufs, 'input_tp': peak}}
+    if loss is not None:
+        track['limiting_loss'] = loss
+    return track
+
+
+def test_limiting_loss_interpolates_the_curve():
+    track = _track(-12.0, -3.0, loss=[0.0, 0.5, 1.5])
+    # true peak -3 + gain 4.5 over a -1 ceiling → 2.5 dB overshoot, past the curve's end
+    assert limiting_loss(track, 4.5, -1.0) == pytest.approx(1.5)
+    assert limiting_loss(track, 2.5, -1.0) == pytest.approx(0.25)
+    assert limiting_loss(track, 0.0, -1.0) == 0.0
+    assert limiting_loss(_track(-12.0, -3.0), 4.5, -1.0) == 0.0
+
+
+def test_planned_lufs_accounts_for_limiting():
+    quiet = _track(-14.0, -10.0, loss=[0.0] * 13)
+    hot = _track(-14.0, -2.0, loss=[0.0, 0.5, 1.0, 2.0, 3.0] + [4.0] * 8)
+
+    plan = plan_set_gains([quiet, hot], -10.0, -1.0)
+    assert plan['gains'] == [4.0, 4.0]
+    # The hot track's peak lands 3 dB over the ceiling — it loses 2 dB there
+    assert plan['planned_lufs'] == pytest.approx(-10.9, abs=0.1)
+
+
+def test_duplicates_count_once():
+    tracks = [_track(-20.0, -10.0), _track(-10.0, -10.0), _track(-10.0, -10.0)]
+
+    linked = plan_set_gains(tracks, -14.0, -1.0, duplicate_of={2: 1})
+    once = plan_set_gains(tracks[:2], -14.0, -1.0)
+
+    assert linked['set_lufs'] == once['set_lufs']
+    assert linked['gains'] == once['gains'] + [once['gains'][1]]
@@ -0,0 +1,72 @@
+"""In-place LUFS trim — the FFmpeg fallback must never trim a file twice"""
+import numpy as np
+import pytest
+import soundfile as sf
+
+import core.processor as processor_module
+from core.loudness_meter import LoudnessMeter
+from core.processor import AudioProcessor
+
+RATE = 44100
+PRESET = {'target_lufs': -14.0, 'true_peak': -1.0}
+
+
+def _write_tone(path, seconds, amplitude=0.05):
+    t = np.arange(int(RATE * seconds)) / RATE
+    sf.write(path, np.sin(2 * np.pi * 440 * t) * amplitude, RATE, subtype='FLOAT')
+    return sf.read(path)[0]
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    proc = AudioProcessor()
+    calls = []
+
+    def fake_apply_trim(audio_path, trim_db, preset, output_format):
+        calls.append(trim_db)
+        return True, audio_path
+
+    monkeypatch.setattr(proc, '_apply_trim', fake_apply_trim)
+    proc.ffmpeg_trims = calls
+    return proc
+
+
+def test_failure_after_write_raises_and_skips_ffmpeg(tmp_path, processor, monkeypatch):
+    path = str(tmp_path / 'out.wav')
+    original = _write_tone(path, 3.0)
+
+    class FailingMeter(LoudnessMeter):
+        def feed(self, block):
+            raise OSError("disk went away")
+
+    monkeypatch.setattr(processor_module, 'LoudnessMeter', FailingMeter)
+
+    # process_track turns the exception into a failed result
+    with pytest.raises(RuntimeError):
+        processor._finish_output(path, PRESET, {}, 'wav_24', {'integrated': -20.0, 'true_peak': -8.0})
+    assert processor.ffmpeg_trims == []
+
+    # The first block was trimmed once — the fallback never ran on top of it
+    written = sf.read(path)[0]
+    block = slice(0, 65536)
+    assert np.allclose(written[block], original[block] * 10 ** (6 / 20), atol=1e-6)
+
+
+def test_short_file_is_measured_not_retrimmed(tmp_path, processor, monkeypatch):
+    path = str(tmp_path / 'short.wav')
+    original = _write_tone(path, 0.2)
+    monkeypatch.setattr(processor, '_measure_final_lufs', lambda audio_path: -14.2)
+
+    assert processor._apply_trim_in_place(path, 6.0, PRESET) == -14.2
+    assert processor.ffmpeg_trims == []
+    assert np.allclose(sf.read(path)[0], original * 10 ** (6 / 20), atol=1e-6)
+
+
+def test_unmappable_file_falls_back_untouched(tmp_path, processor):
+    path = str(tmp_path / 'out.flac')
+    t = np.arange(RATE) / RATE
+    sf.write(path, np.sin(2 * np.pi * 440 * t) * 0.05, RATE, subtype='PCM_24')
+    before = open(path, 'rb').read()
+
+    assert processor._apply_trim_in_place(path, 6.0, PRESET) is None
+    assert open(path, 'rb').read() == before
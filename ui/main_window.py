@@ -3,27 +3,35 @@ from core.folder_watcher import FolderWatcher
 from core.parallel_processor import ParallelProcessor
 from .panels import LeftPanel, CenterPanel, RightPanel
 from .preset_manager_dialog import PresetManagerDialog
-from PySide6.QtWidgets import QMainWindow, QHBoxLayout, QWidget, QFileDialog
-from PySide6.QtCore import Qt, QThread
+from PySide6.QtWidgets import QMainWindow, QHBoxLayout, QWidget, QFileDialog, QMessageBox
+from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor
 from core.analyzer import AudioAnalyzer
 from core.presets import PresetManager
 from core.processor import AudioProcessor
+from core.engine import FFmpegEngine
+from core.qt_engine import QtEngineAdapter
 import os
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.analyzer = AudioAnalyzer()
+        # One engine for the whole app — analysis, auto-processing, batches and
+        # previews share its CPU budget. A queued file costs no thread.
+        self.engine = FFmpegEngine()
+        self.analyzer = AudioAnalyzer(registry=self.engine)
         self.preset_manager = PresetManager()
         self.processor = AudioProcessor()
+        self.processor.registry = self.engine
+        self.processor.lufs_analyzer.registry = self.engine
+        self.jobs = QtEngineAdapter(self.engine, self)
         self.tracks = []
         self.output_folder = os.path.expanduser("~/Desktop")
 
-        # Thread lists — properly cleaned up on finish
-        self._analyzer_threads = []
-        self._auto_process_threads = []
+        # Rows of the running batch currently in FFmpeg, and the latest batch ETA line
+        self._processing_rows = set()
+        self._batch_status = ""
 
         # Initialize folder watching
         self.watch_config = WatchConfig()
@@ -33,7 +41,7 @@ class MainWindow(QMainWindow):
         self.setup_dark_theme()
 
         # Parallel processor
-        self.parallel_processor = ParallelProcessor()
+        self.parallel_processor = ParallelProcessor(engine=self.engine)
         self._connect_processor_signals(self.parallel_processor)
         self.bg_processor = self.parallel_processor
 
@@ -46,6 +54,8 @@ class MainWindow(QMainWindow):
         processor.track_completed.connect(self.on_track_completed)
         processor.progress_updated.connect(self.on_progress_updated)
         processor.all_completed.connect(self.on_all_completed)
+        processor.track_progress.connect(self.on_track_progress)
+        processor.batch_progress.connect(self.on_batch_progress)
 
     def setup_ui(self):
         self.setWindowTitle("DeckReady - Professional DJ Audio Optimizer")
@@ -76,6 +86,7 @@ class MainWindow(QMainWindow):
         self.left_panel.output_folder_changed.connect(self.on_output_folder_changed)
         self.left_panel.process_clicked.connect(self.process_tracks)
         self.left_panel.cancel_clicked.connect(self.cancel_processing)
+        self.left_panel.pause_toggled.connect(self.toggle_pause)
         self.left_panel.preset_manager_requested.connect(self.open_preset_manager)
 
         self.center_panel.files_dropped.connect(self.handle_dropped_files)
@@ -111,12 +122,22 @@ class MainWindow(QMainWindow):
 
     def open_preset_manager(self):
         """Open preset manager dialog"""
-        dialog = PresetManagerDialog(self.preset_manager, self)
+        dialog = PresetManagerDialog(self.preset_manager, self, preview_track=self._preview_track(),
+                                     engine=self.engine)
         if dialog.exec():
             self.preset_manager.load_presets()
             self.left_panel.refresh_presets()
             self.on_preset_changed(self.left_panel.get_selected_preset_key())
 
+    def _preview_track(self):
+        """Analyzed track the preset editor previews — the selected one, else the first"""
+        analyzed = [track for track in self.tracks if track.get('loudnorm_stats')]
+        selected = self.center_panel.track_table.selected_track_path()
+        for track in analyzed:
+            if track['path'] == selected:
+                return track
+        return analyzed[0] if analyzed else None
+
     def add_tracks(self):
         """Add tracks via file dialog"""
         files, _ = QFileDialog.getOpenFileNames(
@@ -143,7 +164,12 @@ class MainWindow(QMainWindow):
             if preset:
                 target_lufs = preset['target_lufs']
 
+        # The same file dropped again is already in the list
+        listed = {os.path.realpath(track['path']) for track in self.tracks}
         for file_path in file_paths:
+            if os.path.realpath(file_path) in listed:
+                continue
+            listed.add(os.path.realpath(file_path))
             self._add_track_async(file_path, target_lufs)
 
     def clear_tracks(self):
@@ -160,16 +186,19 @@ class MainWindow(QMainWindow):
             return
 
         # Stop any existing processor before creating a new one
-        if self.parallel_processor.isRunning():
+        if self.parallel_processor.is_running():
             self.parallel_processor.stop_processing()
             self.parallel_processor.wait()
+        self.parallel_processor.shutdown()
 
         max_workers = self.left_panel.get_cpu_cores()
         current_preset_key = self.left_panel.get_selected_preset_key()
         output_format = self.left_panel.get_output_format()
         naming_convention = self.left_panel.get_naming_convention()
+        sample_rate_mode = self.left_panel.get_sample_rate_mode()
+        leveling = self.left_panel.get_leveling_mode()
 
-        self.parallel_processor = ParallelProcessor(max_workers=max_workers)
+        self.parallel_processor = ParallelProcessor(max_workers=max_workers, engine=self.engine)
         self._connect_processor_signals(self.parallel_processor)
         self.bg_processor = self.parallel_processor
 
@@ -178,11 +207,27 @@ class MainWindow(QMainWindow):
             current_preset_key,
             output_format,
             self.output_folder,
-            naming_convention
+            naming_convention,
+            sample_rate_mode,
+            leveling
         )
 
+        # An interrupted run of this batch left finished outputs behind
+        resumable = len(self.parallel_processor.resumable)
+        if resumable:
+            reply = QMessageBox.question(
+                self, "Resume Batch",
+                f"A previous run into this folder was interrupted with {resumable} of "
+                f"{len(self.tracks)} tracks finished.\n\nResume and only process the rest?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                self.parallel_processor.resume()
+
+        self._processing_rows = set()
+        self._batch_status = ""
         self.left_panel.update_progress(
-            f"Processing with {max_workers} cores...",
+            f"Processing with {self.parallel_processor.max_workers} cores...",
             value=0,
             maximum=len(self.tracks)
         )
@@ -195,21 +240,50 @@ class MainWindow(QMainWindow):
         self.bg_processor.stop_processing()
         self.left_panel.update_progress("Cancelling...")
 
+    def toggle_pause(self, paused):
+        """Pause or resume the running batch"""
+        if paused:
+            self.bg_processor.pause_processing()
+            self.left_panel.update_progress("⏸ Paused")
+        else:
+            self.bg_processor.resume_processing()
+            self.left_panel.update_progress("Resuming...")
+
     def on_track_started(self, index, name):
         """Handle track processing started"""
         self.center_panel.track_table.update_track_status(index, 'processing')
-        short_name = name[:20] + "..." if len(name) > 20 else name
+        self._processing_rows.add(index)
+        self._show_batch_status(name)
 
-        processing_count = sum(
-            1 for i in range(self.center_panel.track_table.rowCount())
-        )
-        self.left_panel.update_progress(f"⚡ {processing_count} tracks\n{short_name}")
+    def _show_batch_status(self, name=""):
+        short_name = name[:20] + "..." if len(name) > 20 else name
+        lines = [f"⚡ {len(self._processing_rows)} tracks"]
+        if self._batch_status:
+            lines.append(self._batch_status)
+        if short_name:
+            lines.append(short_name)
+        self.left_panel.update_progress("\n".join(lines))
+
+    def on_track_progress(self, index, percent, speed):
+        """Live render progress of one track"""
+        if index in self._processing_rows:
+            self.center_panel.track_table.update_track_progress(index, percent, speed)
+
+    def on_batch_progress(self, eta, throughput):
+        """Batch ETA and throughput (seconds of audio per second)"""
+        if eta < 0:
+            return
+        self._batch_status = f"ETA {int(eta // 60)}:{int(eta % 60):02d} · {throughput:.0f}s/s"
+        self._show_batch_status()
 
     def on_track_completed(self, index, success, message, after_lufs=0.0, final_peak=0.0):
         """Handle track processing completed"""
+        self._processing_rows.discard(index)
         if success:
             self.center_panel.track_table.update_track_status(index, 'completed')
             self.center_panel.track_table.update_after_processing(index, after_lufs, final_peak)
+            if index in self.parallel_processor.linked:
+                self.center_panel.track_table.mark_linked(index, self.parallel_processor.duplicate_of[index])
 
             if index < len(self.tracks):
                 track = self.tracks[index]
@@ -219,9 +293,7 @@ class MainWindow(QMainWindow):
 
                 processed_path = track.get('processed_path', '')
                 if not processed_path:
-                    output_format = self.left_panel.get_output_format()
-                    processed_name = self.get_output_filename(track['name'], output_format)
-                    processed_path = os.path.join(self.output_folder, processed_name)
+                    processed_path = self.parallel_processor.output_path(index)
 
                 track['processed_path'] = processed_path
                 name_item = self.center_panel.track_table.item(index, 0)
@@ -230,6 +302,8 @@ class MainWindow(QMainWindow):
 
         elif "Skipped by user" in message:
             pass
+        elif message == "Cancelled":
+            self.center_panel.track_table.update_track_status(index, 'skipped')
         else:
             self.center_panel.track_table.update_track_status(index, 'error')
 
@@ -333,20 +407,9 @@ class MainWindow(QMainWindow):
 
         self.center_panel.folder_watch_panel.log_file_detected(file_path)
 
-        class TrackAnalyzer(QThread):
-            def __init__(self, analyzer, file_path):
-                super().__init__()
-                self.analyzer = analyzer
-                self.file_path = file_path
-                self.analysis = None
-
-            def run(self):
-                self.analysis = self.analyzer.analyze_track(self.file_path)
-
-        analyzer_thread = TrackAnalyzer(self.analyzer, file_path)
-
-        def on_analysis_complete():
-            analysis = analyzer_thread.analysis
+        def on_analysis_complete(analysis):
+            if analysis is None:
+                return
             track_data = {
                 'path': file_path,
                 'name': os.path.basename(file_path),
@@ -363,13 +426,7 @@ class MainWindow(QMainWindow):
             if config.get('autoProcess', True):
                 self.auto_process_track(len(self.tracks) - 1, config)
 
-            # Clean up finished thread from list
-            if analyzer_thread in self._analyzer_threads:
-                self._analyzer_threads.remove(analyzer_thread)
-
-        analyzer_thread.finished.connect(on_analysis_complete)
-        self._analyzer_threads.append(analyzer_thread)  
-        analyzer_thread.start()
+        self.jobs.submit(self.analyzer.analyze_track, file_path, on_done=on_analysis_complete)
 
     def _add_track_async(self, file_path, target_lufs=None):
         """Add track with background analysis"""
@@ -405,21 +462,10 @@ class MainWindow(QMainWindow):
         }
         self.tracks.append(placeholder_data)
 
-        class TrackAnalyzer(QThread):
-            def __init__(self, analyzer, file_path):
-                super().__init__()
-                self.analyzer = analyzer
-                self.file_path = file_path
-                self.analysis = None
-
-            def run(self):
-                self.analysis = self.analyzer.analyze_track(self.file_path)
-
-        analyzer_thread = TrackAnalyzer(self.analyzer, file_path)
-
         # Fix: capture idx and tgt as default args so each closure has its own copy
-        def on_analysis_complete(idx=row_index, tgt=target_lufs):
-            analysis = analyzer_thread.analysis
+        def on_analysis_complete(analysis, idx=row_index, tgt=target_lufs):
+            if analysis is None:
+                return
 
             track_data = {
                 'path': file_path,
@@ -432,6 +478,7 @@ class MainWindow(QMainWindow):
             name_item = self.center_panel.track_table.item(idx, 0)
             if name_item:
                 name_item.setData(Qt.UserRole + 2, track_data.get('health_issues', []))
+            self.center_panel.track_table.show_recommendation(idx, track_data)
 
             duration = track_data.get('duration', 0)
             time_str = f"{int(duration//60)}:{int(duration%60):02d}" if duration > 0 else "0:00"
@@ -487,13 +534,7 @@ class MainWindow(QMainWindow):
 
             self.right_panel.update_health_display(self.tracks)
 
-            # Clean up finished thread from list
-            if analyzer_thread in self._analyzer_threads:
-                self._analyzer_threads.remove(analyzer_thread)
-
-        analyzer_thread.finished.connect(on_analysis_complete)
-        self._analyzer_threads.append(analyzer_thread) 
-        analyzer_thread.start()
+        self.jobs.submit(self.analyzer.analyze_track, file_path, on_done=on_analysis_complete)
 
     def auto_process_track(self, track_index, config):
         """Auto-process single track from watched folder"""
@@ -513,39 +554,12 @@ class MainWindow(QMainWindow):
 
         self.center_panel.track_table.update_track_status(track_index, 'processing')
 
-        class SingleTrackProcessor(QThread):
-            def __init__(self, processor, input_path, preset_id, output_path, output_format):
-                super().__init__()
-                self.processor = processor
-                self.input_path = input_path
-                self.preset_id = preset_id
-                self.output_path = output_path
-                self.output_format = output_format
-                self.result = None
-
-            def run(self):
-                self.result = self.processor.process_track(
-                    self.input_path,
-                    self.preset_id,
-                    self.output_path,
-                    self.output_format
-                )
-
-        thread = SingleTrackProcessor(
-            self.processor,
-            input_path,
-            config['presetId'],
-            output_path,
-            output_format
-        )
-
-        def on_finished():
-            result = thread.result
-
+        def on_finished(result):
             if result and result['success']:
                 self.center_panel.track_table.update_track_status(track_index, 'completed')
                 after_lufs = result.get('final_lufs', -12.0)
-                self.center_panel.track_table.update_after_processing(track_index, after_lufs, -1.0)
+                final_peak = result.get('final_peak', -1.0)
+                self.center_panel.track_table.update_after_processing(track_index, after_lufs, final_peak)
 
                 self.analyzer.invalidate(input_path)
 
@@ -561,70 +575,11 @@ class MainWindow(QMainWindow):
                 self.center_panel.track_table.update_track_status(track_index, 'error')
                 self.center_panel.folder_watch_panel.log_file_processed(input_path, False)
 
-            if thread in self._auto_process_threads:
-                self._auto_process_threads.remove(thread)
-
-        thread.finished.connect(on_finished)
-
-        # Append BEFORE start — prevents garbage collection race condition
-        # where thread finishes before it's added to the list
-        self._auto_process_threads.append(thread)
-        thread.start()
-
-
-
-    def get_output_filename(self, original_name, output_format):
-        """Generate output filename"""
-        clean_name = self.clean_filename(original_name)
-
-        if output_format == "aiff":
-            ext = ".aiff"
-        elif output_format == "flac":
-            ext = ".flac"
-        else:
-            ext = ".wav"
-
-        naming = self.left_panel.get_naming_convention()
-        if naming == "Original - DJ OPT":
-            return f"{clean_name} - DJ OPT{ext}"
-        elif naming == "DJ OPT - Original":
-            return f"DJ OPT - {clean_name}{ext}"
-        elif naming == "Original (Optimized)":
-            return f"{clean_name} (Optimized){ext}"
-        elif naming == "Original_DJ_OPT":
-            return f"{clean_name}_DJ_OPT{ext}"
-        else:
-            return f"{clean_name} - DJ OPT{ext}"
-
-    def clean_filename(self, filename):
-        """Clean filename by removing unwanted phrases"""
-        import re
-
-        base_name = os.path.splitext(filename)[0]
-
-        unwanted_phrases = [
-            r'\(official\s+video\)', r'\(official\s+audio\)',
-            r'\(official\s+music\s+video\)', r'\(music\s+video\)',
-            r'\(lyric\s+video\)', r'\(lyrics\)', r'\(hd\)', r'\(4k\)',
-            r'\(1080p\)', r'\(720p\)', r'\[official\s+video\]',
-            r'\[official\s+audio\]', r'\[official\s+music\s+video\]',
-            r'\[music\s+video\]', r'\[lyric\s+video\]', r'\[lyrics\]',
-            r'\[hd\]', r'\[4k\]', r'\[1080p\]', r'\[720p\]',
-            r'official\s+video', r'official\s+audio',
-            r'official\s+music\s+video', r'music\s+video',
-            r'lyric\s+video', r'lyrics'
-        ]
-
-        cleaned_name = base_name
-        for phrase in unwanted_phrases:
-            cleaned_name = re.sub(phrase, '', cleaned_name, flags=re.IGNORECASE)
-
-        cleaned_name = re.sub(r'\s+', ' ', cleaned_name)
-        cleaned_name = re.sub(r'\s*-\s*$', '', cleaned_name)
-        cleaned_name = re.sub(r'^\s*-\s*', '', cleaned_name)
-        cleaned_name = cleaned_name.strip()
-
-        return cleaned_name if cleaned_name else base_name
+        self.jobs.submit(
+            self.processor.process_track,
+            input_path, config['presetId'], output_path, output_format, track,
+            on_done=on_finished
+        )
 
     def _is_processed_file(self, filename):
         """Check if filename indicates already processed"""
@@ -748,4 +703,6 @@ class MainWindow(QMainWindow):
             self.watch_config.save_folder_snapshot(folder_config['path'])
 
         self.folder_watcher.stop()
+        self.parallel_processor.shutdown()
+        self.engine.shutdown()
         event.accept()
@@ -13,6 +13,7 @@ class LeftPanel(QFrame):
     output_folder_changed = Signal(str)  # folder_path
     process_clicked = Signal()
     cancel_clicked = Signal()
+    pause_toggled = Signal(bool)  # True = pause
     preset_manager_requested = Signal()
     
     def __init__(self, preset_manager, output_folder):
@@ -70,6 +71,23 @@ class LeftPanel(QFrame):
         self.format_combo.addItems(["WAV 24-bit", "WAV 16-bit", "AIFF", "FLAC"])
         layout.addWidget(self.format_combo)
         
+        # Sample Rate
+        layout.addWidget(QLabel("Sample Rate"))
+        self.sample_rate_combo = QComboBox()
+        self.sample_rate_combo.setMinimumHeight(30)
+        self.sample_rate_combo.addItem("44.1 kHz (fixed)", "fixed_44100")
+        self.sample_rate_combo.addItem("Native (44.1 / 48 kHz)", "native")
+        layout.addWidget(self.sample_rate_combo)
+        
+        # Leveling
+        layout.addWidget(QLabel("Leveling"))
+        self.leveling_combo = QComboBox()
+        self.leveling_combo.setMinimumHeight(30)
+        self.leveling_combo.addItem("Per track (to target)", "track")
+        self.leveling_combo.addItem("Whole set (keep relative levels)", "set")
+        self.leveling_combo.setToolTip("Whole set: one gain for the batch — quieter tracks stay quieter")
+        layout.addWidget(self.leveling_combo)
+        
         layout.addSpacing(10)
         
         # Output Folder
@@ -145,6 +163,14 @@ class LeftPanel(QFrame):
         self.process_button.clicked.connect(self._on_process_button_clicked)
         layout.addWidget(self.process_button)
         
+        # Pause / Resume — only visible while a batch runs
+        self.pause_button = QPushButton("⏸ PAUSE")
+        self.pause_button.setMinimumHeight(30)
+        self.pause_button.setCheckable(True)
+        self.pause_button.setVisible(False)
+        self.pause_button.toggled.connect(self._on_pause_toggled)
+        layout.addWidget(self.pause_button)
+        
         scroll.setWidget(content)
         panel_layout = QVBoxLayout(self)
         panel_layout.setContentsMargins(0, 0, 0, 0)
@@ -185,6 +211,11 @@ class LeftPanel(QFrame):
         else:
             self.process_clicked.emit()
     
+    def _on_pause_toggled(self, paused):
+        """Handle pause button toggle"""
+        self.pause_button.setText("▶ RESUME" if paused else "⏸ PAUSE")
+        self.pause_toggled.emit(paused)
+    
     def set_processing_state(self, processing):
         """Update UI for processing state"""
         self.is_processing = processing
@@ -192,6 +223,13 @@ class LeftPanel(QFrame):
             self.process_button.setText("⏹ CANCEL ALL")
         else:
             self.process_button.setText("PROCESS TRACKS")
+        
+        # Reset pause state without emitting — the batch is starting or over
+        self.pause_button.blockSignals(True)
+        self.pause_button.setChecked(False)
+        self.pause_button.setText("⏸ PAUSE")
+        self.pause_button.blockSignals(False)
+        self.pause_button.setVisible(processing)
     
     def update_progress(self, text, value=None, maximum=None):
         """Update progress display"""
@@ -220,6 +258,14 @@ class LeftPanel(QFrame):
         }
         return format_map.get(self.format_combo.currentText(), "wav_24")
     
+    def get_sample_rate_mode(self):
+        """Get selected sample rate mode"""
+        return self.sample_rate_combo.currentData()
+    
+    def get_leveling_mode(self):
+        """Get selected leveling mode — 'track' or 'set'"""
+        return self.leveling_combo.currentData()
+    
     def get_naming_convention(self):
         """Get selected naming convention"""
         return self.naming_combo.currentText()
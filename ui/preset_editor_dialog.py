@@ -1,15 +1,73 @@
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                                QSlider, QPushButton, QLineEdit, QTextEdit, QFrame, QScrollArea, QWidget)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, QUrl
+from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+from core.processor import AudioProcessor
+from core.process_registry import ProcessCancelled
+from core.qt_engine import QtEngineAdapter
+import os
+import shutil
+import tempfile
+import threading
+
+
+def render_excerpt_job(processor, track, preset, output_path, registry):
+    """Engine job rendering one excerpt preview — None when a newer request cancelled it"""
+    try:
+        return processor.render_preview(track['path'], preset, output_path, analysis=track, registry=registry)
+    except ProcessCancelled:
+        return None
+
+
+def remove_when_finished(jobs, path):
+    """
+    Remove the folder at path once every job has finished — the last one
+    to finish removes it, so the caller never waits for a job slot.
+    """
+    pending = [job for job in jobs if not job.done()]
+    if not pending:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+
+    lock = threading.Lock()
+    remaining = [len(pending)]
+
+    def finished(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            shutil.rmtree(path, ignore_errors=True)
+
+    for job in pending:
+        job.add_done_callback(finished)
+
 
 class PresetEditorDialog(QDialog):
     """Visual preset editor with sliders and validation"""
+
+    # Quiet time after the last slider move before the excerpt is re-rendered
+    PREVIEW_DEBOUNCE_MS = 150
     
-    def __init__(self, preset_manager, preset_id=None, parent=None):
+    def __init__(self, preset_manager, preset_id=None, parent=None, preview_track=None, engine=None):
         super().__init__(parent)
         self.preset_manager = preset_manager
         self.preset_id = preset_id
         self.is_edit_mode = preset_id is not None
+
+        # Analyzed track (main window track dict) auditioned through the
+        # edited values — every change re-renders an excerpt of it as a job
+        # on the app's engine, in a scope of its own: a newer request cancels
+        # the FFmpeg run of the one before, and previews share the CPU budget
+        self.preview_track = preview_track if engine is not None else None
+        self.processor = AudioProcessor() if self.preview_track else None
+        self.engine = engine
+        self.jobs = QtEngineAdapter(engine, self) if self.preview_track else None
+        self._preview_generation = 0
+        self._preview_registry = None
+        self._preview_jobs = []
+        self._preview_path = None
+        self._preview_dir = tempfile.mkdtemp(prefix='deckready_preview_') if self.preview_track else None
         
         if self.is_edit_mode:
             self.preset_data = self.preset_manager.get_preset(preset_id).copy()
@@ -95,6 +153,9 @@ class PresetEditorDialog(QDialog):
         self.preview_text.setReadOnly(True)
         self.preview_text.setMaximumHeight(80)
         layout.addWidget(self.preview_text)
+
+        if self.preview_track:
+            self._setup_excerpt_preview(layout)
         
         # Warning
         self.warning_label = QLabel()
@@ -123,6 +184,30 @@ class PresetEditorDialog(QDialog):
         
         self.apply_dark_theme()
     
+    def _setup_excerpt_preview(self, layout):
+        """Excerpt status line and play button, plus the debounce timer and player"""
+        excerpt_layout = QHBoxLayout()
+        self.excerpt_label = QLabel(f"🎧 {self.preview_track.get('name', '')}")
+        self.excerpt_label.setWordWrap(True)
+        self.excerpt_label.setStyleSheet("color: #aaa; font-size: 11px;")
+        excerpt_layout.addWidget(self.excerpt_label, 1)
+
+        self.play_btn = QPushButton("▶ Play")
+        self.play_btn.setEnabled(False)
+        self.play_btn.clicked.connect(self.toggle_playback)
+        excerpt_layout.addWidget(self.play_btn)
+        layout.addLayout(excerpt_layout)
+
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.render_excerpt)
+
+        self.player = QMediaPlayer(self)
+        self.audio_output = QAudioOutput(self)
+        self.player.setAudioOutput(self.audio_output)
+        self.player.playbackStateChanged.connect(self.on_playback_state_changed)
+
     def _create_slider(self, min_val, max_val, current_val, step, unit):
         """Create slider with label"""
         steps = int((max_val - min_val) / step)
@@ -186,6 +271,92 @@ class PresetEditorDialog(QDialog):
             self.warning_label.setText("✅ All settings are safe")
             self.warning_label.setStyleSheet("color: #00ff88; font-size: 11px;")
             self.save_btn.setEnabled(True)
+
+        if self.preview_track and not validation['errors']:
+            self.preview_timer.start()
+
+    def render_excerpt(self):
+        """Re-render the excerpt with the current values — cancels the request still running"""
+        self._preview_generation += 1
+        if self._preview_registry is not None:
+            self._preview_registry.cancel()
+        self._preview_registry = self.engine.scope()
+
+        generation = self._preview_generation
+        output_path = os.path.join(self._preview_dir, f"preview_{generation}.wav")
+        future = self.jobs.submit(
+            render_excerpt_job, self.processor, self.preview_track, dict(self.preset_data),
+            output_path, self._preview_registry,
+            on_done=lambda result, generation=generation: self.on_excerpt_rendered(generation, result)
+        )
+        self._preview_jobs = [job for job in self._preview_jobs if not job.done()] + [future]
+        self.excerpt_label.setText(f"🎧 Rendering {self.preview_track.get('name', '')}…")
+
+    def on_excerpt_rendered(self, generation, result):
+        if result is None:
+            return  # cancelled by a newer request
+        if generation != self._preview_generation:
+            # Outdated — a newer request is already on its way
+            self._remove_file(result.get('output_path'))
+            return
+
+        name = self.preview_track.get('name', '')
+        if not result.get('success'):
+            self.excerpt_label.setText(f"🎧 {name} — preview failed: {result.get('error', 'unknown error')}")
+            return
+
+        start = result['start']
+        end = start + result['seconds']
+        text = f"🎧 {name} {int(start // 60)}:{int(start % 60):02d}–{int(end // 60)}:{int(end % 60):02d}"
+        if result.get('lufs') is not None and result.get('peak') is not None:
+            text += f" → {result['lufs']:.1f} LUFS, peak {result['peak']:.1f} dB"
+        self.excerpt_label.setText(text)
+
+        # Swap the new render in where playback is, so slider moves are heard live
+        previous = self._preview_path
+        self._preview_path = result['output_path']
+        playing = self.player.playbackState() == QMediaPlayer.PlayingState
+        position = self.player.position()
+        self.player.setSource(QUrl.fromLocalFile(self._preview_path))
+        if playing:
+            self.player.setPosition(position)
+            self.player.play()
+        self.play_btn.setEnabled(True)
+        self._remove_file(previous)
+
+    def toggle_playback(self):
+        if self.player.playbackState() == QMediaPlayer.PlayingState:
+            self.player.stop()
+        elif self._preview_path:
+            self.player.play()
+
+    def on_playback_state_changed(self, state):
+        self.play_btn.setText("■ Stop" if state == QMediaPlayer.PlayingState else "▶ Play")
+
+    def _remove_file(self, path):
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass  # still open by the player — goes with the preview folder
+
+    def done(self, result):
+        """Stop the preview and remove its renders when the dialog closes"""
+        if self.preview_track:
+            self.preview_timer.stop()
+            # Late results count as outdated — their files go with the folder
+            self._preview_generation += 1
+            if self._preview_registry is not None:
+                self._preview_registry.cancel()
+            self.player.stop()
+            self.player.setSource(QUrl())
+            # Never wait here — while a batch holds every job slot that could
+            # take minutes. Jobs still queued for a slot are dropped, a running
+            # one stops at the cancelled scope, and the folder goes with the last.
+            for job in self._preview_jobs:
+                job.cancel()
+            remove_when_finished(self._preview_jobs, self._preview_dir)
+        super().done(result)
     
     def _generate_preset_id(self, label):
         """Generate a safe, unique preset ID from a label"""
@@ -6,9 +6,13 @@ from .preset_editor_dialog import PresetEditorDialog
 class PresetManagerDialog(QDialog):
     """Manage presets - list, create, edit, duplicate, delete"""
     
-    def __init__(self, preset_manager, parent=None):
+    def __init__(self, preset_manager, parent=None, preview_track=None, engine=None):
         super().__init__(parent)
         self.preset_manager = preset_manager
+        # Analyzed track the editor auditions presets on, rendered on the
+        # app's FFmpegEngine — None for either hides the preview
+        self.preview_track = preview_track
+        self.engine = engine
         self.setup_ui()
         self.load_presets()
     
@@ -99,7 +103,8 @@ class PresetManagerDialog(QDialog):
     
     def new_preset(self):
         """Create new preset"""
-        dialog = PresetEditorDialog(self.preset_manager, parent=self)
+        dialog = PresetEditorDialog(self.preset_manager, parent=self, preview_track=self.preview_track,
+                                    engine=self.engine)
         if dialog.exec():
             self.load_presets()
     
@@ -117,7 +122,8 @@ class PresetManagerDialog(QDialog):
                               "Default presets cannot be edited.\nUse 'Duplicate' to create a custom version.")
             return
         
-        dialog = PresetEditorDialog(self.preset_manager, preset_id, parent=self)
+        dialog = PresetEditorDialog(self.preset_manager, preset_id, parent=self,
+                                    preview_track=self.preview_track, engine=self.engine)
         if dialog.exec():
             self.load_presets()
     
@@ -2,6 +2,7 @@ from PySide6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QMenu
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QColor
 from .waveform_dialog import WaveformDialog
+from core.compliance import is_compliant, display_tolerance
 import os
 
 class TrackTable(QTableWidget):
@@ -118,6 +119,7 @@ class TrackTable(QTableWidget):
         name_item.setData(Qt.UserRole, track_data.get('path'))
         name_item.setData(Qt.UserRole + 2, track_data.get('health_issues', []))
         self.setItem(row, 0, name_item)
+        self.show_recommendation(row, track_data)
 
         duration = track_data.get('duration', 0)
         time_str = f"{int(duration//60)}:{int(duration%60):02d}" if duration > 0 else "0:00"
@@ -184,15 +186,9 @@ class TrackTable(QTableWidget):
         """Check if track is already optimized with smart tolerance"""
         if target_lufs is None:
             return False
-        
-        if target_lufs >= -10:
-            tolerance = 2.0
-        elif target_lufs >= -14:
-            tolerance = 1.5
-        else:
-            tolerance = 1.0
-        
-        return abs(lufs - target_lufs) <= tolerance and peak < 0.0
+
+        # Peaks are shown to 0.1 dB — "under 0.0" is a -0.1 ceiling
+        return is_compliant(lufs, peak, target_lufs, -0.1, tolerance=display_tolerance(target_lufs))
 
     def update_track_status(self, row, status):
         status_configs = {
@@ -209,6 +205,37 @@ class TrackTable(QTableWidget):
             self.setItem(row, 6, item)
 
 
+    def show_recommendation(self, row, track_data):
+        """Suggested preset from the analysis (PresetRecommender) as the name's tooltip"""
+        name_item = self.item(row, 0)
+        predictions = track_data.get('preset_predictions')
+        if not name_item or not predictions:
+            return
+        best = predictions[0]
+        limiting = f"{best['limiting_db']:.1f} dB limiting" if best['limiting_db'] > 0 else "no limiting"
+        name_item.setToolTip(
+            f"Suggested preset: {best['label']}\n"
+            f"Predicted {best['lufs']:.1f} LUFS, peak {best['peak']:.1f} dB, {limiting}"
+        )
+
+    def mark_linked(self, row, source_row):
+        """Row satisfied by another row's job — same audio, its outputs are links to that render"""
+        item = self._create_item("🔗 LINKED", center=True)
+        item.setBackground(QColor("#2a6fb0"))
+        item.setForeground(QColor("white"))
+        item.setToolTip(f"Same audio as row {source_row + 1} — output linked to its render")
+        self.setItem(row, 6, item)
+
+    def update_track_progress(self, row, percent, speed):
+        """Live status while rendering — percent (-1 if unknown) and speed × realtime"""
+        text = f"⚡ {percent:.0f}%" if percent >= 0 else "⚡ PROCESSING"
+        if speed > 0:
+            text += f" · {speed:.0f}×"
+        item = self._create_item(text, center=True)
+        item.setBackground(QColor("#ffaa00"))
+        item.setForeground(QColor("black"))
+        self.setItem(row, 6, item)
+
     def update_after_processing(self, row, after_lufs, final_peak):
         after_item = self._create_item(f"{after_lufs:.1f}", center=True)
         after_item.setBackground(QColor("#00aa44"))
@@ -255,6 +282,11 @@ class TrackTable(QTableWidget):
         """Professional club-safe criteria"""
         return -14 <= lufs <= -8 and peak_db < 0.0
 
+    def selected_track_path(self):
+        """Path of the track in the current row, or None"""
+        name_item = self.item(self.currentRow(), 0) if self.currentRow() >= 0 else None
+        return name_item.data(Qt.UserRole) if name_item else None
+
     def get_track_count(self):
         return self.rowCount()
     